@@ -1,9 +1,11 @@
 from .hardcoded_data_path import HardcodedDataPathChecker
 from .hyperparameter_check import HyperparameterExplicitSetChecker
 from .missing_random_seed import MissingRandomSeedChecker
+from .performance_check import PerformanceAntiPatternChecker
 
 
 def register(linter):
     linter.register_checker(HardcodedDataPathChecker(linter))
     linter.register_checker(MissingRandomSeedChecker(linter))
     linter.register_checker(HyperparameterExplicitSetChecker(linter))
+    linter.register_checker(PerformanceAntiPatternChecker(linter))
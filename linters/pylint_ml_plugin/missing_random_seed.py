@@ -1,5 +1,97 @@
+import hashlib
+import json
+import os
+
+from astroid import nodes
 from pylint.checkers import BaseChecker
 
+# Bump when the analysis changes so cached results are not reused
+ANALYSIS_VERSION = "2"
+CACHE_FILE = "missing_random_seed.json"
+
+SEED_FUNCS = {
+    "random.seed": "random",
+    "numpy.random.seed": "numpy",
+    "torch.manual_seed": "torch",
+    "tensorflow.random.set_seed": "tensorflow",
+}
+GENERATORS = {"numpy.random.default_rng", "numpy.random.RandomState", "random.Random"}
+NOT_CONSUMERS = {
+    "seed", "default_rng", "RandomState", "Generator", "SeedSequence", "BitGenerator",
+    "PCG64", "MT19937", "Random", "SystemRandom", "get_state", "set_state", "getstate", "setstate",
+}
+TORCH_CONSUMERS = {"rand", "randn", "randint", "randperm", "bernoulli", "multinomial", "normal"}
+# sklearn callables whose result depends on random_state; the value says which keyword must
+# also be set for randomness to be used at all (e.g. KFold only shuffles with shuffle=True)
+RANDOM_STATE_CONSUMERS = {
+    "train_test_split": None,
+    "ShuffleSplit": None,
+    "GroupShuffleSplit": None,
+    "StratifiedShuffleSplit": None,
+    "KFold": "shuffle",
+    "StratifiedKFold": "shuffle",
+    "resample": None,
+    "shuffle": None,
+    "RandomForestClassifier": None,
+    "ExtraTreesClassifier": None,
+    "DecisionTreeClassifier": None,
+    "GradientBoostingClassifier": None,
+    "SGDClassifier": None,
+    "MLPClassifier": None,
+    "RandomizedSearchCV": None,
+    "make_classification": None,
+}
+FIXES = {
+    "random": "call random.seed(...) first",
+    "numpy": "use rng = np.random.default_rng(seed) or call np.random.seed(...) first",
+    "torch": "call torch.manual_seed(...) first",
+    "tensorflow": "pass seed=... or call tf.random.set_seed(...) first",
+}
+
+
+def _import_target(name_node):
+    """Dotted module path a name was imported as, or None if it is not an import."""
+    name = name_node.name
+    _, assignments = name_node.lookup(name)
+    for assignment in assignments:
+        if isinstance(assignment, nodes.Import):
+            for modname, alias in assignment.names:
+                if (alias or modname.split(".")[0]) == name:
+                    return modname if alias else name
+        elif isinstance(assignment, nodes.ImportFrom):
+            for imported, alias in assignment.names:
+                if (alias or imported) == name:
+                    return f"{assignment.modname}.{imported}"
+    return None
+
+
+def qualified_name(call):
+    """Resolve the callee of a call to its dotted import path, e.g. `np.random.choice` -> numpy.random.choice."""
+    parts = []
+    func = call.func
+    while isinstance(func, nodes.Attribute):
+        parts.append(func.attrname)
+        func = func.expr
+    if not isinstance(func, nodes.Name):
+        return None
+    root = _import_target(func)
+    if root is None:
+        return None
+    return ".".join([root] + parts[::-1])
+
+
+def _scope_chain(node):
+    scope = node.scope()
+    while True:
+        yield scope
+        if scope.parent is None:
+            return
+        scope = scope.parent.scope()
+
+
+def _keywords(call):
+    return {kw.arg: kw.value for kw in call.keywords or ()}
+
 
 class MissingRandomSeedChecker(BaseChecker):
 
@@ -7,79 +99,134 @@ class MissingRandomSeedChecker(BaseChecker):
     priority = -1
     msgs = {
         "W9002": (
-            "No random seed set for module(s): %s",
+            "Unseeded random number generation in `%s`; suggested fix: %s",
             "missing-random-seed",
             "Random seed not set; results may be nondeterministic.",
         ),
+        "W9009": (
+            "`%s` called without random_state; suggested fix: pass random_state=<seed>",
+            "random-state-not-set",
+            "scikit-learn draws a different split or model on every run unless random_state is set.",
+        ),
     }
-
-    # Map aliases to canonical module names
-    ALIAS_MAP = {
-        "np": "numpy",
-        "tf": "tensorflow",
-    }
+    options = (
+        (
+            "ml-cache-dir",
+            {
+                "default": ".pylint_ml_cache",
+                "type": "string",
+                "metavar": "<dir>",
+                "help": "Directory caching per-module seed analysis by file hash; empty to disable.",
+            },
+        ),
+    )
 
     def __init__(self, linter=None):
         super().__init__(linter)
-        self.imported_modules = set()
-        self.seed_set_modules = set()
-        self.module_node = None
+        self.cache = None
+        self.cache_dirty = False
 
-    def visit_module(self, node):
-        self.module_node = node
-
-    def visit_import(self, node):
-        for name, alias in node.names:
-            self.imported_modules.add(name)
-            if alias:
-                self.imported_modules.add(alias)
-
-    def visit_importfrom(self, node):
-        if node.modname:
-            self.imported_modules.add(node.modname)
-            for name, alias in node.names:
-                if alias:
-                    self.imported_modules.add(alias)
-                else:
-                    self.imported_modules.add(name)
-
-    def visit_call(self, node):
-        try:
-            func_name = node.func.as_string()
-        except AttributeError:
-            return
+    def _cache_path(self):
+        cache_dir = getattr(self.linter.config, "ml_cache_dir", "") if self.linter else ""
+        return os.path.join(cache_dir, CACHE_FILE) if cache_dir else None
 
-        if func_name in (
-            "random.seed",
-            "numpy.random.seed",
-            "np.random.seed",
-            "torch.manual_seed",
-            "tensorflow.random.set_seed",
-            "tf.random.set_seed",
-        ):
-            base = func_name.split(".")[0]
-            self.seed_set_modules.add(base)
-
-    def _normalize_modules(self, modules):
-        """Convert aliases to canonical module names."""
-        normalized = set()
-        for mod in modules:
-            normalized.add(self.ALIAS_MAP.get(mod, mod))
-        return normalized
+    def open(self):
+        self.cache, self.cache_dirty = {}, False
+        path = self._cache_path()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError):
+                self.cache = {}
 
     def close(self):
-        modules_requiring_seed = {"random", "numpy", "torch", "tensorflow"}
+        path = self._cache_path()
+        if not path or not self.cache_dirty:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_path, path)
+
+    def visit_module(self, node):
+        if node.file:
+            with node.stream() as stream:
+                source = stream.read()
+        else:
+            source = node.as_string().encode("utf-8")
+        key = hashlib.sha256(ANALYSIS_VERSION.encode() + source).hexdigest()
+        findings = self.cache.get(key) if self.cache is not None else None
+        if findings is None:
+            findings = self._analyze(node)
+            if self.cache is not None:
+                self.cache[key] = findings
+                self.cache_dirty = True
+        for msgid, line, col, args in findings:
+            self.add_message(msgid, line=line, col_offset=col, node=node, args=tuple(args))
+
+    def _analyze(self, module):
+        """Return (message, line, column, args) for every unseeded RNG call in the module."""
+        calls = [(call, qualified_name(call)) for call in module.nodes_of_class(nodes.Call)]
+        seeds = [(SEED_FUNCS[name], call) for call, name in calls if name in SEED_FUNCS]
+        findings = []
+
+        def report(msgid, call, *args):
+            findings.append((msgid, call.lineno, call.col_offset, [call.func.as_string(), *args]))
+
+        for call, name in calls:
+            if name is None:
+                continue
+            last = name.rsplit(".", 1)[-1]
+            if name in GENERATORS:
+                if not call.args or (isinstance(call.args[0], nodes.Const) and call.args[0].value is None):
+                    report("missing-random-seed", call, "pass a seed, e.g. np.random.default_rng(42)")
+                continue
+            library = self._global_rng(name, last, call)
+            if library and not self._seeded_before(call, library, seeds):
+                report("missing-random-seed", call, FIXES[library])
+            elif name.startswith("sklearn.") and last in RANDOM_STATE_CONSUMERS:
+                keywords = _keywords(call)
+                required = RANDOM_STATE_CONSUMERS[last]
+                uses_randomness = required is None or (
+                    isinstance(keywords.get(required), nodes.Const) and keywords[required].value
+                )
+                if uses_randomness and "random_state" not in keywords:
+                    findings.append(("random-state-not-set", call.lineno, call.col_offset, [last]))
+        return findings
 
-        normalized_imports = self._normalize_modules(self.imported_modules)
-        normalized_seeds = self._normalize_modules(self.seed_set_modules)
+    @staticmethod
+    def _global_rng(name, last, call):
+        """Library whose global RNG a call draws from, or None."""
+        if last in NOT_CONSUMERS:
+            return None
+        if name.startswith("numpy.random."):
+            return "numpy"
+        if name.startswith("random.") and name.count(".") == 1:
+            return "random"
+        if name.startswith("torch.") and name.count(".") == 1 and last in TORCH_CONSUMERS:
+            return "torch"
+        if name.startswith("tensorflow.random.") and "seed" not in _keywords(call):
+            return "tensorflow"
+        return None
 
-        used_without_seed = (
-            normalized_imports & modules_requiring_seed
-        ) - normalized_seeds
+    @staticmethod
+    def _seeded_before(call, library, seeds):
+        """Whether a seed call for `library` runs before `call`.
 
-        if used_without_seed:
-            self.add_message(
-                "missing-random-seed",
-                node=self.module_node,
-                args=(", ".join(sorted(used_without_seed)),),
-            )
+        Module-level seeds cover every function; inside a function, a seed counts if it is
+        earlier in the same or an enclosing function.
+        """
+        chain = list(_scope_chain(call))
+        for seed_library, seed in seeds:
+            if seed_library != library:
+                continue
+            seed_scope = seed.scope()
+            if seed_scope not in chain:
+                continue
+            if isinstance(seed_scope, nodes.Module) and call.scope() is not seed_scope:
+                return True
+            if seed.lineno < call.lineno:
+                return True
+        return False
@@ -0,0 +1,140 @@
+from astroid import nodes
+from pylint.checkers import BaseChecker
+
+PREDICT_METHODS = {"predict", "predict_proba", "predict_log_proba", "decision_function"}
+NP_LOAD = {"np.load", "numpy.load"}
+JOBLIB_LOAD = {"joblib.load", "load"}
+DENSIFY_METHODS = {"toarray", "todense"}
+ROW_WISE_METHODS = {"apply", "map", "applymap"}
+ROW_ITERATORS = {"iterrows", "itertuples"}
+TYPE_SCAN_FUNCS = {"str", "isinstance"}
+COMPREHENSIONS = (nodes.ListComp, nodes.SetComp, nodes.DictComp, nodes.GeneratorExp)
+SCOPES = (nodes.FunctionDef, nodes.AsyncFunctionDef, nodes.ClassDef, nodes.Module, nodes.Lambda)
+
+
+def _enclosing_loop(node):
+    """Return the innermost loop that runs `node` repeatedly, stopping at the enclosing scope."""
+    child, parent = node, node.parent
+    while parent is not None and not isinstance(parent, SCOPES):
+        if isinstance(parent, (nodes.For, nodes.AsyncFor)):
+            if child is not parent.iter and child not in parent.orelse:
+                return parent
+        elif isinstance(parent, nodes.While):
+            if child not in parent.orelse:
+                return parent
+        elif isinstance(parent, nodes.Comprehension):
+            if child is not parent.iter:
+                return parent
+        elif isinstance(parent, COMPREHENSIONS) and child not in parent.generators:
+            return parent
+        child, parent = parent, parent.parent
+    return None
+
+
+def _opens_archive(node):
+    """Whether an `np.load` call is the context manager of a `with`, which only an .npz archive supports."""
+    parent = node.parent
+    return isinstance(parent, nodes.With) and any(item is node for item, _ in parent.items)
+
+
+def _calls_type_scan(node):
+    return any(
+        isinstance(call.func, nodes.Name) and call.func.name in TYPE_SCAN_FUNCS
+        for call in node.nodes_of_class(nodes.Call)
+    )
+
+
+class PerformanceAntiPatternChecker(BaseChecker):
+
+    name = "ml-performance-checker"
+    priority = -1
+    msgs = {
+        "W9004": (
+            "`%s` called inside a Python loop; suggested fix: stack the inputs and predict once on the batch",
+            "predict-in-loop",
+            "Per-sample predict calls pay the model's call overhead once per row.",
+        ),
+        "W9005": (
+            "`%s` without mmap_mode; suggested fix: pass mmap_mode='r' for large arrays",
+            "np-load-without-mmap",
+            "Loading a large array reads and copies all of it into memory up front. Small arrays such as "
+            "labels are loaded eagerly by passing mmap_mode=None explicitly.",
+        ),
+        "W9006": (
+            "Dense `.%s()` of a sparse matrix; suggested fix: keep the BoW matrix sparse or densify in row batches",
+            "dense-sparse-matrix",
+            "Densifying a bag-of-words matrix allocates rows x vocabulary values, almost all zero.",
+        ),
+        "W9007": (
+            "Per-row `%s` scan over a DataFrame; suggested fix: use vectorized `.astype(str)`, the `.str` "
+            "accessor or pd.api.types checks on the whole column",
+            "row-wise-type-scan",
+            "Calling str() or isinstance() per row runs Python code for every value.",
+        ),
+        "W9008": (
+            "`joblib.load(%s)` %s; suggested fix: load the artifact once and reuse the object",
+            "repeated-artifact-load",
+            "Each joblib.load unpickles the whole artifact from disk again.",
+        ),
+    }
+
+    def __init__(self, linter=None):
+        super().__init__(linter)
+        self.loaded_artifacts = set()
+
+    def visit_module(self, node):
+        self.loaded_artifacts = set()
+
+    def visit_call(self, node):
+        try:
+            func_name = node.func.as_string()
+        except AttributeError:
+            return
+
+        if isinstance(node.func, nodes.Attribute):
+            method = node.func.attrname
+            if method in PREDICT_METHODS and _enclosing_loop(node) is not None:
+                self.add_message("predict-in-loop", node=node, args=(func_name,))
+            elif method in DENSIFY_METHODS and not node.args:
+                self.add_message("dense-sparse-matrix", node=node, args=(method,))
+            elif method in ROW_WISE_METHODS and node.args:
+                func = node.args[0]
+                scans = (isinstance(func, nodes.Name) and func.name in TYPE_SCAN_FUNCS) or (
+                    isinstance(func, nodes.Lambda) and _calls_type_scan(func)
+                )
+                if scans:
+                    self.add_message("row-wise-type-scan", node=node, args=(f".{method}",))
+
+        if func_name in NP_LOAD and len(node.args) < 2 and not _opens_archive(node):
+            if "mmap_mode" not in {kw.arg for kw in node.keywords or ()}:
+                self.add_message("np-load-without-mmap", node=node, args=(func_name,))
+
+        if func_name in JOBLIB_LOAD and node.args:
+            if func_name == "load" and not self._is_joblib_import(node):
+                return
+            artifact = node.args[0].as_string()
+            if _enclosing_loop(node) is not None:
+                self.add_message("repeated-artifact-load", node=node, args=(artifact, "inside a loop"))
+            elif artifact in self.loaded_artifacts:
+                self.add_message("repeated-artifact-load", node=node, args=(artifact, "repeated"))
+            self.loaded_artifacts.add(artifact)
+
+    def visit_for(self, node):
+        iterator = node.iter
+        if (
+            isinstance(iterator, nodes.Call)
+            and isinstance(iterator.func, nodes.Attribute)
+            and iterator.func.attrname in ROW_ITERATORS
+            and any(_calls_type_scan(statement) for statement in node.body)
+        ):
+            self.add_message(
+                "row-wise-type-scan", node=node, args=(f".{iterator.func.attrname}()",)
+            )
+
+    @staticmethod
+    def _is_joblib_import(node):
+        _, assignments = node.func.lookup("load")
+        return any(
+            isinstance(assignment, nodes.ImportFrom) and assignment.modname == "joblib"
+            for assignment in assignments
+        )
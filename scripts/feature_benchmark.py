@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Feature Mode Benchmark
+
+Builds the features of every configured mode on the same reviews and the same train/test
+split, and reports for each mode and model (GaussianNB on dense rows, the SGD linear model
+on CSR rows, both with the settings from params.yaml):
+- Test accuracy
+- Vectorizer fit time, model fit time, predict time and peak memory allocated by predict
+- Number of features, stored values, and the size of the matrix as CSR and as dense float32
+
+The baseline is the current lib-ml bag of words ("bow"); when lib-ml is not installed it is
+skipped and the n-gram modes are still compared against each other.
+
+Usage:
+    python scripts/feature_benchmark.py
+    python scripts/feature_benchmark.py \
+        --dataset data/raw/a1_RestaurantReviews_HistoricDump.parquet --output metrics/features.json
+"""
+
+import argparse
+import importlib.util
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from src.features import extract_features, feature_config, feature_stats, lib_ml_bag_of_words  # noqa: E402
+from src.ingest import load_reviews  # noqa: E402
+from src.train import csr_rows, dense_rows, fit_naive_bayes, fit_sgd, load_params, split_indices  # noqa: E402
+
+DEFAULT_DATASET = ROOT_DIR / "data" / "raw" / "a1_RestaurantReviews_HistoricDump.parquet"
+CANDIDATES = {
+    "bow": {"mode": "bow"},
+    "word_1_1_counts": {"mode": "word_ngram", "ngram_range": (1, 1), "tfidf": False, "min_df": 1},
+    "word_1_2_tfidf": {"mode": "word_ngram", "ngram_range": (1, 2), "tfidf": True},
+    "word_1_3_tfidf": {"mode": "word_ngram", "ngram_range": (1, 3), "tfidf": True, "max_features": 20000},
+    "char_2_5_tfidf": {"mode": "char_ngram", "ngram_range": (2, 5), "tfidf": True},
+}
+
+
+def build_features(messages, config):
+    """Fit the features of one mode; returns (sparse or dense X, fit seconds)."""
+    start = time.perf_counter()
+    if config["mode"] == "bow":
+        X, _ = lib_ml_bag_of_words(messages)
+    else:
+        X, _ = extract_features(messages["Review"].fillna("").astype(str), config)
+    return X, time.perf_counter() - start
+
+
+def benchmark_mode(name: str, messages, y: np.ndarray, config: dict, train_config: dict) -> list:
+    """Fit and evaluate both models on the features of one mode; one result per model."""
+    from sklearn.metrics import accuracy_score  # pylint: disable=import-outside-toplevel
+
+    X, vectorize_s = build_features(messages, config)
+    stats = feature_stats(X)
+    train_idx, test_idx = split_indices(y, train_config)
+    results = []
+    for model_type in ("gaussian_nb", "sgd"):
+        start = time.perf_counter()
+        if model_type == "sgd":
+            model = fit_sgd(X, y, train_config, train_idx)
+            X_test = csr_rows(X, np.sort(test_idx))
+        else:
+            model = fit_naive_bayes(X[train_idx], y[train_idx], train_config)
+            X_test = dense_rows(X, np.sort(test_idx))
+        fit_s = time.perf_counter() - start
+        tracemalloc.start()
+        start = time.perf_counter()
+        predictions = model.predict(X_test)
+        predict_s = time.perf_counter() - start
+        _, predict_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append({
+            "name": name,
+            "model": model_type,
+            "config": {key: list(value) if isinstance(value, tuple) else value for key, value in config.items()},
+            "accuracy": float(accuracy_score(y[np.sort(test_idx)], predictions)),
+            "vectorize_s": vectorize_s,
+            "fit_s": fit_s,
+            "predict_s": predict_s,
+            "predict_peak_bytes": predict_peak,
+            **stats,
+        })
+    return results
+
+
+def main() -> int:
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Compare accuracy and cost of the feature modes and models.")
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument("--modes", type=str, default=",".join(CANDIDATES), help="Comma-separated candidates.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the report as JSON.")
+    args = parser.parse_args()
+
+    messages = load_reviews(str(args.dataset))
+    y = messages.iloc[:, -1].values
+    train_config = load_params(str(ROOT_DIR / "params.yaml"))
+    results = []
+    for name in args.modes.split(","):
+        config = feature_config(CANDIDATES[name])
+        if config["mode"] == "bow" and importlib.util.find_spec("libml") is None:
+            print(f"⚠️  {name}: lib-ml is not installed, skipped")
+            continue
+        results.extend(benchmark_mode(name, messages, y, config, train_config))
+
+    print(f"{'mode':<18}{'model':<13}{'acc':>7}{'features':>10}{'nnz':>9}{'csr MB':>9}{'dense MB':>10}"
+          f"{'vec s':>8}{'fit s':>8}{'pred ms':>9}{'pred MB':>9}")
+    for r in results:
+        print(f"{r['name']:<18}{r['model']:<13}{r['accuracy']:>7.3f}{r['features']:>10}{r['nnz']:>9}"
+              f"{r['csr_bytes'] / 1e6:>9.2f}{r['dense_bytes'] / 1e6:>10.2f}{r['vectorize_s']:>8.2f}"
+              f"{r['fit_s']:>8.3f}{r['predict_s'] * 1000:>9.1f}{r['predict_peak_bytes'] / 1e6:>9.2f}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"dataset": str(args.dataset), "modes": results}, f, indent=2)
+        print(f"✅ Feature benchmark saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
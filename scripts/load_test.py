@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Load Generator for Sentiment Serving
+
+Replays a JSONL request log against the in-process predictor or an HTTP endpoint and reports:
+- Throughput (requests/second)
+- Latency percentiles (p50, p90, p95, p99, max)
+- The saturation point over a sweep of concurrency levels or arrival rates
+
+Closed-loop load keeps N clients busy, each sending its next request as soon as the previous one
+returns. Open-loop load sends requests at a Poisson arrival rate regardless of how fast they are
+served, and measures latency from the scheduled arrival time so queueing delay is not hidden.
+Both can be driven by threads, processes or an asyncio event loop.
+
+Usage:
+    python scripts/load_test.py --requests requests.jsonl --concurrency 1,2,4,8
+    python scripts/load_test.py --requests requests.jsonl --loop open --rate 100,200,400 --stand-in
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from pathlib import Path
+from urllib import request as urlrequest
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from src.predictor import SentimentPredictor  # noqa: E402
+
+REVIEW_FIELDS = ("review", "Review", "text", "body")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_requests(path: Path, field: str = None) -> list:
+    """Load review texts from a JSONL request log (one JSON object or string per line)."""
+    keys = (field,) if field else REVIEW_FIELDS
+    texts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                texts.append(record)
+                continue
+            for key in keys:
+                if key in record:
+                    texts.append(str(record[key]))
+                    break
+            else:
+                raise KeyError(f"Request has none of the fields {keys}: {line[:80]}")
+    if not texts:
+        raise ValueError(f"No requests found in {path}")
+    return texts
+
+
+class InProcessTarget:
+    """Send each request straight to an in-process SentimentPredictor."""
+
+    def __init__(self, bow_path: Path, model_path: Path, explain_k: int = 0):
+        self.bow_path = str(bow_path)
+        self.model_path = str(model_path)
+        self.explain_k = explain_k
+        self._predictor = None
+
+    def __getstate__(self):
+        # Worker processes load their own copy of the artifacts
+        return {"bow_path": self.bow_path, "model_path": self.model_path, "explain_k": self.explain_k,
+                "_predictor": None}
+
+    def warm_up(self) -> None:
+        """Load the artifacts so the first timed request does not pay for it."""
+        if self._predictor is None:
+            self._predictor = SentimentPredictor.from_paths(self.bow_path, self.model_path)
+
+    def __call__(self, text: str) -> int:
+        self.warm_up()
+        if self.explain_k:
+            return int(self._predictor.explain([text], self.explain_k)[0]["prediction"])
+        return int(self._predictor.predict([text])[0])
+
+    async def acall(self, text: str) -> int:
+        """Run the blocking predictor off the event loop."""
+        return await asyncio.to_thread(self, text)
+
+
+class HttpTarget:
+    """POST each request as `{"review": ...}` to an HTTP prediction endpoint."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def warm_up(self) -> None:
+        """Nothing to load for a remote target."""
+
+    def __call__(self, text: str) -> dict:
+        body = json.dumps({"review": text}).encode("utf-8")
+        req = urlrequest.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}
+        )
+        with urlrequest.urlopen(req, timeout=self.timeout) as resp:  # nosec B310
+            return json.loads(resp.read())
+
+    async def acall(self, text: str) -> dict:
+        """Minimal non-blocking HTTP/1.1 POST so asyncio mode does not need extra packages."""
+        parts = urlsplit(self.url)
+        body = json.dumps({"review": text}).encode("utf-8")
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, parts.port or 80), self.timeout
+        )
+        try:
+            head = (
+                f"POST {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            )
+            writer.write(head.encode("ascii") + body)
+            await writer.drain()
+            raw = await asyncio.wait_for(reader.read(), self.timeout)
+        finally:
+            writer.close()
+        status_line, _, rest = raw.partition(b"\r\n")
+        if b" 200 " not in status_line + b" ":
+            raise RuntimeError(f"HTTP error: {status_line.decode(errors='replace')}")
+        return json.loads(rest.partition(b"\r\n\r\n")[2])
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Answer POST /predict with `{"prediction": <label>}` from the server's predict function."""
+
+    def do_POST(self):  # noqa: N802 (BaseHTTPRequestHandler naming)
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            review = json.loads(self.rfile.read(length))["review"]
+            label = int(self.server.predict_fn([review])[0])
+        except (ValueError, KeyError) as e:
+            self.send_error(400, str(e))
+            return
+        payload = json.dumps({"prediction": label}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Keep load-test output readable."""
+
+
+def start_stand_in(predict_fn, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start a local HTTP stand-in for the model-service in a background thread."""
+    server = ThreadingHTTPServer((host, port), _StandInHandler)
+    server.daemon_threads = True
+    server.predict_fn = predict_fn
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stand_in_url(server: ThreadingHTTPServer) -> str:
+    """Return the prediction URL of a running stand-in server."""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/predict"
+
+
+# Process-pool workers keep their own target so artifacts are loaded once per process
+_WORKER_TARGET = None
+
+
+def _init_worker(target) -> None:
+    global _WORKER_TARGET
+    _WORKER_TARGET = target
+    _WORKER_TARGET.warm_up()
+
+
+def _worker_call(text: str):
+    return _WORKER_TARGET(text)
+
+
+def _arrival_offsets(rate: float, n_requests: int, seed: int) -> list:
+    """Poisson arrival times (seconds from start) for an open-loop run."""
+    rng = random.Random(seed)
+    offsets, t = [], 0.0
+    for _ in range(n_requests):
+        t += rng.expovariate(rate)
+        offsets.append(t)
+    return offsets
+
+
+def _run_closed_executor(executor, call, texts, concurrency, n_requests):
+    latencies, errors, pending = [], 0, {}
+    indices = iter(range(n_requests))
+
+    def submit(i):
+        pending[executor.submit(call, texts[i % len(texts)])] = time.perf_counter()
+
+    start = time.perf_counter()
+    for i in islice(indices, concurrency):
+        submit(i)
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future in done:
+            sent = pending.pop(future)
+            if future.exception() is None:
+                latencies.append(now - sent)
+            else:
+                errors += 1
+            nxt = next(indices, None)
+            if nxt is not None:
+                submit(nxt)
+    return latencies, errors, time.perf_counter() - start
+
+
+def _run_open_executor(executor, call, texts, rate, n_requests, seed):
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def record(future, scheduled):
+        finished = time.perf_counter()
+        with lock:
+            if future.exception() is None:
+                latencies.append(finished - scheduled)
+            else:
+                errors[0] += 1
+
+    futures = []
+    start = time.perf_counter()
+    for i, offset in enumerate(_arrival_offsets(rate, n_requests, seed)):
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        future = executor.submit(call, texts[i % len(texts)])
+        future.add_done_callback(lambda f, s=scheduled: record(f, s))
+        futures.append(future)
+    wait(futures)
+    return latencies, errors[0], time.perf_counter() - start
+
+
+async def _run_closed_async(target, texts, concurrency, n_requests):
+    latencies, errors = [], [0]
+    indices = iter(range(n_requests))
+
+    async def client():
+        for i in indices:
+            sent = time.perf_counter()
+            try:
+                await target.acall(texts[i % len(texts)])
+                latencies.append(time.perf_counter() - sent)
+            except Exception:  # pylint: disable=broad-except
+                errors[0] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors[0], time.perf_counter() - start
+
+
+async def _run_open_async(target, texts, rate, concurrency, n_requests, seed):
+    latencies, errors = [], [0]
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(text, scheduled):
+        async with slots:
+            try:
+                await target.acall(text)
+                latencies.append(time.perf_counter() - scheduled)
+            except Exception:  # pylint: disable=broad-except
+                errors[0] += 1
+
+    tasks = []
+    start = time.perf_counter()
+    for i, offset in enumerate(_arrival_offsets(rate, n_requests, seed)):
+        scheduled = start + offset
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        tasks.append(asyncio.create_task(one(texts[i % len(texts)], scheduled)))
+    await asyncio.gather(*tasks)
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    """Compute throughput and latency percentiles (in milliseconds) for one run."""
+    lat_ms = np.asarray(latencies, dtype=float) * 1000
+    summary = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {},
+    }
+    if lat_ms.size:
+        summary["latency_ms"] = {
+            "mean": float(lat_ms.mean()),
+            **{f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(lat_ms, PERCENTILES))},
+            "max": float(lat_ms.max()),
+        }
+    return summary
+
+
+def run_load(
+    target,
+    texts: list,
+    mode: str = "threads",
+    loop: str = "closed",
+    concurrency: int = 1,
+    rate: float = None,
+    n_requests: int = 500,
+    seed: int = 42,
+) -> dict:
+    """Run one load level and return its summary."""
+    if loop == "open" and not rate:
+        raise ValueError("Open-loop load needs an arrival rate")
+    target.warm_up()
+    if mode == "asyncio":
+        if loop == "closed":
+            coro = _run_closed_async(target, texts, concurrency, n_requests)
+        else:
+            coro = _run_open_async(target, texts, rate, concurrency, n_requests, seed)
+        latencies, errors, elapsed = asyncio.run(coro)
+    else:
+        if mode == "processes":
+            executor = ProcessPoolExecutor(
+                max_workers=concurrency, initializer=_init_worker, initargs=(target,)
+            )
+            call = _worker_call
+            # Start every worker (and load its artifacts) before the clock starts
+            wait([executor.submit(call, texts[0]) for _ in range(concurrency)])
+        elif mode == "threads":
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+            call = target
+        else:
+            raise ValueError(f"Unknown concurrency mode: {mode}")
+        with executor:
+            if loop == "closed":
+                latencies, errors, elapsed = _run_closed_executor(
+                    executor, call, texts, concurrency, n_requests
+                )
+            else:
+                latencies, errors, elapsed = _run_open_executor(
+                    executor, call, texts, rate, n_requests, seed
+                )
+    summary = summarize(latencies, errors, elapsed)
+    summary.update({"mode": mode, "loop": loop, "concurrency": concurrency, "rate": rate})
+    summary["level"] = rate if loop == "open" else concurrency
+    return summary
+
+
+def find_saturation(results: list, min_gain: float = 0.05, slo_ms: float = None) -> dict:
+    """
+    Find the highest load level that still pays off.
+
+    Walks the sweep in order and stops at the first level whose throughput grows by less than
+    `min_gain` over the previous best, or whose p99 latency breaks the SLO.
+    """
+    best, reason = results[0], "not reached: throughput still scaling at the highest level"
+    for result in results[1:]:
+        p99 = result["latency_ms"].get("p99", float("inf"))
+        if slo_ms is not None and p99 > slo_ms:
+            reason = f"p99 latency {p99:.1f}ms exceeds the {slo_ms}ms SLO at level {result['level']}"
+            break
+        if result["throughput_rps"] < best["throughput_rps"] * (1 + min_gain):
+            reason = f"throughput gained less than {min_gain:.0%} at level {result['level']}"
+            break
+        best = result
+    return {
+        "level": best["level"],
+        "throughput_rps": best["throughput_rps"],
+        "p99_ms": best["latency_ms"].get("p99"),
+        "reason": reason,
+    }
+
+
+def run_sweep(target, texts: list, levels: list, slo_ms: float = None, **kwargs) -> dict:
+    """Run each load level in turn and locate the saturation point."""
+    loop = kwargs.get("loop", "closed")
+    results = []
+    for level in levels:
+        if loop == "open":
+            result = run_load(target, texts, rate=level, **kwargs)
+        else:
+            result = run_load(target, texts, concurrency=int(level), **kwargs)
+        results.append(result)
+        lat = result["latency_ms"]
+        print(
+            f"  level {level:>8}: {result['throughput_rps']:9.1f} req/s | "
+            f"p50 {lat.get('p50', float('nan')):7.2f}ms | p99 {lat.get('p99', float('nan')):7.2f}ms | "
+            f"errors {result['errors']}"
+        )
+    return {"results": results, "saturation": find_saturation(results, slo_ms=slo_ms)}
+
+
+def _parse_levels(value: str) -> list:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def main() -> int:
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Replay request logs against the sentiment predictor.")
+    parser.add_argument("--requests", type=Path, required=True, help="JSONL request log to replay.")
+    parser.add_argument("--field", type=str, default=None, help="JSON field holding the review text.")
+    parser.add_argument("--bow", type=Path, default=ROOT_DIR / "output" / "c1_BoW_Sentiment_Model.pkl")
+    parser.add_argument("--model", type=Path, default=ROOT_DIR / "output" / "c2_Classifier_Sentiment_Model.pkl")
+    parser.add_argument("--url", type=str, default=None, help="HTTP endpoint to target instead of the in-process predictor.")
+    parser.add_argument("--stand-in", action="store_true", help="Serve the predictor on a local HTTP stand-in and target it.")
+    parser.add_argument("--mode", choices=["threads", "processes", "asyncio"], default="threads")
+    parser.add_argument("--loop", choices=["closed", "open"], default="closed")
+    parser.add_argument(
+        "--concurrency", type=str, default="1,2,4,8", help="Client counts to sweep (closed loop) or worker cap (open loop)."
+    )
+    parser.add_argument("--rate", type=str, default=None, help="Arrival rates in req/s to sweep (open loop).")
+    parser.add_argument("--requests-per-level", type=int, default=500)
+    parser.add_argument("--slo-ms", type=float, default=None, help="p99 latency SLO used to find the saturation point.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--explain", type=int, default=0, help="Also return the top-k terms of each prediction (in-process).")
+    parser.add_argument("--output", type=Path, default=None, help="Write the full report as JSON.")
+    args = parser.parse_args()
+
+    texts = load_requests(args.requests, args.field)
+    server = None
+    if args.stand_in:
+        server = start_stand_in(SentimentPredictor.from_paths(args.bow, args.model).predict)
+        args.url = stand_in_url(server)
+        print(f"🧪 Local stand-in serving at {args.url}")
+    target = HttpTarget(args.url) if args.url else InProcessTarget(args.bow, args.model, args.explain)
+
+    concurrency = [int(c) for c in _parse_levels(args.concurrency)]
+    if args.loop == "open":
+        if not args.rate:
+            parser.error("--loop open requires --rate")
+        levels, kwargs = _parse_levels(args.rate), {"concurrency": max(concurrency)}
+    else:
+        levels, kwargs = concurrency, {}
+
+    print(
+        f"🚀 {args.loop}-loop load with {args.mode} against "
+        f"{args.url or 'in-process predictor'} ({len(texts)} distinct requests)"
+    )
+    try:
+        report = run_sweep(
+            target,
+            texts,
+            levels,
+            slo_ms=args.slo_ms,
+            mode=args.mode,
+            loop=args.loop,
+            n_requests=args.requests_per_level,
+            seed=args.seed,
+            **kwargs,
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    saturation = report["saturation"]
+    print(
+        f"\n📈 Saturation point: level {saturation['level']} at "
+        f"{saturation['throughput_rps']:.1f} req/s ({saturation['reason']})"
+    )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Load test report saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
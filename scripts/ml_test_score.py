@@ -10,13 +10,35 @@ Analyzes pytest results and calculates an ML Test Score based on:
 - Metamorphic tests
 
 Based on the ML Test Score methodology from Google.
+
+JUnit files are streamed with `iterparse`, so large reports are never held in memory as a
+whole, and test categories are memoized per test id. Many reports (sharded runs, historical
+builds) can be scored in parallel into a score trend:
+
+    python scripts/ml_test_score.py <junit_xml_path> <output_path>
+    python scripts/ml_test_score.py trend <output_path> <junit files or directories...> [--workers N] [--group-by dir]
 """
 
+import argparse
 import json
+import os
 import sys
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
+FAILURE_TAGS = (("failure", "failed"), ("error", "error"), ("skipped", "skipped"))
+CLASS_CATEGORIES = (
+    ("test_infra", "infra"),
+    ("test_mutamorphic", "metamorphic"),
+    ("test_monitor", "monitor"),
+    ("test_model", "model"),
+    ("test_data", "data"),
+    ("test_get_data", "data"),
+    ("test_utils", "data"),  # Utils tests are typically data pipeline related
+)
+
 
 class MLTestScoreCalculator:
     """Calculate ML Test Score from pytest results."""
@@ -55,58 +77,59 @@ class MLTestScoreCalculator:
                 "keywords": ["mutamorphic", "metamorphic", "swap", "invariant"],
             },
         }
+        self._category_cache = {}
 
     def parse_junit_xml(self, xml_path: Path) -> dict:
-        """Parse JUnit XML test results."""
+        """Parse JUnit XML test results, streaming test cases and freeing each once read."""
         if not xml_path.exists():
             raise FileNotFoundError(f"JUnit XML file not found: {xml_path}")
 
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-
-        # Try to find testsuite element (can be root or child)
-        testsuite = root.find(".//testsuite")
-        if testsuite is None:
-            testsuite = root
-
-        results = {
-            "total_tests": int(testsuite.get("tests", 0)),
-            "failures": int(testsuite.get("failures", 0)),
-            "errors": int(testsuite.get("errors", 0)),
-            "skipped": int(testsuite.get("skipped", 0)),
-            "test_cases": [],
-        }
-
-        # Parse individual test cases
-        for testcase in root.findall(".//testcase"):
-            test_name = testcase.get("name", "")
-            test_class = testcase.get("classname", "")
-            test_time = float(testcase.get("time", 0))
+        results = {"test_cases": []}
+        root_attrs = testsuite_attrs = None
+        stack = []
+        for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                if root_attrs is None:
+                    root_attrs = dict(elem.attrib)
+                elif elem.tag == "testsuite" and testsuite_attrs is None:
+                    # Same element as root.find(".//testsuite"): the first nested testsuite
+                    testsuite_attrs = dict(elem.attrib)
+                continue
+            stack.pop()
+            if elem.tag != "testcase":
+                continue
 
             # Determine test status
-            status = "passed"
-            error_msg = None
-
-            if testcase.find("failure") is not None:
-                status = "failed"
-                error_msg = testcase.find("failure").text
-            elif testcase.find("error") is not None:
-                status = "error"
-                error_msg = testcase.find("error").text
-            elif testcase.find("skipped") is not None:
-                status = "skipped"
-                error_msg = testcase.find("skipped").text
+            status, error_msg = "passed", None
+            for tag, tag_status in FAILURE_TAGS:
+                child = elem.find(tag)
+                if child is not None:
+                    status, error_msg = tag_status, child.text
+                    break
 
             results["test_cases"].append(
                 {
-                    "name": test_name,
-                    "class": test_class,
-                    "time": test_time,
+                    "name": elem.get("name", ""),
+                    "class": elem.get("classname", ""),
+                    "time": float(elem.get("time", 0)),
                     "status": status,
                     "error": error_msg,
                 }
             )
-
+            # Drop finished test cases so memory stays flat for large reports
+            elem.clear()
+            if stack:
+                stack[-1].clear()
+
+        testsuite = testsuite_attrs if testsuite_attrs is not None else root_attrs or {}
+        results.update(
+            total_tests=int(testsuite.get("tests", 0)),
+            failures=int(testsuite.get("failures", 0)),
+            errors=int(testsuite.get("errors", 0)),
+            skipped=int(testsuite.get("skipped", 0)),
+            timestamp=testsuite.get("timestamp"),
+        )
         results["passed"] = (
             results["total_tests"] - results["failures"] - results["errors"]
         )
@@ -114,24 +137,20 @@ class MLTestScoreCalculator:
         return results
 
     def categorize_test(self, test_name: str, test_class: str) -> str:
-        """Categorize a test based on its name and class."""
+        """Categorize a test based on its name and class, memoized per test id."""
+        key = (test_name, test_class)
+        category = self._category_cache.get(key)
+        if category is None:
+            category = self._category_cache[key] = self._categorize(test_name, test_class)
+        return category
+
+    def _categorize(self, test_name: str, test_class: str) -> str:
         full_test_id = f"{test_class}.{test_name}".lower()
 
         # Specific class-based categorization first (more accurate)
-        if "test_infra" in test_class:
-            return "infra"
-        elif "test_mutamorphic" in test_class:
-            return "metamorphic"
-        elif "test_monitor" in test_class:
-            return "monitor"
-        elif "test_model" in test_class:
-            return "model"
-        elif "test_data" in test_class:
-            return "data"
-        elif "test_get_data" in test_class:
-            return "data"
-        elif "test_utils" in test_class:
-            return "data"  # Utils tests are typically data pipeline related
+        for marker, category in CLASS_CATEGORIES:
+            if marker in test_class:
+                return category
 
         # Check each category for keyword matches in test names
         for category, config in self.test_categories.items():
@@ -292,10 +311,113 @@ class MLTestScoreCalculator:
         print(f"✅ ML Test Score results saved to: {output_path}")
 
 
+def summarize_junit_file(xml_path: Path) -> dict:
+    """Parse one JUnit file and reduce it to totals and per-category counts (cheap to send between processes)."""
+    calculator = MLTestScoreCalculator()
+    results = calculator.parse_junit_xml(Path(xml_path))
+    stats = calculator.calculate_category_scores(results)
+    timestamp = results["timestamp"] or datetime.fromtimestamp(os.path.getmtime(xml_path)).isoformat()
+    return {
+        "path": str(xml_path),
+        "timestamp": timestamp,
+        "total_tests": results["total_tests"],
+        "passed": results["passed"],
+        "failures": results["failures"],
+        "errors": results["errors"],
+        "skipped": results["skipped"],
+        "categories": {
+            category: {key: stats[category][key] for key in ("total", "passed", "failed")}
+            for category in stats
+        },
+    }
+
+
+def find_junit_files(paths: list) -> list:
+    """Expand directories into the `*.xml` files below them."""
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.rglob("*.xml")) if path.is_dir() else [path])
+    return files
+
+
+def merge_summaries(summaries: list, calculator: MLTestScoreCalculator = None) -> dict:
+    """Combine the summaries of one build's shards and score the build."""
+    calculator = calculator or MLTestScoreCalculator()
+    merged = {
+        "timestamp": max(summary["timestamp"] for summary in summaries),
+        "files": len(summaries),
+    }
+    for key in ("total_tests", "passed", "failures", "errors", "skipped"):
+        merged[key] = sum(summary[key] for summary in summaries)
+    stats = {}
+    for category in calculator.test_categories:
+        counts = {
+            key: sum(summary["categories"][category][key] for summary in summaries)
+            for key in ("total", "passed", "failed")
+        }
+        counts["score"] = counts["passed"] / counts["total"] * 100 if counts["total"] else 0.0
+        stats[category] = counts
+    merged["overall_score"] = calculator.calculate_overall_score(stats)
+    merged["metamorphic_score"] = calculator.calculate_metamorphic_score(stats)
+    merged["categories"] = {category: counts["score"] for category, counts in stats.items()}
+    return merged
+
+
+def score_trend(paths: list, workers: int = None, group_by: str = "file") -> list:
+    """
+    Score many JUnit files in parallel into a time series, oldest build first.
+
+    With `group_by="dir"` all files in one directory are the shards of one build and are
+    merged before scoring; with "file" every file is a build of its own.
+    """
+    files = find_junit_files(paths)
+    if not files:
+        return []
+    if workers == 1 or len(files) == 1:
+        summaries = [summarize_junit_file(path) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = list(pool.map(summarize_junit_file, files, chunksize=16))
+
+    builds = {}
+    for path, summary in zip(files, summaries):
+        build = str(path.parent) if group_by == "dir" else str(path)
+        builds.setdefault(build, []).append(summary)
+    calculator = MLTestScoreCalculator()
+    trend = [{"build": build, **merge_summaries(group, calculator)} for build, group in builds.items()]
+    return sorted(trend, key=lambda entry: (entry["timestamp"], entry["build"]))
+
+
+def trend_main(argv: list) -> int:
+    """Score a history of JUnit reports and save the trend."""
+    parser = argparse.ArgumentParser(description="Compute the ML Test Score trend over many JUnit reports.")
+    parser.add_argument("output_path", type=Path)
+    parser.add_argument("paths", nargs="+", help="JUnit XML files or directories containing them.")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count).")
+    parser.add_argument(
+        "--group-by", choices=["file", "dir"], default="file",
+        help="Treat each file, or each directory of shards, as one build.",
+    )
+    args = parser.parse_args(argv)
+
+    trend = score_trend(args.paths, args.workers, args.group_by)
+    args.output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output_path, "w", encoding="utf-8") as f:
+        json.dump(trend, f, indent=2)
+    print(f"📈 Scored {len(trend)} builds")
+    for entry in trend[-5:]:
+        print(f"  {entry['timestamp']}  {entry['overall_score']:5.1f}/100  {entry['build']}")
+    print(f"✅ ML Test Score trend saved to: {args.output_path}")
+    return 0
+
+
 def main():
     """Main function."""
+    if len(sys.argv) > 1 and sys.argv[1] == "trend":
+        sys.exit(trend_main(sys.argv[2:]))
     if len(sys.argv) != 3:
         print("Usage: python ml_test_score.py <junit_xml_path> <output_path>")
+        print("       python ml_test_score.py trend <output_path> <junit files or directories...>")
         sys.exit(1)
 
     xml_path = Path(sys.argv[1])
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Sharded Parallel Test Runner
+
+Splits the test suite by file into shards balanced by the durations recorded in the last
+JUnit report, runs one pytest process per shard, and merges the results:
+- The JUnit XML files into a single report that `ml_test_score.py` reads as before
+- The coverage data (when pytest-cov is installed) into one coverage JSON report
+
+Whole files stay in one shard, so module- and session-scoped fixtures are set up once per
+shard. With the suite dominated by a few heavy files, wall time approaches the slowest shard.
+
+Usage:
+    python scripts/run_sharded_tests.py --shards 4
+    python scripts/run_sharded_tests.py --junit-xml test_reports/junit.xml --cov-json test_reports/coverage.json
+"""
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from scripts.ml_test_score import MLTestScoreCalculator  # noqa: E402
+
+DEFAULT_DURATION_S = 1.0
+COUNT_ATTRS = ("tests", "failures", "errors", "skipped")
+
+
+def find_test_files(test_dir: Path) -> list:
+    """Test files pytest would collect from a directory."""
+    return sorted(test_dir.rglob("test_*.py"))
+
+
+def file_durations(junit_path: Path) -> dict:
+    """Total recorded duration per test file (relative path), from a previous JUnit report."""
+    if not junit_path.exists():
+        return {}
+    durations = {}
+    for case in MLTestScoreCalculator().parse_junit_xml(junit_path)["test_cases"]:
+        path = case["class"].split("::")[0]
+        # pytest writes "tests.test_model" (module) or "tests.test_model.TestClass" as classname
+        parts = path.split(".")
+        for end in range(len(parts), 0, -1):
+            candidate = "/".join(parts[:end]) + ".py"
+            if (ROOT_DIR / candidate).exists():
+                durations[candidate] = durations.get(candidate, 0.0) + case["time"]
+                break
+    return durations
+
+
+def assign_shards(files: list, durations: dict, shards: int) -> list:
+    """Greedy longest-first assignment of files to the currently least loaded shard."""
+    default = sorted(durations.values())[len(durations) // 2] if durations else DEFAULT_DURATION_S
+    cost = {f: durations.get(f, default) for f in files}
+    buckets = [{"files": [], "load": 0.0} for _ in range(max(1, min(shards, len(files))))]
+    for f in sorted(files, key=lambda name: (-cost[name], name)):
+        bucket = min(buckets, key=lambda b: b["load"])
+        bucket["files"].append(f)
+        bucket["load"] += cost[f]
+    return buckets
+
+
+def merge_junit(shard_files: list, output_path: Path) -> dict:
+    """Concatenate the test cases of the shard reports into one testsuite, streaming each file."""
+    totals = dict.fromkeys(COUNT_ATTRS, 0)
+    total_time, timestamp = 0.0, None
+    cases = []
+    for path in shard_files:
+        if not path.exists():
+            continue
+        suite_seen = False
+        for _, elem in ET.iterparse(path, events=("end",)):
+            if elem.tag == "testcase":
+                cases.append(ET.tostring(elem, encoding="unicode"))
+                elem.clear()
+            elif elem.tag == "testsuite" and not suite_seen:
+                suite_seen = True
+                for attr in COUNT_ATTRS:
+                    totals[attr] += int(elem.get(attr, 0))
+                total_time += float(elem.get("time", 0))
+                stamp = elem.get("timestamp")
+                if stamp and (timestamp is None or stamp < timestamp):
+                    timestamp = stamp  # Earliest shard start
+
+    attrs = " ".join(f'{attr}="{totals[attr]}"' for attr in COUNT_ATTRS)
+    stamp = f' timestamp="{timestamp}"' if timestamp else ""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+        f.write(f'<testsuite name="pytest" {attrs} time="{total_time:.3f}"{stamp}>\n')
+        for case in cases:
+            f.write(case.strip() + "\n")
+        f.write("</testsuite>\n</testsuites>\n")
+    return totals
+
+
+def merge_coverage(data_files: list, data_path: Path, json_path: Path) -> bool:
+    """Combine per-shard coverage data files and write the JSON report."""
+    existing = [str(path) for path in data_files if path.exists()]
+    if not existing:
+        return False
+    env = {**os.environ, "COVERAGE_FILE": str(data_path)}
+    subprocess.run([sys.executable, "-m", "coverage", "combine", *existing], cwd=ROOT_DIR, env=env, check=True,
+                   capture_output=True)
+    subprocess.run([sys.executable, "-m", "coverage", "json", "-o", str(json_path)], cwd=ROOT_DIR, env=env,
+                   check=True, capture_output=True)
+    return True
+
+
+def run_shards(buckets: list, shard_dir: Path, with_coverage: bool, extra_args: list) -> list:
+    """Start one pytest process per shard and wait for all of them."""
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    processes = []
+    for i, bucket in enumerate(buckets):
+        cmd = [sys.executable, "-m", "pytest", "-q", *bucket["files"], f"--junitxml={shard_dir / f'junit-{i}.xml'}"]
+        env = dict(os.environ)
+        if with_coverage:
+            cmd += ["--cov=src", "--cov-report="]
+            env["COVERAGE_FILE"] = str(shard_dir / f".coverage.{i}")
+        log = open(shard_dir / f"shard-{i}.log", "w", encoding="utf-8")  # noqa: SIM115
+        start = time.perf_counter()
+        process = subprocess.Popen(cmd + extra_args, cwd=ROOT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        processes.append((i, process, log, start))
+
+    results = []
+    for i, process, log, start in processes:
+        returncode = process.wait()
+        log.close()
+        # pytest exit code 5 means no tests were collected in the shard
+        results.append({"shard": i, "returncode": 0 if returncode == 5 else returncode,
+                        "duration_s": time.perf_counter() - start})
+    return results
+
+
+def main() -> int:
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Run the test suite in parallel shards and merge the reports.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--tests", type=Path, default=Path("tests"))
+    parser.add_argument("--junit-xml", type=Path, default=Path("test_reports") / "junit.xml")
+    parser.add_argument("--cov-json", type=Path, default=Path("test_reports") / "coverage.json")
+    parser.add_argument("--no-cov", action="store_true", help="Skip coverage even if pytest-cov is installed.")
+    parser.add_argument("pytest_args", nargs="*", help="Extra arguments passed to every pytest process.")
+    args = parser.parse_args()
+
+    os.chdir(ROOT_DIR)
+    files = [str(path.relative_to(ROOT_DIR)) for path in find_test_files(ROOT_DIR / args.tests)]
+    buckets = assign_shards(files, file_durations(args.junit_xml), args.shards)
+    with_coverage = not args.no_cov and importlib.util.find_spec("pytest_cov") is not None
+    shard_dir = args.junit_xml.parent / "shards"
+    for stale in shard_dir.glob("*"):
+        stale.unlink()
+
+    print(f"🧪 Running {len(files)} test files in {len(buckets)} shards"
+          + (" with coverage" if with_coverage else ""))
+    start = time.perf_counter()
+    results = run_shards(buckets, shard_dir, with_coverage, args.pytest_args)
+    wall_s = time.perf_counter() - start
+
+    for result, bucket in zip(results, buckets):
+        marker = "✅" if result["returncode"] == 0 else "❌"
+        log_path = shard_dir / f"shard-{result['shard']}.log"
+        print(f"  {marker} shard {result['shard']}: {len(bucket['files'])} files, "
+              f"{result['duration_s']:.1f}s (log: {log_path})")
+    totals = merge_junit(sorted(shard_dir.glob("junit-*.xml")), args.junit_xml)
+    print(f"📊 {totals['tests']} tests, {totals['failures']} failures, {totals['errors']} errors, "
+          f"{totals['skipped']} skipped in {wall_s:.1f}s")
+    print(f"✅ Merged JUnit report saved to: {args.junit_xml}")
+    if with_coverage and merge_coverage(sorted(shard_dir.glob(".coverage.*")),
+                                        args.junit_xml.parent / ".coverage", args.cov_json):
+        print(f"✅ Merged coverage report saved to: {args.cov_json}")
+    return max(result["returncode"] for result in results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
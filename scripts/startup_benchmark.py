@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Cold-Start Benchmark for the Pipeline CLI Modules
+
+Imports each `src` entry point in a fresh interpreter with `python -X importtime` and reports:
+- The cumulative import time of the module (best of several runs)
+- The slowest modules it pulls in
+- Heavy libraries (scikit-learn, pandas, SciPy, ...) loaded at import time, which should only
+  be imported by the functions that need them
+
+Optionally also times `pytest --collect-only`. Exits non-zero when a module exceeds its budget
+or imports a heavy library eagerly, so it can guard against regressions in CI.
+
+Usage:
+    python scripts/startup_benchmark.py
+    python scripts/startup_benchmark.py --runs 5 --budget-ms 250 --collect --output test_reports/startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = (
+    "src.evaluate",
+    "src.train",
+    "src.prepare_data",
+    "src.pipeline",
+    "src.ingest",
+    "src.dedup",
+)
+HEAVY_MODULES = ("sklearn", "pandas", "scipy", "joblib", "nltk", "pyarrow", "yaml", "libml")
+DEFAULT_BUDGET_MS = 300.0
+TOP_IMPORTS = 5
+
+
+def parse_importtime(stderr: str) -> list:
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) tuples."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_import(module: str, runs: int = 3) -> dict:
+    """Import a module in fresh interpreters and report its best cumulative import time."""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        entries = parse_importtime(result.stderr)
+        total_us = next(cum for name, _, cum in reversed(entries) if name == module)
+        if best is None or total_us < best[0]:
+            best = (total_us, entries)
+    total_us, entries = best
+    names = {name.split(".")[0] for name, _, _ in entries}
+    slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:TOP_IMPORTS]
+    return {
+        "module": module,
+        "import_ms": total_us / 1000,
+        "heavy_imports": sorted(names & set(HEAVY_MODULES)),
+        "slowest": [{"module": name, "self_ms": self_us / 1000} for name, self_us, _ in slowest],
+    }
+
+
+def measure_collection(test_dir: str = "tests") -> float:
+    """Wall-clock seconds of `pytest --collect-only` over the test suite."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", test_dir],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        check=False,
+    )
+    return time.perf_counter() - start
+
+
+def check_budget(results: list, budget_ms: float) -> list:
+    """Return a message for every module over budget or importing a heavy library eagerly."""
+    problems = []
+    for result in results:
+        if result["import_ms"] > budget_ms:
+            problems.append(f"{result['module']} imports in {result['import_ms']:.0f} ms (budget {budget_ms:.0f} ms)")
+        if result["heavy_imports"]:
+            problems.append(f"{result['module']} eagerly imports {', '.join(result['heavy_imports'])}")
+    return problems
+
+
+def main() -> int:
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Measure the cold-start import time of the CLI modules.")
+    parser.add_argument("--modules", type=str, default=",".join(ENTRY_POINTS), help="Comma-separated modules to import.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module; the best run is kept.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--collect", action="store_true", help="Also time `pytest --collect-only`.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the report as JSON.")
+    args = parser.parse_args()
+
+    results = [measure_import(module, args.runs) for module in args.modules.split(",")]
+    for result in results:
+        slowest = ", ".join(f"{s['module']} {s['self_ms']:.1f}" for s in result["slowest"][:3])
+        print(f"⏱️  {result['module']:<20} {result['import_ms']:7.1f} ms  (slowest: {slowest})")
+    report = {"budget_ms": args.budget_ms, "modules": results}
+    if args.collect:
+        report["collection_s"] = measure_collection()
+        print(f"🧪 pytest --collect-only: {report['collection_s']:.2f} s")
+
+    problems = check_budget(results, args.budget_ms)
+    report["problems"] = problems
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Startup report saved to: {args.output}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print(f"✅ All modules within {args.budget_ms:.0f} ms without eager heavy imports")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,13 +8,29 @@ Tests the complete ML Testing assignment workflow including:
 3. Updating README badges
 4. Validating all metrics are properly generated
 
-This simulates what the GitHub Actions workflow would do.
+This simulates what the GitHub Actions workflow would do. The steps form a small task graph:
+each step declares the steps it depends on, independent steps run concurrently, and steps
+whose input files and command are unchanged (by content hash) since their last successful
+run are skipped while their outputs exist. A per-step timing breakdown and the critical path
+are printed at the end.
+
+Usage:
+    python scripts/test_workflow.py [--jobs N] [--force]
 """
 
+import argparse
+import hashlib
 import json
 import subprocess
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+STATE_FILE = Path("test_reports") / ".workflow_state.json"
 
 
 def run_command(cmd: str, description: str) -> bool:
@@ -27,7 +43,7 @@ def run_command(cmd: str, description: str) -> bool:
             shell=True,
             capture_output=True,
             text=True,
-            cwd=Path(__file__).parent.parent,
+            cwd=BASE_DIR,
             executable="/bin/bash",
         )
         if result.returncode == 0:
@@ -71,90 +87,276 @@ def validate_json_content(
         return False
 
 
+@dataclass
+class Task:
+    """One workflow step: a shell command or a Python check, with its dependencies and files."""
+
+    name: str
+    description: str
+    action: Callable[[], bool]
+    deps: tuple = ()
+    inputs: tuple = ()  # Files or directories whose contents decide whether the step can be skipped
+    outputs: tuple = ()  # Files the step produces; a step without outputs always runs
+    fingerprint: str = ""
+    status: str = "pending"
+    duration_s: float = 0.0
+    started_at: float = field(default=0.0, repr=False)
+
+
+def command(cmd: str, description: str) -> Callable[[], bool]:
+    """Task action running a shell command."""
+    action = lambda: run_command(cmd, description)  # noqa: E731
+    action.cmd = cmd
+    return action
+
+
+def _input_files(base_dir: Path, inputs: tuple) -> list:
+    files = []
+    for entry in inputs:
+        path = base_dir / entry
+        if path.is_dir():
+            files.extend(
+                p for p in sorted(path.rglob("*")) if p.is_file() and "__pycache__" not in p.parts
+            )
+        else:
+            files.append(path)
+    return files
+
+
+class TaskGraph:
+    """
+    Run tasks in dependency order, concurrently where possible, skipping unchanged ones.
+
+    Args:
+        tasks: The tasks; every dependency must name another task.
+        base_dir: Directory that input and output paths are relative to.
+        state_path: JSON file recording the fingerprint of each task's last successful run.
+        jobs: Maximum number of tasks running at once.
+        force: Run every task even if its inputs are unchanged.
+    """
+
+    def __init__(self, tasks: list, base_dir: Path = BASE_DIR, state_path: Optional[Path] = None,
+                 jobs: int = 4, force: bool = False):
+        self.tasks = {task.name: task for task in tasks}
+        for task in tasks:
+            unknown = [dep for dep in task.deps if dep not in self.tasks]
+            if unknown:
+                raise ValueError(f"Task {task.name!r} depends on unknown tasks {unknown}")
+        self.base_dir = base_dir
+        self.state_path = base_dir / (state_path or STATE_FILE)
+        self.jobs = jobs
+        self.force = force
+        self.state = {}
+        if self.state_path.exists():
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def fingerprint(self, task: Task) -> str:
+        """Hash the task's command and the contents of its input files."""
+        digest = hashlib.sha256(task.name.encode())
+        digest.update(getattr(task.action, "cmd", "").encode())
+        for path in _input_files(self.base_dir, task.inputs):
+            digest.update(str(path.relative_to(self.base_dir)).encode())
+            digest.update(path.read_bytes() if path.exists() else b"missing")
+        return digest.hexdigest()
+
+    def _is_fresh(self, task: Task) -> bool:
+        if self.force or not task.outputs:
+            return False
+        task.fingerprint = self.fingerprint(task)
+        return self.state.get(task.name) == task.fingerprint and all(
+            (self.base_dir / output).exists() for output in task.outputs
+        )
+
+    def _execute(self, task: Task) -> bool:
+        task.started_at = time.time()
+        start = time.perf_counter()
+        if self._is_fresh(task):
+            print(f"⏭️  {task.description} - UNCHANGED, SKIPPED")
+            task.status = "skipped"
+        else:
+            task.status = "passed" if task.action() else "failed"
+        task.duration_s = time.perf_counter() - start
+        return task.status != "failed"
+
+    def _dep_state(self, name: str) -> str:
+        """
+        Whether dependents of a task are "ready", "waiting" or "blocked".
+
+        A failed step that still wrote all its outputs during this run (e.g. a test run with
+        failing tests) does not block its dependents.
+        """
+        task = self.tasks[name]
+        if task.status in ("passed", "skipped"):
+            return "ready"
+        if task.status == "failed" and task.outputs:
+            outputs = [self.base_dir / output for output in task.outputs]
+            if all(path.exists() and path.stat().st_mtime >= task.started_at for path in outputs):
+                return "ready"
+        return "blocked" if task.status in ("failed", "blocked") else "waiting"
+
+    def run(self) -> dict:
+        """
+        Run the graph.
+
+        Returns:
+            dict: Task name -> status ("passed", "skipped", "failed" or "blocked").
+        """
+        pending = dict(self.tasks)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    dep_states = [self._dep_state(dep) for dep in task.deps]
+                    if "blocked" in dep_states:
+                        task.status = "blocked"
+                        print(f"⛔ {task.description} - BLOCKED by failed dependency")
+                        del pending[name]
+                    elif all(state == "ready" for state in dep_states) and len(running) < self.jobs:
+                        running[pool.submit(self._execute, task)] = task
+                        del pending[name]
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle between tasks {sorted(pending)}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    if future.result() and task.status == "passed" and task.outputs:
+                        self.state[task.name] = task.fingerprint or self.fingerprint(task)
+        self._save_state()
+        return {name: task.status for name, task in self.tasks.items()}
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+
+    def critical_path(self) -> tuple:
+        """Return (task names, seconds) of the longest dependency chain by measured duration."""
+        longest = {}
+
+        def chain(name):
+            if name not in longest:
+                task = self.tasks[name]
+                best = max((chain(dep) for dep in task.deps), key=lambda c: c[1], default=((), 0.0))
+                longest[name] = (best[0] + (name,), best[1] + task.duration_s)
+            return longest[name]
+
+        return max((chain(name) for name in self.tasks), key=lambda c: c[1], default=((), 0.0))
+
+    def print_timings(self, wall_s: float) -> None:
+        """Print the per-step timing breakdown."""
+        print("\n⏱️  STEP TIMINGS")
+        for task in sorted(self.tasks.values(), key=lambda t: t.duration_s, reverse=True):
+            print(f"  {task.name:<20} {task.status:<8} {task.duration_s:8.2f}s")
+        path, path_s = self.critical_path()
+        print(f"  Critical path: {' -> '.join(path)} ({path_s:.2f}s)")
+        print(f"  Wall time: {wall_s:.2f}s")
+
+
+def validate_readme_badges(readme_file: Path) -> bool:
+    """Validate that the README contains the automated badges."""
+    if not validate_file_exists(readme_file, "README.md file"):
+        return False
+    try:
+        with open(readme_file, "r") as f:
+            content = f.read()
+        if "<!-- AUTOMATED-BADGES -->" in content and "ML%20Test%20Score" in content:
+            print("✅ README badges updated - VALID")
+            return True
+        print("❌ README badges updated - BADGES MISSING")
+    except Exception as e:
+        print(f"❌ README validation - ERROR: {e}")
+    return False
+
+
+def build_workflow(base_dir: Path = BASE_DIR) -> list:
+    """Declare the workflow steps and their dependencies."""
+    reports = base_dir / "test_reports"
+    coverage_file = reports / "coverage.json"
+    junit_file = reports / "junit.xml"
+    ml_score_file = reports / "ml_test_score.json"
+    return [
+        Task(
+            "tests",
+            "Running sharded tests with coverage",
+            command(
+                "python scripts/run_sharded_tests.py --junit-xml test_reports/junit.xml "
+                "--cov-json test_reports/coverage.json",
+                "Running sharded tests with coverage",
+            ),
+            inputs=("src", "tests", "params.yaml", "requirements.txt", "scripts/run_sharded_tests.py"),
+            outputs=("test_reports/coverage.json", "test_reports/junit.xml"),
+        ),
+        Task(
+            "coverage_json",
+            "Validating coverage JSON",
+            lambda: validate_file_exists(coverage_file, "Coverage JSON file")
+            and validate_json_content(coverage_file, ["totals"], "Coverage JSON content"),
+            deps=("tests",),
+        ),
+        Task(
+            "junit_xml",
+            "Validating JUnit XML",
+            lambda: validate_file_exists(junit_file, "JUnit XML file"),
+            deps=("tests",),
+        ),
+        Task(
+            "ml_test_score",
+            "Calculating ML Test Score",
+            command(
+                "python scripts/ml_test_score.py test_reports/junit.xml test_reports/ml_test_score.json",
+                "Calculating ML Test Score",
+            ),
+            deps=("tests",),
+            inputs=("test_reports/junit.xml", "scripts/ml_test_score.py"),
+            outputs=("test_reports/ml_test_score.json",),
+        ),
+        Task(
+            "ml_test_score_json",
+            "Validating ML Test Score JSON",
+            lambda: validate_file_exists(ml_score_file, "ML Test Score JSON file")
+            and validate_json_content(
+                ml_score_file,
+                ["overall_score", "metamorphic_score", "total_tests", "passed_tests", "category_breakdown"],
+                "ML Test Score JSON content",
+            ),
+            deps=("ml_test_score",),
+        ),
+        Task(
+            "readme_badges",
+            "Updating README badges",
+            command("python scripts/update_readme.py", "Updating README badges"),
+            deps=("coverage_json", "ml_test_score_json"),
+        ),
+        Task(
+            "readme_valid",
+            "Validating README badges",
+            lambda: validate_readme_badges(base_dir / "README.md"),
+            deps=("readme_badges",),
+        ),
+    ]
+
+
 def main():
     """Run complete workflow validation."""
+    parser = argparse.ArgumentParser(description="Run the ML testing workflow as a task graph.")
+    parser.add_argument("--jobs", type=int, default=4, help="Steps run at once.")
+    parser.add_argument("--force", action="store_true", help="Run steps even if their inputs are unchanged.")
+    args = parser.parse_args()
+
     print("🚀 Starting ML Testing Workflow Validation\n")
+    (BASE_DIR / "test_reports").mkdir(exist_ok=True)
+    print("✅ Test reports directory created")
 
-    base_dir = Path(__file__).parent.parent
-    success_count = 0
-    total_checks = 0
+    graph = TaskGraph(build_workflow(), jobs=args.jobs, force=args.force)
+    start = time.perf_counter()
+    statuses = graph.run()
+    graph.print_timings(time.perf_counter() - start)
 
-    # Step 1: Create test reports directory
-    total_checks += 1
-    test_reports_dir = base_dir / "test_reports"
-    test_reports_dir.mkdir(exist_ok=True)
-    print("✅ Test reports directory created")
-    success_count += 1
-
-    # Step 2: Run tests with coverage
-    total_checks += 1
-    cmd = (
-        "python -m pytest tests/ --cov=src --cov-report=json:test_reports/coverage.json "
-        "--junit-xml=test_reports/junit.xml -v"
-    )
-    if run_command(cmd, "Running tests with coverage"):
-        success_count += 1
-
-    # Step 3: Validate coverage.json
-    total_checks += 1
-    coverage_file = base_dir / "test_reports" / "coverage.json"
-    if validate_file_exists(
-        coverage_file, "Coverage JSON file"
-    ) and validate_json_content(coverage_file, ["totals"], "Coverage JSON content"):
-        success_count += 1
-
-    # Step 4: Validate junit.xml
-    total_checks += 1
-    junit_file = base_dir / "test_reports" / "junit.xml"
-    if validate_file_exists(junit_file, "JUnit XML file"):
-        success_count += 1
-
-    # Step 5: Calculate ML Test Score
-    total_checks += 1
-    cmd = "python scripts/ml_test_score.py test_reports/junit.xml test_reports/ml_test_score.json"
-    if run_command(cmd, "Calculating ML Test Score"):
-        success_count += 1
-
-    # Step 6: Validate ml_test_score.json
-    total_checks += 1
-    ml_score_file = base_dir / "test_reports" / "ml_test_score.json"
-    required_keys = [
-        "overall_score",
-        "metamorphic_score",
-        "total_tests",
-        "passed_tests",
-        "category_breakdown",
-    ]
-    if validate_file_exists(
-        ml_score_file, "ML Test Score JSON file"
-    ) and validate_json_content(
-        ml_score_file, required_keys, "ML Test Score JSON content"
-    ):
-        success_count += 1
-
-    # Step 7: Update README badges
-    total_checks += 1
-    cmd = "python scripts/update_readme.py"
-    if run_command(cmd, "Updating README badges"):
-        success_count += 1
-
-    # Step 8: Validate README was updated
-    total_checks += 1
-    readme_file = base_dir / "README.md"
-    if validate_file_exists(readme_file, "README.md file"):
-        try:
-            with open(readme_file, "r") as f:
-                content = f.read()
-            if (
-                "<!-- AUTOMATED-BADGES -->" in content
-                and "ML%20Test%20Score" in content
-            ):
-                print("✅ README badges updated - VALID")
-                success_count += 1
-            else:
-                print("❌ README badges updated - BADGES MISSING")
-        except Exception as e:
-            print(f"❌ README validation - ERROR: {e}")
+    total_checks = len(statuses)
+    success_count = sum(status in ("passed", "skipped") for status in statuses.values())
 
     # Final summary
     print("\n📊 WORKFLOW VALIDATION RESULTS")
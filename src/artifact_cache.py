@@ -0,0 +1,337 @@
+"""
+Local artifact mirror and shared cache for the pipeline inputs.
+
+- Resolves dataset files from a read-only mirror directory or a local content-addressed
+  cache before touching the network.
+- Stores every downloaded file once per machine under its SHA-256 as a read-only blob and
+  gives each workspace its own writable copy (a reflink where the filesystem supports it),
+  so concurrent workers on the same node do not re-download it and edits in one workspace
+  can never reach the cache or another workspace.
+- Points NLTK at mirrored or cached corpora so air-gapped nodes never call `nltk.download`.
+
+Mirror layout::
+
+    <mirror_dir>/datasets/<name>            dataset files
+    <mirror_dir>/datasets/<name>.sha256     optional checksum sidecar
+    <mirror_dir>/nltk_data/corpora/...      standard NLTK data layout
+
+Configured with `--mirror_dir`, `--cache_dir` and `--fetch_policy` on `src.get_data`, or
+with the `PIPELINE_MIRROR_DIR`, `PIPELINE_CACHE_DIR` and `PIPELINE_FETCH_POLICY`
+environment variables, which every stage reads.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, downloads may be duplicated
+    fcntl = None
+
+MIRROR_ENV_VAR = "PIPELINE_MIRROR_DIR"
+CACHE_ENV_VAR = "PIPELINE_CACHE_DIR"
+POLICY_ENV_VAR = "PIPELINE_FETCH_POLICY"
+
+FETCH_POLICIES = ("offline", "cache-first", "refresh")
+DEFAULT_FETCH_POLICY = "cache-first"
+
+CHUNK_SIZE = 1024 * 1024
+FICLONE = 0x40049409  # Linux ioctl sharing the source's extents (btrfs, XFS) instead of copying data
+
+
+def resolve_fetch_policy(policy=None):
+    """
+    Resolve the fetch policy from an explicit value, the environment, or the default.
+
+    Args:
+        policy (str, optional): One of "offline", "cache-first" or "refresh". Defaults to None.
+
+    Returns:
+        str: The fetch policy.
+
+    Raises:
+        ValueError: If the policy is unknown.
+    """
+    policy = policy or os.environ.get(POLICY_ENV_VAR) or DEFAULT_FETCH_POLICY
+    if policy not in FETCH_POLICIES:
+        raise ValueError(f"Unknown fetch policy {policy!r}, expected one of {FETCH_POLICIES}")
+    return policy
+
+
+def resolve_dirs(cache_dir=None, mirror_dir=None):
+    """
+    Resolve the cache and mirror directories from explicit values or the environment.
+
+    Args:
+        cache_dir (str, optional): Local cache directory. Defaults to None.
+        mirror_dir (str, optional): Read-only mirror directory. Defaults to None.
+
+    Returns:
+        tuple: (cache_dir, mirror_dir), each None when not configured.
+    """
+    return (
+        cache_dir or os.environ.get(CACHE_ENV_VAR) or None,
+        mirror_dir or os.environ.get(MIRROR_ENV_VAR) or None,
+    )
+
+
+def sha256_file(path):
+    """
+    Compute the SHA-256 hex digest of a file, reading it in chunks.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tree_files(path):
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+def sha256_tree(path):
+    """
+    Compute the SHA-256 hex digest of a file, or of every file under a directory.
+
+    A directory digest covers each file's relative path and contents in sorted order, so
+    unzipped NLTK corpora can be pinned like zipped ones.
+
+    Args:
+        path (str): Path to a file or directory.
+
+    Returns:
+        str: Hex digest.
+    """
+    if not os.path.isdir(path):
+        return sha256_file(path)
+    digest = hashlib.sha256()
+    for file_path in _tree_files(path):
+        digest.update(os.path.relpath(file_path, path).replace(os.sep, "/").encode("utf-8"))
+        digest.update(sha256_file(file_path).encode("ascii"))
+    return digest.hexdigest()
+
+
+def file_signature(path):
+    """
+    Return the size and modification time of a file, used to detect changes without hashing.
+
+    For a directory, the total size and latest modification time of the files under it.
+
+    Args:
+        path (str): Path to the file or directory.
+
+    Returns:
+        dict: `size` and `mtime_ns` of the file.
+    """
+    if os.path.isdir(path):
+        stats = [os.stat(file_path) for file_path in _tree_files(path)]
+        return {"size": sum(st.st_size for st in stats), "mtime_ns": max((st.st_mtime_ns for st in stats), default=0)}
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _copy_file(source_path, output_path):
+    """Copy a file, as a reflink sharing the source's blocks where the filesystem supports it."""
+    with open(source_path, "rb") as src, open(output_path, "wb") as dst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return
+            except OSError:  # Not a Linux reflink-capable filesystem, or a different one
+                pass
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+def _read_sidecar(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read().split()
+    return content[0] if content else None
+
+
+def _atomic_write_json(path, obj):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+class ArtifactCache:
+    """
+    Look up, store and materialize dataset files in a mirror and a local cache.
+
+    Args:
+        cache_dir (str, optional): Writable cache directory shared by workers on this machine. Defaults to None.
+        mirror_dir (str, optional): Read-only mirror directory. Defaults to None.
+    """
+
+    def __init__(self, cache_dir=None, mirror_dir=None):
+        self.cache_dir = cache_dir
+        self.mirror_dir = mirror_dir
+        if cache_dir:
+            os.makedirs(os.path.join(cache_dir, "datasets"), exist_ok=True)
+            os.makedirs(os.path.join(cache_dir, "locks"), exist_ok=True)
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.cache_dir, "datasets", sha256)
+
+    def _pointer_path(self, name):
+        return os.path.join(self.cache_dir, "datasets", f"{name}.json")
+
+    def find(self, name, expected_sha256=None):
+        """
+        Find a verified copy of `name` in the mirror or the cache.
+
+        Mirror files are checked against `expected_sha256` or their `.sha256` sidecar.
+        Cache blobs are content-addressed, so only their recorded size and mtime are re-checked.
+
+        Args:
+            name (str): File name of the dataset.
+            expected_sha256 (str, optional): Checksum the file must have. Defaults to None.
+
+        Returns:
+            tuple or None: (path, sha256, source) with source "mirror" or "cache", or None if not found.
+        """
+        if self.mirror_dir:
+            path = os.path.join(self.mirror_dir, "datasets", name)
+            if os.path.exists(path):
+                expected = expected_sha256 or _read_sidecar(path + ".sha256")
+                checksum = sha256_file(path)
+                if expected is None or checksum == expected:
+                    return path, checksum, "mirror"
+        if self.cache_dir and os.path.exists(self._pointer_path(name)):
+            with open(self._pointer_path(name), "r", encoding="utf-8") as f:
+                pointer = json.load(f)
+            blob = self._blob_path(pointer["sha256"])
+            if expected_sha256 not in (None, pointer["sha256"]) or not os.path.exists(blob):
+                return None
+            if file_signature(blob) != {k: pointer[k] for k in ("size", "mtime_ns")}:
+                if sha256_file(blob) != pointer["sha256"]:
+                    os.remove(blob)
+                    return None
+            return blob, pointer["sha256"], "cache"
+        return None
+
+    def store(self, name, path, sha256):
+        """
+        Add a verified file to the cache under its checksum.
+
+        The blob is a separate copy of `path`, made read-only; it never shares an inode with
+        a workspace file, so neither can be changed through the other.
+
+        Args:
+            name (str): File name of the dataset.
+            path (str): Path of the verified file.
+            sha256 (str): Its SHA-256 checksum.
+
+        Returns:
+            str or None: Path of the cached blob, or None if no cache is configured.
+        """
+        if not self.cache_dir:
+            return None
+        blob = self._blob_path(sha256)
+        if not os.path.exists(blob):
+            tmp_blob = f"{blob}.{os.getpid()}.tmp"
+            _copy_file(path, tmp_blob)
+            os.chmod(tmp_blob, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_blob, blob)
+        _atomic_write_json(self._pointer_path(name), {"sha256": sha256, **file_signature(blob)})
+        return blob
+
+    @staticmethod
+    def materialize(source_path, output_path):
+        """
+        Place a writable copy of a cached or mirrored file at `output_path`.
+
+        The copy is a reflink where the filesystem supports it, so it costs no extra space
+        until either side is modified, and a plain copy otherwise. Hard links are never used:
+        they would hand the workspace the cache's read-only inode.
+
+        Args:
+            source_path (str): Path of the cached blob or mirrored file.
+            output_path (str): Destination path.
+
+        Returns:
+            str: The output path.
+        """
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        _copy_file(source_path, tmp_path)
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    @contextmanager
+    def lock(self, name):
+        """
+        Hold an exclusive per-file lock so only one worker on this machine fetches `name`.
+
+        Args:
+            name (str): File name of the dataset.
+        """
+        if not self.cache_dir or fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.cache_dir, "locks", f"{name}.lock"), "w", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def nltk_data_dirs(cache_dir=None, mirror_dir=None):
+    """
+    Return the NLTK data directories provided by the mirror and the cache.
+
+    Args:
+        cache_dir (str, optional): Local cache directory. Defaults to the environment setting.
+        mirror_dir (str, optional): Read-only mirror directory. Defaults to the environment setting.
+
+    Returns:
+        list[str]: Mirror directory first, then cache directory; only configured ones are returned.
+    """
+    cache_dir, mirror_dir = resolve_dirs(cache_dir, mirror_dir)
+    dirs = []
+    if mirror_dir:
+        dirs.append(os.path.join(mirror_dir, "nltk_data"))
+    if cache_dir:
+        dirs.append(os.path.join(cache_dir, "nltk_data"))
+    return dirs
+
+
+def configure_nltk_data(cache_dir=None, mirror_dir=None):
+    """
+    Put the mirror and cache NLTK data directories on NLTK's search path.
+
+    Safe to call repeatedly; directories are only added once.
+
+    Args:
+        cache_dir (str, optional): Local cache directory. Defaults to the environment setting.
+        mirror_dir (str, optional): Read-only mirror directory. Defaults to the environment setting.
+
+    Returns:
+        list[str]: The configured NLTK data directories.
+    """
+    import nltk  # pylint: disable=import-outside-toplevel
+
+    dirs = nltk_data_dirs(cache_dir, mirror_dir)
+    for path in reversed(dirs):
+        if path not in nltk.data.path:
+            nltk.data.path.insert(0, path)
+    return dirs
@@ -0,0 +1,220 @@
+"""
+Exact and near-duplicate review detection.
+
+- Exact duplicates are found by hashing the normalized review text.
+- Near-duplicates are found with MinHash signatures over character shingles of the
+  distinct texts and a banded locality-sensitive-hashing index, so only reviews sharing a
+  band bucket are compared and the cost stays close to linear in the number of reviews.
+- Duplicates are merged into groups identified by their first row, which can be used to
+  drop the copies or to keep every group on one side of the train/test split.
+
+pandas and SciPy are imported inside the functions, so the CLI modules that only need
+`DEDUP_MODES` and `DEFAULT_THRESHOLD` for their argument parsers start quickly.
+"""
+
+import numpy as np
+
+DEDUP_MODES = ("off", "drop", "group")
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_SIZE = 5
+BATCH_DOCS = 1024
+
+_PRIME = np.uint64((1 << 31) - 1)
+_BAND_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_text(texts):
+    """
+    Lowercase reviews and collapse punctuation and whitespace.
+
+    Args:
+        texts (pd.Series): Review texts.
+
+    Returns:
+        pd.Series: Normalized texts.
+    """
+    return (
+        texts.fillna("")
+        .astype(str)
+        .str.lower()
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _first_occurrences(codes):
+    """Index of the first row of every code, for codes numbered in order of first appearance."""
+    seen = np.maximum.accumulate(np.concatenate([[-1], codes[:-1]]))
+    return np.flatnonzero(codes > seen)
+
+
+def _shingle_hashes(texts, shingle_size):
+    """Rolling hashes of every byte shingle, with the offset of each text's first shingle."""
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    n_shingles = np.maximum(lengths - shingle_size + 1, 1)
+    offsets = np.cumsum(n_shingles) - n_shingles
+    positions = np.arange(n_shingles.sum()) - np.repeat(offsets, n_shingles)
+    window_starts = np.repeat(np.cumsum(lengths) - lengths, n_shingles) + positions
+    hashes = np.zeros(len(window_starts), dtype=np.uint64)
+    for i in range(shingle_size):
+        hashes = (hashes * np.uint64(256) + data[window_starts + i]) % _PRIME
+    return hashes, offsets
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+    """
+    Compute MinHash signatures of the character shingles of each text.
+
+    Each permutation is a multiply-add on 32-bit shingle hashes (wrapping modulo 2**32 with an
+    odd multiplier), evaluated for a whole batch of documents at once and reduced per document
+    with `np.minimum.reduceat`.
+
+    Args:
+        texts (list[str]): Normalized texts, each at least `shingle_size` characters long.
+        num_perm (int, optional): Number of hash permutations. Defaults to 128.
+        shingle_size (int, optional): Characters per shingle. Defaults to 5.
+        seed (int, optional): Seed of the permutation coefficients. Defaults to 1.
+
+    Returns:
+        np.ndarray: uint32 array of shape (len(texts), num_perm).
+    """
+    rng = np.random.default_rng(seed)
+    a = (rng.integers(0, 1 << 32, num_perm, dtype=np.uint64) | 1).astype(np.uint32)[:, None]
+    b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64).astype(np.uint32)[:, None]
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), BATCH_DOCS):
+        batch = texts[start : start + BATCH_DOCS]
+        hashes, offsets = _shingle_hashes(batch, shingle_size)
+        permuted = a * hashes.astype(np.uint32)[None, :] + b
+        signatures[start : start + len(batch)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, bands=BANDS):
+    """
+    Find candidate near-duplicate pairs with banded LSH.
+
+    Each band is folded into one 64-bit key; documents sharing a key fall into the same bucket.
+    Each document is paired with the first document of its bucket rather than with every
+    member, so large buckets do not cause quadratic work.
+
+    Args:
+        signatures (np.ndarray): MinHash signatures, one row per document.
+        bands (int, optional): Number of bands; must divide the signature length. Defaults to 32.
+
+    Returns:
+        np.ndarray: int64 array of shape (n_pairs, 2) with unique (document, representative) pairs.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    n_docs, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"bands ({bands}) must divide the signature length ({num_perm})")
+    rows = num_perm // bands
+    docs = np.arange(n_docs)
+    pairs = []
+    for band in range(bands):
+        keys = np.zeros(n_docs, dtype=np.uint64)
+        for row in range(band * rows, (band + 1) * rows):
+            keys = keys * _BAND_MIX + signatures[:, row].astype(np.uint64)
+        codes, _ = pd.factorize(keys)
+        representative = _first_occurrences(codes)[codes]
+        shared = representative != docs
+        pairs.append(np.column_stack([docs[shared], representative[shared]]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def _groups_from_edges(n_docs, edges):
+    from scipy.sparse import coo_matrix  # pylint: disable=import-outside-toplevel
+    from scipy.sparse.csgraph import connected_components  # pylint: disable=import-outside-toplevel
+
+    graph = coo_matrix(
+        (np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(n_docs, n_docs)
+    )
+    _, labels = connected_components(graph, directed=False)
+    first = np.full(labels.max() + 1 if n_docs else 0, n_docs, dtype=np.int64)
+    np.minimum.at(first, labels, np.arange(n_docs))
+    return first[labels]
+
+
+def find_duplicate_groups(
+    texts,
+    threshold=DEFAULT_THRESHOLD,
+    num_perm=NUM_PERM,
+    bands=BANDS,
+    shingle_size=SHINGLE_SIZE,
+):
+    """
+    Assign every review to a duplicate group.
+
+    Args:
+        texts (pd.Series or list[str]): Review texts.
+        threshold (float, optional): Minimum estimated Jaccard similarity of near-duplicates. Defaults to 0.8.
+        num_perm (int, optional): Number of MinHash permutations. Defaults to 128.
+        bands (int, optional): Number of LSH bands. Defaults to 32.
+        shingle_size (int, optional): Characters per shingle. Defaults to 5.
+
+    Returns:
+        tuple: (groups, stats) where `groups` holds, for each review, the index of the first
+            review of its group, and `stats` counts rows, groups, exact and near duplicates.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    normalized = normalize_text(pd.Series(texts).reset_index(drop=True))
+    n_docs = len(normalized)
+    docs = np.arange(n_docs)
+
+    # Exact duplicates share a code; near-duplicates are only searched among distinct texts
+    codes, uniques = pd.factorize(normalized)
+    first_of_code = _first_occurrences(codes)
+    exact = np.column_stack([docs, first_of_code[codes]])
+    edges = [exact[exact[:, 0] != exact[:, 1]]]
+
+    if threshold < 1.0 and n_docs:
+        padded = pd.Series(uniques).str.pad(shingle_size, side="right").tolist()
+        signatures = minhash_signatures(padded, num_perm, shingle_size)
+        candidates = lsh_candidate_pairs(signatures, bands)
+        similarity = (signatures[candidates[:, 0]] == signatures[candidates[:, 1]]).mean(axis=1)
+        edges.append(first_of_code[candidates[similarity >= threshold]])
+
+    groups = _groups_from_edges(n_docs, np.concatenate(edges).astype(np.int64))
+    n_groups = int((groups == docs).sum())
+    stats = {
+        "rows": n_docs,
+        "groups": n_groups,
+        "exact_duplicates": n_docs - len(uniques),
+        "near_duplicates": len(uniques) - n_groups,
+    }
+    return groups, stats
+
+
+def deduplicate(frame, column="Review", mode="drop", threshold=DEFAULT_THRESHOLD):
+    """
+    Drop or group duplicate reviews in a dataset.
+
+    Args:
+        frame (pd.DataFrame): The dataset.
+        column (str, optional): Text column to compare. Defaults to "Review".
+        mode (str, optional): "drop" keeps the first review of each group, "group" keeps every
+            row and returns the group ids, "off" returns the data unchanged. Defaults to "drop".
+        threshold (float, optional): Minimum estimated Jaccard similarity of near-duplicates. Defaults to 0.8.
+
+    Returns:
+        tuple: (frame, groups, stats); `groups` is None unless `mode` is "group" and `stats` is
+            None when `mode` is "off".
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode {mode!r}, expected one of {DEDUP_MODES}")
+    if mode == "off":
+        return frame, None, None
+    groups, stats = find_duplicate_groups(frame[column], threshold)
+    if mode == "group":
+        return frame, groups, stats
+    keep = groups == np.arange(len(frame))
+    return frame[keep].reset_index(drop=True), None, stats
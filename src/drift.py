@@ -0,0 +1,425 @@
+"""
+Data drift monitoring for incoming review batches.
+
+- At train time, stores a compact summary of the training set: per-term document and
+  token frequencies, feature means and variances, a histogram of review lengths, the
+  class balance the model predicts on it, and the parameters the model predicts with:
+  `theta_`/`var_` for GaussianNB, `coef_`/`intercept_` for linear models, or the stacked
+  arrays of an ensemble.
+- For new batches (e.g. the FreshDump), tokenizes each review once like the persisted
+  vectorizer (`src.features.count_terms`), weights the counts like the training features,
+  accumulates the same statistics with sparse vectorized operations and compares them to
+  the summary with PSI, KL/JS divergence, the out-of-vocabulary rate and feature mean shifts.
+- Review lengths are the number of distinct vocabulary terms, which is the same for counts
+  and TF-IDF weights. The out-of-vocabulary rate is compared with the rate of the training
+  reviews recorded on the vectorizer, since `min_df`/`max_features` pruning leaves training
+  tokens outside the vocabulary too.
+- Prediction drift compares the class balance predicted for a batch with the one predicted
+  for the training rows. Both are predicted directly on the sparse matrix with the stored
+  model parameters, so batches are never densified.
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+
+import joblib
+import numpy as np
+
+from src.features import count_terms, weight_terms
+from src.ingest import STREAM_ROWS, iter_chunks
+from src.profiling import add_profile_argument, profile_run
+from src.timing import timed, timing_session
+
+LENGTH_BINS = 10
+EPSILON = 1e-6
+TOP_TERMS = 10
+SUMMARY_BATCH_ROWS = 4096
+
+PSI_THRESHOLD = 0.2  # Common rule of thumb: > 0.2 is a significant population shift
+JS_THRESHOLD = 0.1
+OOV_THRESHOLD = 0.3
+
+
+def model_parameters(model):
+    """
+    The parameters that reproduce a model's predictions on sparse batches, by model kind.
+
+    Args:
+        model (object): The fitted classifier (GaussianNB, SGDClassifier or StackedEnsemble).
+
+    Returns:
+        dict: `class_prior`, `theta` and `var` for GaussianNB, `coef` and `intercept` for
+            linear models, and the stacked arrays prefixed with `ensemble_` for ensembles.
+
+    Raises:
+        TypeError: For other models.
+    """
+    from src.ensemble import StackedEnsemble  # pylint: disable=import-outside-toplevel
+
+    if isinstance(model, StackedEnsemble):
+        return {f"ensemble_{key}": value for key, value in model.parameters().items()}
+    if hasattr(model, "theta_"):
+        return {"class_prior": model.class_prior_, "theta": model.theta_, "var": model.var_}
+    if hasattr(model, "coef_"):
+        return {"coef": model.coef_, "intercept": model.intercept_}
+    raise TypeError(f"Cannot summarize predictions of a {type(model).__name__}")
+
+
+def summarize_training(X, y, model, rows=None, batch_rows=SUMMARY_BATCH_ROWS):
+    """
+    Summarize the training set for later drift checks.
+
+    The rows are read `batch_rows` at a time, so `X` can be a memory-mapped file of which
+    only the training rows count. The training rows are predicted with the stored model
+    parameters, so batches are compared with the model's predicted class balance on the
+    training data rather than with the labels.
+
+    Args:
+        X (np.ndarray or scipy.sparse matrix): Features (counts or TF-IDF weights), possibly memory-mapped.
+        y (np.ndarray): Labels of every row of `X`.
+        model (object): The fitted classifier (GaussianNB, SGDClassifier or StackedEnsemble).
+        rows (np.ndarray, optional): Training rows. Defaults to all rows.
+        batch_rows (int, optional): Rows read at a time. Defaults to 4096.
+
+    Returns:
+        dict: Arrays `n_docs`, `doc_freq`, `term_counts`, `feature_mean`, `feature_var`,
+            `classes`, `class_counts`, `predicted_class_counts`, `length_edges` and
+            `length_counts`, plus the model parameters from `model_parameters`.
+    """
+    import scipy.sparse as sp  # pylint: disable=import-outside-toplevel
+
+    y = np.asarray(y)
+    X = X.tocsr() if sp.issparse(X) else X
+    rows = np.arange(X.shape[0]) if rows is None else np.sort(rows)
+    classes, class_counts = np.unique(y[rows], return_counts=True)
+    summary = {"classes": classes, **model_parameters(model)}
+    doc_freq = np.zeros(X.shape[1], dtype=np.int64)
+    sums = np.zeros(X.shape[1])
+    squares = np.zeros(X.shape[1])
+    predicted_counts = np.zeros(len(classes), dtype=np.int64)
+    lengths = []
+    for start in range(0, len(rows), batch_rows):
+        batch = rows[start : start + batch_rows]
+        batch_features = X[batch] if sp.issparse(X) else sp.csr_matrix(np.asarray(X[batch]))
+        lengths.append(review_lengths(batch_features))
+        doc_freq += np.bincount(batch_features.indices, minlength=X.shape[1])
+        sums += np.asarray(batch_features.sum(axis=0)).ravel()
+        squares += np.asarray(batch_features.multiply(batch_features).sum(axis=0)).ravel()
+        predicted = predict_sparse(batch_features, summary)
+        predicted_counts += (predicted[:, None] == classes[None, :]).sum(axis=0)
+    lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+    quantiles = np.quantile(lengths, np.linspace(0, 1, LENGTH_BINS + 1)[1:-1])
+    length_edges = np.unique(quantiles)
+    n_docs = max(len(rows), 1)
+    feature_mean = sums / n_docs
+    return {
+        **summary,
+        "n_docs": np.array(len(rows)),
+        "doc_freq": doc_freq,
+        "term_counts": sums,
+        "feature_mean": feature_mean,
+        "feature_var": np.maximum(squares / n_docs - feature_mean**2, EPSILON),
+        "class_counts": class_counts,
+        "predicted_class_counts": predicted_counts,
+        "length_edges": length_edges,
+        "length_counts": _histogram(lengths, length_edges),
+    }
+
+
+def review_lengths(X):
+    """
+    Length of each review as its number of distinct vocabulary terms.
+
+    Args:
+        X (np.ndarray or scipy.sparse matrix): Features, counts or TF-IDF weights.
+
+    Returns:
+        np.ndarray: One length per row.
+    """
+    return np.asarray((X > 0).sum(axis=1)).ravel()
+
+
+def save_summary(path, summary):
+    """
+    Save a training summary as a compressed `.npz` file.
+
+    Args:
+        path (str): Output file path.
+        summary (dict): Summary from `summarize_training`.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **summary)
+
+
+def load_summary(path):
+    """
+    Load a training summary saved with `save_summary`.
+
+    Args:
+        path (str): Path of the `.npz` file.
+
+    Returns:
+        dict: The summary arrays.
+    """
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _histogram(values, edges):
+    return np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+
+
+def _proportions(counts):
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum()
+    proportions = counts / total if total else np.full_like(counts, 1.0 / len(counts))
+    return np.clip(proportions, EPSILON, None)
+
+
+def psi(expected_counts, actual_counts):
+    """
+    Population stability index between two histograms.
+
+    Args:
+        expected_counts (np.ndarray): Reference counts per bin.
+        actual_counts (np.ndarray): New counts per bin.
+
+    Returns:
+        float: PSI; 0 means identical distributions.
+    """
+    expected, actual = _proportions(expected_counts), _proportions(actual_counts)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def kl_divergence(p_counts, q_counts):
+    """
+    Kullback-Leibler divergence KL(p || q) in nats between two count vectors.
+
+    Args:
+        p_counts (np.ndarray): Counts of the first distribution.
+        q_counts (np.ndarray): Counts of the reference distribution.
+
+    Returns:
+        float: KL divergence.
+    """
+    p, q = _proportions(p_counts), _proportions(q_counts)
+    return float(np.sum(p * np.log(p / q)))
+
+
+def js_divergence(p_counts, q_counts):
+    """
+    Jensen-Shannon divergence in nats between two count vectors (bounded by ln 2).
+
+    Args:
+        p_counts (np.ndarray): Counts of the first distribution.
+        q_counts (np.ndarray): Counts of the second distribution.
+
+    Returns:
+        float: JS divergence.
+    """
+    p, q = _proportions(p_counts), _proportions(q_counts)
+    m = (p + q) / 2
+    return float(0.5 * np.sum(p * np.log(p / m)) + 0.5 * np.sum(q * np.log(q / m)))
+
+
+def predict_sparse(X, summary):
+    """
+    Predictions of the summarized model computed on a sparse matrix.
+
+    For GaussianNB, expands the Gaussian log-likelihood of the stored `theta`/`var` into
+    sparse matrix-vector products instead of densifying the batch; gives the same labels
+    as `GaussianNB.predict`. Linear models predict with their stored `coef`/`intercept`,
+    and ensembles are rebuilt from their stacked arrays.
+
+    Args:
+        X (scipy.sparse matrix): BoW counts.
+        summary (dict): Training summary with `classes` and the parameters from `model_parameters`.
+
+    Returns:
+        np.ndarray: Predicted labels.
+    """
+    if "ensemble_linear" in summary:
+        from src.ensemble import StackedEnsemble  # pylint: disable=import-outside-toplevel
+
+        prefix = len("ensemble_")
+        params = {key[prefix:]: value for key, value in summary.items() if key.startswith("ensemble_")}
+        return StackedEnsemble.from_parameters(params).predict(X)
+    if "coef" in summary:
+        scores = np.asarray(X @ summary["coef"].T).reshape(X.shape[0], -1) + summary["intercept"]
+        if scores.shape[1] == 1:
+            return summary["classes"][(scores[:, 0] > 0).astype(int)]
+        return summary["classes"][scores.argmax(axis=1)]
+    theta, var = summary["theta"], summary["var"]
+    log_prior = np.log(summary["class_prior"])
+    const = log_prior - 0.5 * np.log(2 * np.pi * var).sum(axis=1) - 0.5 * (theta**2 / var).sum(axis=1)
+    jll = X.multiply(X) @ (-0.5 / var).T + X @ (theta / var).T + const
+    return summary["classes"][np.asarray(jll).argmax(axis=1)]
+
+
+@dataclass
+class _BatchTotals:
+    """Running totals of the reviews a `DriftMonitor` has seen."""
+
+    rows: int = 0
+    tokens: int = 0
+    known_tokens: int = 0
+    empty_rows: int = 0
+
+
+class DriftMonitor:
+    """
+    Accumulate drift statistics over batches of raw reviews.
+
+    Args:
+        summary (dict): Training summary from `summarize_training`.
+        vectorizer (object): The fitted vectorizer used at train time.
+    """
+
+    def __init__(self, summary, vectorizer):
+        self.summary = summary
+        self.vectorizer = vectorizer
+        n_terms = len(summary["doc_freq"])
+        self.totals = _BatchTotals()
+        self.doc_freq = np.zeros(n_terms, dtype=np.int64)
+        self.term_counts = np.zeros(n_terms)
+        self.length_counts = np.zeros(len(summary["length_edges"]) + 1, dtype=np.int64)
+        self.class_counts = np.zeros(len(summary["classes"]), dtype=np.int64)
+
+    def update(self, reviews):
+        """
+        Add a batch of raw reviews.
+
+        Args:
+            reviews (list[str]): Review texts.
+        """
+        counts, tokens = count_terms(self.vectorizer, reviews)
+        X = weight_terms(self.vectorizer, counts)
+        lengths = review_lengths(X)
+        self.totals.rows += X.shape[0]
+        self.totals.tokens += int(tokens.sum())
+        self.totals.known_tokens += int(counts.sum())
+        self.totals.empty_rows += int((lengths == 0).sum())
+        self.doc_freq += np.bincount(X.indices, minlength=X.shape[1])
+        self.term_counts += np.asarray(X.sum(axis=0)).ravel()
+        self.length_counts += _histogram(lengths, self.summary["length_edges"])
+        predicted = predict_sparse(X, self.summary)
+        self.class_counts += (predicted[:, None] == self.summary["classes"][None, :]).sum(axis=0)
+
+    def _feature_mean_shift(self):
+        batch_mean = self.term_counts / max(self.totals.rows, 1)
+        return np.abs(batch_mean - self.summary["feature_mean"]) / np.sqrt(self.summary["feature_var"])
+
+    def _top_terms(self):
+        train_rate = self.summary["doc_freq"] / self.summary["n_docs"]
+        batch_rate = self.doc_freq / max(self.totals.rows, 1)
+        change = batch_rate - train_rate
+        names = self.vectorizer.get_feature_names_out()
+        top = np.argsort(-np.abs(change))[:TOP_TERMS]
+        return [
+            {"term": str(names[i]), "train_df": float(train_rate[i]), "batch_df": float(batch_rate[i])}
+            for i in top
+        ]
+
+    def report(self):
+        """
+        Compare the accumulated batch statistics with the training summary.
+
+        Returns:
+            dict: Drift statistics, the terms whose document frequency changed most, the
+                alerts raised and `drift_detected`.
+        """
+        totals = self.totals
+        oov_rate = 1 - totals.known_tokens / totals.tokens if totals.tokens else 0.0
+        # Vectorizers saved before the baseline was recorded compare against no OOV at all
+        train_oov_rate = float(getattr(self.vectorizer, "oov_rate_", 0.0))
+        shift = self._feature_mean_shift()
+        stats = {
+            "rows": totals.rows,
+            "oov_rate": oov_rate,
+            "train_oov_rate": train_oov_rate,
+            "empty_rate": totals.empty_rows / totals.rows if totals.rows else 0.0,
+            "length_psi": psi(self.summary["length_counts"], self.length_counts),
+            "class_balance_psi": psi(self.summary["predicted_class_counts"], self.class_counts),
+            "term_kl": kl_divergence(self.term_counts, self.summary["term_counts"]),
+            "term_js": js_divergence(self.term_counts, self.summary["term_counts"]),
+            "feature_mean_shift": {"mean": float(shift.mean()), "max": float(shift.max())},
+            "predicted_class_balance": {
+                str(c): int(n) for c, n in zip(self.summary["classes"], self.class_counts)
+            },
+            "top_changed_terms": self._top_terms(),
+        }
+        alerts = []
+        for key in ("length_psi", "class_balance_psi"):
+            if stats[key] > PSI_THRESHOLD:
+                alerts.append(f"{key} {stats[key]:.3f} > {PSI_THRESHOLD}")
+        if stats["term_js"] > JS_THRESHOLD:
+            alerts.append(f"term_js {stats['term_js']:.3f} > {JS_THRESHOLD}")
+        if oov_rate - train_oov_rate > OOV_THRESHOLD:
+            alerts.append(f"oov_rate {oov_rate:.3f} > train_oov_rate {train_oov_rate:.3f} + {OOV_THRESHOLD}")
+        stats["alerts"] = alerts
+        stats["drift_detected"] = bool(alerts)
+        return stats
+
+
+def run_drift_check(summary_path, bow_path, dataset_path, report_path, chunk_rows=STREAM_ROWS):
+    """
+    Stream a dataset through a `DriftMonitor` and save the drift report.
+
+    Args:
+        summary_path (str): Path of the training summary `.npz`.
+        bow_path (str): Path of the pickled vectorizer.
+        dataset_path (str): Path of the `.parquet` or `.tsv` batch with a `Review` column.
+        report_path (str): File path of the JSON report.
+        chunk_rows (int, optional): Reviews processed per batch. Defaults to 100000.
+
+    Returns:
+        dict: The drift report.
+    """
+    with timed("load"):
+        monitor = DriftMonitor(load_summary(summary_path), joblib.load(bow_path))
+    with timed("update"):
+        for chunk in iter_chunks(dataset_path, ["Review"], chunk_rows):
+            monitor.update(chunk["Review"].fillna("").astype(str).tolist())
+    report = monitor.report()
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    """
+    Main function to check a new batch of reviews for drift against the training data.
+    """
+    parser = argparse.ArgumentParser(description="Compare a batch of reviews to the training data.")
+    parser.add_argument(
+        "--summary", type=str, default=os.path.join("output", "training_summary.npz")
+    )
+    parser.add_argument(
+        "--bow", type=str, default=os.path.join("output", "c1_BoW_Sentiment_Model.pkl")
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default=os.path.join("data", "raw", "a2_RestaurantReviews_FreshDump.parquet"),
+    )
+    parser.add_argument("--report", type=str, default=os.path.join("metrics", "drift.json"))
+    parser.add_argument("--chunk_rows", type=int, default=STREAM_ROWS)
+    parser.add_argument("--timings_output", type=str, default=None)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    with profile_run("drift", args.profile), timing_session("drift", args.timings_output):
+        report = run_drift_check(
+            args.summary, args.bow, args.dataset, args.report, args.chunk_rows
+        )
+    if report["drift_detected"]:
+        print(f"Drift detected in {report['rows']} reviews: " + "; ".join(report["alerts"]))
+    else:
+        print(f"No drift detected in {report['rows']} reviews")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Ensembles of sentiment models with a single fused predict.
+
+- Trains N members, on bootstrap samples of the training rows or with different seeds, in
+  parallel worker processes. Each worker receives the features once, when it starts: the
+  CSR matrix is sent as is, and a memory-mapped `.npy` file is reopened by path instead
+  of being copied, so workers share its pages.
+- Stacks the member parameters into arrays: GaussianNB members become one matrix of
+  `theta / var` and one of `-0.5 / var` terms, linear (SGD) members one coefficient matrix.
+- Predicts for all members with one matrix product over the stacked parameters, then
+  averages the member posteriors (GaussianNB) or decision values (linear). Serving cost
+  stays close to a single model, dense or sparse input alike.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ENSEMBLE_STRATEGIES = ("bootstrap", "seeds")
+DEFAULT_ENSEMBLE = {"n_members": 1, "strategy": "bootstrap", "n_jobs": None}
+
+_worker_data = {}
+
+
+class StackedEnsemble:
+    """
+    Ensemble of GaussianNB or linear models stored as stacked parameter arrays.
+
+    Args:
+        members (list): Fitted members, all GaussianNB or all linear models with `coef_`.
+    """
+
+    accepts_sparse = True
+
+    def __init__(self, members):
+        self.classes_ = members[0].classes_
+        self.n_members = len(members)
+        if all(hasattr(member, "theta_") for member in members):
+            self.kind = "gaussian_nb"
+            theta = np.stack([member.theta_ for member in members])
+            inv_var = 1.0 / np.stack([member.var_ for member in members])
+            prior = np.stack([member.class_prior_ for member in members])
+            # (members * classes, features), so one product scores every member and class
+            self.linear = (theta * inv_var).reshape(-1, theta.shape[-1])
+            self.quadratic = (-0.5 * inv_var).reshape(-1, theta.shape[-1])
+            self.bias = (
+                np.log(prior) - 0.5 * np.log(2 * np.pi / inv_var).sum(axis=2) - 0.5 * (theta**2 * inv_var).sum(axis=2)
+            ).ravel()
+        elif all(hasattr(member, "coef_") for member in members):
+            self.kind = "linear"
+            coef = np.stack([member.coef_ for member in members])
+            self.linear = coef.reshape(-1, coef.shape[-1])
+            self.quadratic = None
+            self.bias = np.stack([member.intercept_ for member in members]).ravel()
+        else:
+            raise TypeError("Ensemble members must all be GaussianNB or all linear models")
+        self.n_features_in_ = self.linear.shape[1]
+
+    def parameters(self):
+        """
+        The stacked parameter arrays, from which `from_parameters` rebuilds the ensemble.
+
+        Returns:
+            dict: `classes`, `n_members`, `linear` and `bias`, plus `quadratic` for GaussianNB members.
+        """
+        params = {
+            "classes": self.classes_,
+            "n_members": np.array(self.n_members),
+            "linear": self.linear,
+            "bias": self.bias,
+        }
+        if self.quadratic is not None:
+            params["quadratic"] = self.quadratic
+        return params
+
+    @classmethod
+    def from_parameters(cls, params):
+        """
+        Rebuild an ensemble from the arrays returned by `parameters`, e.g. after saving them.
+
+        Args:
+            params (dict): Arrays from `parameters`.
+
+        Returns:
+            StackedEnsemble: An ensemble predicting like the original one.
+        """
+        ensemble = cls.__new__(cls)
+        ensemble.classes_ = params["classes"]
+        ensemble.n_members = int(params["n_members"])
+        ensemble.linear, ensemble.bias = params["linear"], params["bias"]
+        ensemble.quadratic = params.get("quadratic")
+        ensemble.kind = "linear" if ensemble.quadratic is None else "gaussian_nb"
+        ensemble.n_features_in_ = ensemble.linear.shape[1]
+        return ensemble
+
+    def _member_scores(self, X):
+        """Scores of shape (rows, members, classes or decision columns) from one fused product."""
+        scores = X @ self.linear.T
+        if self.quadratic is not None:
+            squares = X.multiply(X) if hasattr(X, "multiply") else X * X
+            scores = scores + squares @ self.quadratic.T
+        scores = np.asarray(scores) + self.bias
+        return scores.reshape(X.shape[0], self.n_members, -1)
+
+    def predict_proba(self, X):
+        """
+        Average of the member class probabilities (GaussianNB members only).
+
+        Args:
+            X (np.ndarray or scipy.sparse matrix): Feature rows.
+
+        Returns:
+            np.ndarray: Array of shape (rows, classes).
+        """
+        if self.kind != "gaussian_nb":
+            raise AttributeError("predict_proba is only available for GaussianNB ensembles")
+        jll = self._member_scores(X)
+        proba = np.exp(jll - jll.max(axis=2, keepdims=True))
+        proba /= proba.sum(axis=2, keepdims=True)
+        return proba.mean(axis=1)
+
+    def decision_function(self, X):
+        """
+        Average of the member decision values (linear members only).
+
+        Args:
+            X (np.ndarray or scipy.sparse matrix): Feature rows.
+
+        Returns:
+            np.ndarray: Shape (rows,) for binary problems, (rows, classes) otherwise.
+        """
+        if self.kind != "linear":
+            raise AttributeError("decision_function is only available for linear ensembles")
+        scores = self._member_scores(X).mean(axis=1)
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict(self, X):
+        """
+        Predict labels with all members at once.
+
+        Args:
+            X (np.ndarray or scipy.sparse matrix): Feature rows.
+
+        Returns:
+            np.ndarray: Predicted labels.
+        """
+        if self.kind == "gaussian_nb":
+            return self.classes_[self.predict_proba(X).argmax(axis=1)]
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def ensemble_config(params):
+    """
+    Complete an `ensemble` section of params.yaml with the defaults and validate it.
+
+    Args:
+        params (dict or None): The `train.ensemble` section.
+
+    Returns:
+        dict: Ensemble configuration with every key of `DEFAULT_ENSEMBLE`.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+    """
+    config = {**DEFAULT_ENSEMBLE, **(params or {})}
+    if config["strategy"] not in ENSEMBLE_STRATEGIES:
+        raise ValueError(f"Unknown ensemble strategy {config['strategy']!r}, expected one of {ENSEMBLE_STRATEGIES}")
+    return config
+
+
+def _shareable(X):
+    """What to send to the workers: the path of a memory-mapped `.npy` file, or the array itself."""
+    filename = getattr(X, "filename", None)
+    if isinstance(X, np.memmap) and filename and str(filename).endswith(".npy"):
+        return ("npy", str(filename))
+    return ("array", X)
+
+
+def _init_worker(shared, y, config):
+    kind, value = shared
+    _worker_data.update(X=np.load(value, mmap_mode="r") if kind == "npy" else value, y=y, config=config)
+
+
+def _member_rows(rows, strategy, seed):
+    if strategy == "bootstrap":
+        return np.sort(rows[np.random.default_rng(seed).integers(0, len(rows), len(rows))])
+    return rows
+
+
+def _fit_member(index):
+    """Fit one member in a worker, from the data sent to it once by `_init_worker`."""
+    from src.train import (  # pylint: disable=import-outside-toplevel
+        fit_naive_bayes, fit_sgd)
+
+    X, y, config = _worker_data["X"], _worker_data["y"], _worker_data["config"]
+    seed = config["random_state"] + index
+    rows = np.arange(X.shape[0]) if config["rows"] is None else config["rows"]
+    rows = _member_rows(rows, config["ensemble"]["strategy"], seed)
+    if config.get("model") == "sgd":
+        return fit_sgd(X, y, {**config, "random_state": seed}, rows)
+    return fit_naive_bayes(np.asarray(X[rows]), y[rows], config)
+
+
+def fit_ensemble(X, y, config, rows=None):
+    """
+    Train `n_members` models in parallel processes and stack them into one ensemble.
+
+    Args:
+        X (np.ndarray): Feature matrix, possibly memory-mapped.
+        y (np.ndarray): Labels of every row of `X`.
+        config (dict): Training configuration from `src.train.load_params`; the `ensemble`
+            section sets `n_members`, `strategy` ("bootstrap" resamples the training rows,
+            "seeds" only changes the seed of each member) and `n_jobs`.
+        rows (np.ndarray, optional): Rows to train on. Defaults to all rows.
+
+    Returns:
+        StackedEnsemble: The ensemble.
+
+    Raises:
+        ValueError: If "seeds" is used with GaussianNB, whose fit does not depend on a seed.
+    """
+    ensemble = ensemble_config(config.get("ensemble"))
+    if ensemble["strategy"] == "seeds" and config.get("model") != "sgd":
+        raise ValueError("The seeds strategy needs a randomized model (sgd); use bootstrap for GaussianNB")
+    member_config = {**config, "ensemble": ensemble, "rows": None if rows is None else np.asarray(rows)}
+    n_jobs = min(ensemble["n_jobs"] or os.cpu_count() or 1, ensemble["n_members"])
+    indices = range(ensemble["n_members"])
+
+    if n_jobs <= 1:
+        _init_worker(("array", X), y, member_config)
+        try:
+            members = [_fit_member(index) for index in indices]
+        finally:
+            _worker_data.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_init_worker, initargs=(_shareable(X), y, member_config)
+        ) as pool:
+            members = list(pool.map(_fit_member, indices))
+    return StackedEnsemble(members)
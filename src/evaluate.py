@@ -4,31 +4,37 @@ Evaluation script for a trained sentiment classifier.
 - Loads test data and a trained model.
 - Computes accuracy and confusion matrix.
 - Saves metrics as a JSON file.
+
+joblib and scikit-learn are imported where they are used, so `--help` and `parse_args`
+stay fast.
 """
 
 import argparse
 import json
 import os
 
-import joblib
 import numpy as np
-from sklearn.metrics import (accuracy_score, confusion_matrix, f1_score,
-                             precision_score, recall_score)
+
+from src.features import load_features
+from src.memoize import memoize
+from src.memory_tracking import memory_profiling, memory_stage, track_memory
+from src.profiling import INSTRUMENTATION_DEFAULTS, add_instrumentation_arguments, profile_run
+from src.timing import timed, timing_session
 
 
 def load_data(X_path, y_path):
     """
-    Load test features and labels from NumPy files.
+    Load test features and labels.
 
     Args:
-        X_path (str): Path to the test features (.npy file).
+        X_path (str): Path to the test features (CSR .npz file, or a dense .npy file).
         y_path (str): Path to the test labels (.npy file).
 
     Returns:
-        tuple: (X_test, y_test) numpy arrays.
+        tuple: (X_test, y_test); X_test is a CSR matrix, or memory-mapped read-only for a .npy file.
     """
-    X_test = np.load(X_path)
-    y_test = np.load(y_path)
+    X_test = load_features(X_path)
+    y_test = np.load(y_path, mmap_mode=None)  # One label per row, small enough to load eagerly
     return X_test, y_test
 
 
@@ -42,29 +48,57 @@ def load_model(model_path):
     Returns:
         object: Loaded model instance.
     """
+    import joblib  # pylint: disable=import-outside-toplevel
+
     return joblib.load(model_path)
 
 
+@memoize("evaluate", packages=("scikit-learn",), modules=("src.ensemble", "src.train"))
+def predict_labels(model, X_test):
+    """
+    Predict the labels of the test features, batch by batch.
+
+    Args:
+        model (object): Trained model with a predict method.
+        X_test (np.ndarray or scipy.sparse matrix): Test features.
+
+    Returns:
+        np.ndarray: Predicted labels.
+    """
+    from src.train import predict_rows  # pylint: disable=import-outside-toplevel
+
+    return predict_rows(model, X_test)
+
+
 def evaluate_model(model, X_test, y_test):
     """
     Predict on test data and compute evaluation metrics.
 
+    The prediction is memoized; the "predict" memory and timing spans are recorded
+    around it, so a cache hit still shows up in the reports.
+
     Args:
         model (object): Trained model with a predict method.
-        X_test (np.ndarray): Test features.
+        X_test (np.ndarray or scipy.sparse matrix): Test features; GaussianNB gets them
+            densified batch by batch.
         y_test (np.ndarray): True test labels.
 
     Returns:
         dict: Dictionary containing accuracy, precision, recall, f1_score, and confusion matrix.
     """
-    y_pred = model.predict(X_test)
-    metrics = {
-        "accuracy": accuracy_score(y_test, y_pred),
-        "precision": precision_score(y_test, y_pred, zero_division=0),
-        "recall": recall_score(y_test, y_pred, zero_division=0),
-        "f1_score": f1_score(y_test, y_pred, zero_division=0),
-        "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
-    }
+    from sklearn.metrics import (  # pylint: disable=import-outside-toplevel
+        accuracy_score, confusion_matrix, f1_score, precision_score, recall_score)
+
+    with track_memory("predict"), timed("predict"):
+        y_pred = predict_labels(model, X_test)
+    with timed("metrics"):
+        metrics = {
+            "accuracy": accuracy_score(y_test, y_pred),
+            "precision": precision_score(y_test, y_pred, zero_division=0),
+            "recall": recall_score(y_test, y_pred, zero_division=0),
+            "f1_score": f1_score(y_test, y_pred, zero_division=0),
+            "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+        }
     return metrics
 
 
@@ -85,6 +119,7 @@ def save_metrics(metrics, output_path):
     return output_path
 
 
+@memory_stage("run_evaluation")
 def run_evaluation(X_path, y_path, model_path, metrics_output_path):
     """
     Full evaluation pipeline: load data, model, evaluate, and save metrics.
@@ -98,10 +133,13 @@ def run_evaluation(X_path, y_path, model_path, metrics_output_path):
     Returns:
         dict: Dictionary of evaluation metrics.
     """
-    X_test, y_test = load_data(X_path, y_path)
-    model = load_model(model_path)
+    with timed("load_data"):
+        X_test, y_test = load_data(X_path, y_path)
+    with timed("load_model"):
+        model = load_model(model_path)
     metrics = evaluate_model(model, X_test, y_test)
-    save_metrics(metrics, metrics_output_path)
+    with timed("save"):
+        save_metrics(metrics, metrics_output_path)
     return metrics
 
 
@@ -117,21 +155,28 @@ def parse_args():
             - y_test (str): Path to test labels.
             - model (str): Path to trained model file.
             - metrics_output (str): Path to save metrics JSON.
+            - memory_output (str, optional): Path to save the per-stage memory report JSON.
+            - memory_mode (str): "full" for tracemalloc and RSS sampling, "rss" for RSS sampling only.
+            - timings_output (str, optional): Path of the timings JSON to merge step durations into.
+            - trace_output (str, optional): Path to save a Chrome trace of the stage.
+            - profile (str, optional): Directory for cProfile output; profiling is off when unset.
     """
     # Avoid parsing args when run inside pytest
     if "PYTEST_CURRENT_TEST" in os.environ:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
         return argparse.Namespace(
-            X_test=os.path.join(base_dir, "data", "split", "X_test.npy"),
+            X_test=os.path.join(base_dir, "data", "split", "X_test.npz"),
             y_test=os.path.join(base_dir, "data", "split", "y_test.npy"),
             model=os.path.join(base_dir, "output", "c2_Classifier_Sentiment_Model.pkl"),
             metrics_output=os.path.join(base_dir, "metrics", "feature_costs.json"),
+            **INSTRUMENTATION_DEFAULTS,
         )
     parser = argparse.ArgumentParser()
     parser.add_argument("--X_test", type=str, required=True)
     parser.add_argument("--y_test", type=str, required=True)
     parser.add_argument("--model", type=str, required=True)
     parser.add_argument("--metrics_output", type=str, required=True)
+    add_instrumentation_arguments(parser)
 
     return parser.parse_args()
 
@@ -144,7 +189,12 @@ def main():
     """
     np.random.seed(42)
     args = parse_args()
-    metrics = run_evaluation(args.X_test, args.y_test, args.model, args.metrics_output)
+    with profile_run("evaluate", args.profile), timing_session(
+        "evaluate", args.timings_output, args.trace_output
+    ), memory_profiling(args.memory_output, args.memory_mode):
+        metrics = run_evaluation(
+            args.X_test, args.y_test, args.model, args.metrics_output
+        )
     print(f"Evaluation complete. Accuracy: {metrics['accuracy']}")
 
 
@@ -0,0 +1,308 @@
+"""
+Configurable text features for the sentiment pipeline.
+
+- "bow" keeps the unigram counts of `libml._preprocess`, which cleans and stems the reviews
+  before counting. `vectorize_reviews` cleans reviews with lib-ml at serving time and
+  transforms them with the fitted vectorizer.
+- "word_ngram" and "char_ngram" count word n-grams or character n-grams within word
+  boundaries, optionally weighted with TF-IDF.
+- The vocabulary is built in a single pass that writes the counts straight into a CSR
+  matrix, then pruned to terms in at least `min_df` reviews and the `max_features` most
+  frequent ones, so the much larger n-gram space never exists as a dense matrix.
+- Features are stored as CSR (`save_features`/`load_features`) in every mode; only
+  GaussianNB, which needs dense input, densifies the rows it fits or predicts on.
+
+The vectorizers are plain scikit-learn objects without custom callables, so the pickled
+`c1_BoW_Sentiment_Model.pkl` loads wherever scikit-learn is installed. Vectorize raw review
+texts with `vectorize_reviews`, which knows whether the vectorizer expects cleaned texts.
+`count_terms` tokenizes reviews the same way and also counts the tokens outside the
+vocabulary; `oov_rate` uses it to record the out-of-vocabulary rate of the training reviews
+on the vectorizer, as the baseline for drift monitoring.
+"""
+
+import itertools
+
+import numpy as np
+
+FEATURE_MODES = ("bow", "word_ngram", "char_ngram")
+DEFAULT_FEATURES = {
+    "mode": "bow",
+    "ngram_range": (1, 2),
+    "tfidf": True,
+    "sublinear_tf": True,
+    "min_df": 2,
+    "max_features": 5000,
+}
+# Letters only, like the cleaning in lib-ml; single letters carry no sentiment
+WORD_TOKEN_PATTERN = r"(?u)\b[a-zA-Z]{2,}\b"
+# Set on the lib-ml vectorizer, whose vocabulary consists of cleaned and stemmed terms
+LIB_ML_CLEANING = "lib-ml"
+OOV_BATCH_ROWS = 10000
+
+
+def feature_config(params):
+    """
+    Complete a `features` section of params.yaml with the defaults and validate it.
+
+    Args:
+        params (dict or None): The `features` section.
+
+    Returns:
+        dict: Feature configuration with every key of `DEFAULT_FEATURES`.
+
+    Raises:
+        ValueError: If the mode is unknown or the n-gram range is invalid.
+    """
+    config = {**DEFAULT_FEATURES, **(params or {})}
+    if config["mode"] not in FEATURE_MODES:
+        raise ValueError(f"Unknown feature mode {config['mode']!r}, expected one of {FEATURE_MODES}")
+    low, high = (int(n) for n in config["ngram_range"])
+    if not 1 <= low <= high:
+        raise ValueError(f"Invalid ngram_range {config['ngram_range']!r}")
+    config["ngram_range"] = (low, high)
+    return config
+
+
+def build_vectorizer(config):
+    """
+    Create the unfitted scikit-learn vectorizer for an n-gram feature configuration.
+
+    Args:
+        config (dict): Feature configuration from `feature_config`, mode "word_ngram" or "char_ngram".
+
+    Returns:
+        object: A `CountVectorizer`, or a `TfidfVectorizer` when `tfidf` is set.
+    """
+    from sklearn.feature_extraction.text import (  # pylint: disable=import-outside-toplevel
+        CountVectorizer, TfidfVectorizer)
+
+    options = {
+        "lowercase": True,
+        "strip_accents": "unicode",
+        "ngram_range": config["ngram_range"],
+        "min_df": config["min_df"],
+        "max_features": config["max_features"],
+        "dtype": np.float32,
+    }
+    if config["mode"] == "char_ngram":
+        options["analyzer"] = "char_wb"
+    else:
+        options["token_pattern"] = WORD_TOKEN_PATTERN
+    if config["tfidf"]:
+        return TfidfVectorizer(sublinear_tf=config["sublinear_tf"], **options)
+    return CountVectorizer(**options)
+
+
+def extract_features(reviews, config):
+    """
+    Fit an n-gram vectorizer on review texts and return the sparse feature matrix.
+
+    Args:
+        reviews (Iterable[str]): Raw review texts.
+        config (dict): Feature configuration from `feature_config`.
+
+    Returns:
+        tuple:
+            - X (scipy.sparse.csr_matrix): float32 features, one row per review.
+            - vectorizer (object): The fitted vectorizer.
+    """
+    vectorizer = build_vectorizer(config)
+    X = vectorizer.fit_transform(reviews)
+    return X.tocsr(), vectorizer
+
+
+def lib_ml_bag_of_words(messages):
+    """
+    Fit the lib-ml bag of words and mark the vectorizer as expecting lib-ml's cleaned texts.
+
+    Args:
+        messages (pd.DataFrame): Reviews with a "Review" column.
+
+    Returns:
+        tuple:
+            - X (np.ndarray): Unigram counts, one row per review.
+            - cv (CountVectorizer): The fitted vectorizer.
+    """
+    from libml import preprocessing as libml  # pylint: disable=import-outside-toplevel
+
+    X, cv = libml._preprocess(messages)  # pylint: disable=protected-access
+    cv.cleaned_by_ = LIB_ML_CLEANING
+    return X, cv
+
+
+def lib_ml_clean(reviews):
+    """
+    Clean raw review texts the way `libml._preprocess` cleans them before counting.
+
+    Args:
+        reviews (Iterable[str]): Raw review texts.
+
+    Returns:
+        list[str]: Cleaned texts, in the vocabulary of the lib-ml bag of words.
+    """
+    from libml import preprocessing as libml  # pylint: disable=import-outside-toplevel
+
+    return [libml._clean(review) for review in reviews]  # pylint: disable=protected-access
+
+
+def count_terms(vectorizer, reviews):
+    """
+    Count the vocabulary terms of raw review texts, and all the tokens they contain.
+
+    Each review is tokenized once, like `vectorize_reviews` does (after lib-ml's cleaning for
+    the lib-ml bag of words), so tokens outside the vocabulary, including terms pruned by
+    `min_df`/`max_features`, can be counted alongside the features.
+
+    Args:
+        vectorizer (object): The fitted vectorizer.
+        reviews (Iterable[str]): Raw review texts.
+
+    Returns:
+        tuple:
+            - counts (scipy.sparse.csr_matrix): Term counts in the vocabulary's columns.
+            - tokens (np.ndarray): Number of tokens of each review, in the vocabulary or not.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    import scipy.sparse as sp  # pylint: disable=import-outside-toplevel
+
+    reviews = [str(review) for review in reviews]
+    if getattr(vectorizer, "cleaned_by_", None) == LIB_ML_CLEANING:
+        reviews = lib_ml_clean(reviews)
+    analyzer = vectorizer.build_analyzer()
+    terms = [analyzer(review) for review in reviews]
+    tokens = np.fromiter(map(len, terms), dtype=np.int64, count=len(terms))
+    vocabulary = pd.Index(vectorizer.get_feature_names_out())
+    columns = vocabulary.get_indexer(list(itertools.chain.from_iterable(terms)))
+    rows = np.repeat(np.arange(len(terms)), tokens)
+    known = columns >= 0
+    counts = sp.csr_matrix(
+        (np.ones(known.sum(), dtype=vectorizer.dtype), (rows[known], columns[known])),
+        shape=(len(terms), len(vocabulary)),
+    )
+    return counts, tokens
+
+
+def weight_terms(vectorizer, counts):
+    """
+    Turn term counts from `count_terms` into the features `vectorize_reviews` returns.
+
+    Args:
+        vectorizer (object): The fitted vectorizer.
+        counts (scipy.sparse.csr_matrix): Term counts from `count_terms`.
+
+    Returns:
+        scipy.sparse.csr_matrix: Features, binarized and TF-IDF weighted like the vectorizer's.
+    """
+    from sklearn.feature_extraction.text import (  # pylint: disable=import-outside-toplevel
+        TfidfTransformer, TfidfVectorizer)
+
+    X = counts.astype(vectorizer.dtype)
+    if getattr(vectorizer, "binary", False):
+        X.data[:] = 1
+    if isinstance(vectorizer, TfidfVectorizer):
+        tfidf = TfidfTransformer(
+            norm=vectorizer.norm,
+            use_idf=vectorizer.use_idf,
+            smooth_idf=vectorizer.smooth_idf,
+            sublinear_tf=vectorizer.sublinear_tf,
+        )
+        if vectorizer.use_idf:
+            tfidf.idf_ = vectorizer.idf_
+        X = tfidf.transform(X, copy=False)
+    return X.tocsr()
+
+
+def oov_rate(vectorizer, reviews, batch_rows=OOV_BATCH_ROWS):
+    """
+    Share of the tokens of `reviews` that are not in the vocabulary of `vectorizer`.
+
+    Args:
+        vectorizer (object): The fitted vectorizer.
+        reviews (Sequence[str]): Raw review texts.
+        batch_rows (int, optional): Reviews tokenized at a time. Defaults to 10000.
+
+    Returns:
+        float: Out-of-vocabulary rate; 0 when the reviews have no tokens.
+    """
+    tokens = known = 0
+    for start in range(0, len(reviews), batch_rows):
+        counts, batch_tokens = count_terms(vectorizer, reviews[start : start + batch_rows])
+        tokens += int(batch_tokens.sum())
+        known += int(counts.sum())
+    return 1 - known / tokens if tokens else 0.0
+
+
+def vectorize_reviews(vectorizer, reviews):
+    """
+    Vectorize raw review texts the way the training reviews were vectorized.
+
+    The lib-ml bag of words was fitted on cleaned and stemmed texts, so reviews are cleaned
+    by lib-ml first; the n-gram vectorizers tokenize raw texts themselves.
+
+    Args:
+        vectorizer (object): The fitted vectorizer, e.g. loaded from `c1_BoW_Sentiment_Model.pkl`.
+        reviews (Iterable[str]): Raw review texts.
+
+    Returns:
+        scipy.sparse.csr_matrix: Features, one row per review.
+    """
+    if getattr(vectorizer, "cleaned_by_", None) == LIB_ML_CLEANING:
+        reviews = lib_ml_clean(reviews)
+    return vectorizer.transform(reviews).tocsr()
+
+
+def save_features(path, X):
+    """
+    Save a feature matrix as an uncompressed CSR `.npz` file.
+
+    Args:
+        path (str): Output path, ending in `.npz`.
+        X (scipy.sparse.spmatrix or np.ndarray): Feature matrix; dense input is converted to CSR.
+    """
+    import scipy.sparse as sp  # pylint: disable=import-outside-toplevel
+
+    sp.save_npz(path, sp.csr_matrix(X), compressed=False)
+
+
+def load_features(path):
+    """
+    Load a feature matrix saved by `save_features`.
+
+    Dense `.npy` features from older runs are still accepted and memory-mapped read-only.
+
+    Args:
+        path (str): Path of a `.npz` (CSR) or `.npy` (dense) file.
+
+    Returns:
+        scipy.sparse.csr_matrix or np.memmap: The features.
+    """
+    import scipy.sparse as sp  # pylint: disable=import-outside-toplevel
+
+    if str(path).endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    return sp.load_npz(path).tocsr()
+
+
+def feature_stats(X):
+    """
+    Size of a feature matrix in sparse and dense form.
+
+    Args:
+        X (scipy.sparse.spmatrix or np.ndarray): Feature matrix.
+
+    Returns:
+        dict: Number of features, stored values, CSR bytes and dense bytes.
+    """
+    rows, cols = X.shape
+    if hasattr(X, "nnz"):
+        X = X.tocsr()
+        nnz, sparse_bytes = X.nnz, X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    else:
+        nnz = int(np.count_nonzero(X))
+        sparse_bytes = nnz * (X.itemsize + 4) + (rows + 1) * 4
+    return {
+        "features": cols,
+        "nnz": nnz,
+        "csr_bytes": int(sparse_bytes),
+        "dense_bytes": int(rows * cols * X.dtype.itemsize),
+    }
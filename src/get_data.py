@@ -1,45 +1,308 @@
 """
 Download raw datasets and required NLTK corpora for sentiment analysis.
 
-- Downloads datasets from Google Drive.
-- Downloads necessary NLTK corpora (e.g., wordnet).
+- Downloads datasets from Google Drive (or any pluggable URL source) in parallel.
+- Resumes interrupted downloads instead of starting over.
+- Verifies SHA-256 checksums against an optional manifest and skips files that are already valid.
+- Resolves files from a local mirror or shared cache first, following the fetch policy.
+- Downloads necessary NLTK corpora (e.g., wordnet), verified against the same manifest
+  under `nltk_data/<resource>` like the dataset files.
 """
 
 import argparse
+import json
 import os
+import shutil
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
 
 import gdown
 import nltk
 
+from src.artifact_cache import (FETCH_POLICIES, ArtifactCache,
+                                configure_nltk_data, file_signature,
+                                nltk_data_dirs, resolve_dirs,
+                                resolve_fetch_policy, sha256_file, sha256_tree)
+from src.profiling import add_profile_argument, profile_run
+
+CHUNK_SIZE = 1024 * 1024
+STATE_FILE = ".checksums.json"
+NLTK_RESOURCE = "corpora/wordnet"
+NLTK_MANIFEST_KEY = f"nltk_data/{NLTK_RESOURCE}"
+
+DEFAULT_FILE_IDS = [
+    "1_SHjQJVxZdr_LW2aIHAiOSBPWWGWd7Bs",
+    "1-8lz8Kf6XjQdeOZ1Hew1ysxpGz6ZOEg6",
+]
+DEFAULT_OUTPUT_NAMES = [
+    "a1_RestaurantReviews_HistoricDump.tsv",
+    "a2_RestaurantReviews_FreshDump.tsv",
+]
+
+
+@dataclass
+class FetchOptions:
+    """
+    How dataset files are fetched and verified.
+
+    Attributes:
+        fetcher (callable, optional): `(file_id, output_path)` download function. Defaults to Google Drive.
+        manifest_path (str, optional): JSON manifest mapping file names to expected SHA-256 checksums.
+        update_manifest (bool): Write the verified checksums back to the manifest. Defaults to False.
+        max_workers (int): Number of concurrent downloads. Defaults to 4.
+        fetch_policy (str, optional): "offline", "cache-first" or "refresh". Defaults to the environment setting.
+        cache_dir (str, optional): Shared local cache directory. Defaults to the environment setting.
+        mirror_dir (str, optional): Read-only local mirror directory. Defaults to the environment setting.
+    """
+
+    fetcher: object = None
+    manifest_path: str = None
+    update_manifest: bool = False
+    max_workers: int = 4
+    fetch_policy: str = None
+    cache_dir: str = None
+    mirror_dir: str = None
+
+
+@dataclass
+class DatasetFile:
+    """
+    One dataset file to fetch.
+
+    Attributes:
+        file_id (str): Identifier passed to the fetcher (a Google Drive file ID by default).
+        output_path (str): Path where the file should end up.
+        expected_sha256 (str, optional): Checksum from the manifest. Defaults to None (no pinning).
+        state (dict, optional): Previously recorded size/mtime/sha256 of this file. Defaults to None.
+    """
+
+    file_id: str
+    output_path: str
+    expected_sha256: str = None
+    state: dict = None
+
 
 def download_from_drive(file_id, output_path):
     """
     Download a file from Google Drive given its file ID.
 
+    Partially downloaded files are resumed rather than fetched from zero.
+
     Args:
         file_id (str): The unique file ID on Google Drive.
         output_path (str): Path to save the downloaded file.
     """
     url = f"https://drive.google.com/uc?id={file_id}"
-    gdown.download(url, output_path, quiet=False)
+    gdown.download(url, output_path, quiet=False, resume=True)
+    return output_path
+
+
+def download_http(url, output_path, timeout=60):
+    """
+    Download a URL with HTTP range-based resume.
+
+    Data is streamed into `<output_path>.part`. If that file already exists, only the
+    missing bytes are requested; servers that ignore the Range header are handled by
+    starting over. The part file is moved into place once complete.
+
+    Args:
+        url (str): URL of the file.
+        output_path (str): Path to save the downloaded file.
+        timeout (float, optional): Socket timeout in seconds. Defaults to 60.
+
+    Returns:
+        str: The output path.
+    """
+    part_path = output_path + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    with urllib.request.urlopen(request, timeout=timeout) as response:  # nosec B310
+        mode = "ab" if offset and response.status == 206 else "wb"
+        with open(part_path, mode) as f:
+            shutil.copyfileobj(response, f, CHUNK_SIZE)
+    os.replace(part_path, output_path)
     return output_path
 
 
-def download_nltk_resources():
+def url_fetcher(url_template, timeout=60):
+    """
+    Build a fetcher that downloads files from a URL template over plain HTTP.
+
+    Use this to point the stage at a mirror or a local stand-in server instead of Google Drive.
+
+    Args:
+        url_template (str): URL containing a `{file_id}` placeholder.
+        timeout (float, optional): Socket timeout in seconds. Defaults to 60.
+
+    Returns:
+        callable: Fetcher with the same `(file_id, output_path)` signature as `download_from_drive`.
+    """
+
+    def fetch(file_id, output_path):
+        return download_http(url_template.format(file_id=file_id), output_path, timeout)
+
+    return fetch
+
+
+def _load_json(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, obj):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, sort_keys=True)
+
+
+def _cached_checksum(path, state):
     """
-    Ensure required NLTK corpora are downloaded.
+    Return the checksum of `path`, reusing the recorded one if the file is unchanged.
+
+    A file is considered unchanged when its size and modification time match the state
+    recorded after the last verification, which keeps warm re-runs from re-hashing.
+    """
+    signature = file_signature(path)
+    if state and {k: state.get(k) for k in signature} == signature:
+        return state["sha256"]
+    return sha256_file(path)
+
+
+def fetch_dataset(dataset, options=None, cache=None):
+    """
+    Ensure one dataset file is present and valid, downloading it only if needed.
+
+    Unless the policy is "refresh", a valid file already in place is kept, then the mirror and
+    cache are tried before the network. With the "offline" policy the network is never used.
+
+    Args:
+        dataset (DatasetFile): The file to fetch, with its expected checksum and recorded state.
+        options (FetchOptions, optional): Fetcher and fetch policy; a missing policy means
+            "cache-first". Defaults to `FetchOptions()`.
+        cache (ArtifactCache, optional): Mirror and cache to resolve from and store into. Defaults to None.
+
+    Returns:
+        tuple: (status, state) where status is "cached", "restored" or "downloaded" and state is the
+            new record, or None if the fetcher produced no file.
+
+    Raises:
+        ValueError: If the downloaded file does not match `expected_sha256`.
+        FileNotFoundError: If the policy is "offline" and no valid local copy exists.
     """
+    options = options or FetchOptions()
+    fetch_policy = options.fetch_policy or "cache-first"
+    output_path, expected_sha256 = dataset.output_path, dataset.expected_sha256
+    if os.path.exists(output_path):
+        if fetch_policy != "refresh":
+            checksum = _cached_checksum(output_path, dataset.state)
+            if expected_sha256 is None or checksum == expected_sha256:
+                return "cached", {"sha256": checksum, **file_signature(output_path)}
+        os.remove(output_path)  # Stale or corrupt copy, or refresh requested
+
+    name = os.path.basename(output_path)
+    if cache is not None and fetch_policy != "refresh":
+        found = cache.find(name, expected_sha256)
+        if found is not None:
+            source_path, checksum, _ = found
+            cache.materialize(source_path, output_path)
+            return "restored", {"sha256": checksum, **file_signature(output_path)}
+    if fetch_policy == "offline":
+        raise FileNotFoundError(
+            f"{name} is not in the local mirror or cache and the fetch policy is offline"
+        )
+
+    fetch = options.fetcher or download_from_drive
+    fetch(dataset.file_id, output_path)
+    if not os.path.exists(output_path):
+        return "downloaded", None
+    checksum = sha256_file(output_path)
+    if expected_sha256 is not None and checksum != expected_sha256:
+        os.remove(output_path)
+        raise ValueError(
+            f"Checksum mismatch for {output_path}: expected {expected_sha256}, got {checksum}"
+        )
+    if cache is not None:
+        cache.store(name, output_path, checksum)
+    return "downloaded", {"sha256": checksum, **file_signature(output_path)}
+
+
+def _nltk_resource_path():
+    """Path of the installed corpus: its zip file, or its directory when unzipped."""
+    pointer = nltk.data.find(NLTK_RESOURCE)
+    return pointer.zipfile.filename if hasattr(pointer, "zipfile") else pointer.path
+
+
+def _nltk_resource_state(state):
+    """Checksum record of the installed corpus, or None if NLTK cannot find it."""
     try:
-        nltk.data.find("corpora/wordnet")
-        return False  # Already present
+        path = _nltk_resource_path()
     except LookupError:
-        nltk.download("wordnet")
-        return True
+        return None
+    signature = file_signature(path)
+    if state and {k: state.get(k) for k in signature} == signature:
+        return {"sha256": state["sha256"], **signature}
+    return {"sha256": sha256_tree(path), **signature}
+
 
+def download_nltk_resources(fetch_policy=None, cache_dir=None, mirror_dir=None, expected_sha256=None, state=None):
+    """
+    Ensure required NLTK corpora are downloaded and match their checksum.
+
+    Corpora in the mirror or cache NLTK data directories are used without any network access.
+    When a cache is configured, new downloads go into it so other workers can reuse them.
+    As for dataset files, an installed corpus that does not match `expected_sha256` is
+    downloaded again and a download that does not match is rejected.
+
+    Args:
+        fetch_policy (str, optional): "offline", "cache-first" or "refresh". Defaults to the environment setting.
+        cache_dir (str, optional): Local cache directory. Defaults to the environment setting.
+        mirror_dir (str, optional): Read-only mirror directory. Defaults to the environment setting.
+        expected_sha256 (str, optional): Checksum of the corpus zip file, or `sha256_tree` of its
+            directory when unzipped. Defaults to None (no pinning).
+        state (dict, optional): Previously recorded size/mtime/sha256 of the corpus. Defaults to None.
+
+    Returns:
+        tuple: (downloaded, state) where downloaded tells whether the corpus was downloaded and
+            state is the new record, or None if NLTK cannot find the corpus after downloading.
 
-def run_get_data(output_dir="datasets", file_ids=None, output_names=None):
+    Raises:
+        LookupError: If the policy is "offline" and no matching corpus is available locally.
+        ValueError: If the downloaded corpus does not match `expected_sha256`.
     """
-    Download datasets from Google Drive and ensure required NLTK corpora are available.
+    fetch_policy = resolve_fetch_policy(fetch_policy)
+    configure_nltk_data(cache_dir, mirror_dir)
+    if fetch_policy != "refresh":
+        record = _nltk_resource_state(state)
+        if record is not None and expected_sha256 in (None, record["sha256"]):
+            return False, record  # Already present and valid
+        if fetch_policy == "offline":
+            raise LookupError(
+                "NLTK wordnet corpus with the expected checksum not found locally and the fetch policy "
+                "is offline; add it to <mirror_dir>/nltk_data"
+            )
+    cache_dir, _ = resolve_dirs(cache_dir, mirror_dir)
+    download_dir = nltk_data_dirs(cache_dir)[-1] if cache_dir else None
+    nltk.download("wordnet", download_dir=download_dir, force=True)
+    record = _nltk_resource_state(None)
+    if record is not None and expected_sha256 not in (None, record["sha256"]):
+        raise ValueError(
+            f"Checksum mismatch for NLTK {NLTK_RESOURCE}: expected {expected_sha256}, got {record['sha256']}"
+        )
+    return True, record
+
+
+def run_get_data(output_dir="datasets", file_ids=None, output_names=None, options=None):
+    """
+    Download datasets and ensure required NLTK corpora are available.
+
+    Files are fetched concurrently. Files that are already present and match the manifest
+    (or the checksums recorded by the previous run) are skipped.
 
     If `file_ids` and `output_names` are not provided, defaults are used
     corresponding to project-specific datasets for sentiment analysis.
@@ -48,31 +311,63 @@ def run_get_data(output_dir="datasets", file_ids=None, output_names=None):
         output_dir (str, optional): Directory to save downloaded datasets. Defaults to "datasets".
         file_ids (list[str], optional): List of Google Drive file IDs to download. Defaults to None.
         output_names (list[str], optional): Corresponding filenames to save downloaded files. Defaults to None.
+        options (FetchOptions, optional): Fetcher, manifest, concurrency, fetch policy and
+            mirror/cache directories. Defaults to `FetchOptions()`.
 
     Returns:
         dict: A summary dictionary with keys:
             - 'downloaded' (list[str]): List of paths to downloaded files.
+            - 'cached' (list[str]): List of paths that were already present and valid.
+            - 'restored' (list[str]): List of paths taken from the local mirror or cache.
+            - 'checksums' (dict): SHA-256 checksum per file name, and of the NLTK corpus under
+              `nltk_data/corpora/wordnet`.
             - 'nltk_downloaded' (bool): Whether the NLTK 'wordnet' corpus was downloaded.
     """
     os.makedirs(output_dir, exist_ok=True)
     # Defaults for DVC pipeline
     if file_ids is None:
-        file_ids = [
-            "1_SHjQJVxZdr_LW2aIHAiOSBPWWGWd7Bs",
-            "1-8lz8Kf6XjQdeOZ1Hew1ysxpGz6ZOEg6",
-        ]
+        file_ids = DEFAULT_FILE_IDS
     if output_names is None:
-        output_names = [
-            "a1_RestaurantReviews_HistoricDump.tsv",
-            "a2_RestaurantReviews_FreshDump.tsv",
-        ]
-    downloaded = []
-    for file_id, name in zip(file_ids, output_names):
-        out_path = os.path.join(output_dir, name)
-        download_from_drive(file_id, out_path)
-        downloaded.append(out_path)
-    nltk_downloaded = download_nltk_resources()
-    return {"downloaded": downloaded, "nltk_downloaded": nltk_downloaded}
+        output_names = DEFAULT_OUTPUT_NAMES
+
+    options = options or FetchOptions()
+    cache_dir, mirror_dir = resolve_dirs(options.cache_dir, options.mirror_dir)
+    options = replace(
+        options, fetch_policy=resolve_fetch_policy(options.fetch_policy), cache_dir=cache_dir, mirror_dir=mirror_dir
+    )
+    cache = ArtifactCache(cache_dir, mirror_dir) if cache_dir or mirror_dir else None
+    manifest = _load_json(options.manifest_path)
+    state_path = os.path.join(output_dir, STATE_FILE)
+    state = _load_json(state_path)
+
+    def fetch(entry):
+        file_id, name = entry
+        dataset = DatasetFile(file_id, os.path.join(output_dir, name), manifest.get(name), state.get(name))
+        with cache.lock(name) if cache else nullcontext():
+            return fetch_dataset(dataset, options, cache)
+
+    entries = list(zip(file_ids, output_names))
+    with ThreadPoolExecutor(max_workers=max(1, min(options.max_workers, len(entries) or 1))) as pool:
+        results = list(pool.map(fetch, entries))
+
+    summary = {"downloaded": [], "cached": [], "restored": [], "checksums": {}}
+    for (_, name), (status, record) in zip(entries, results):
+        summary[status].append(os.path.join(output_dir, name))
+        if record is not None:
+            state[name] = record
+            summary["checksums"][name] = record["sha256"]
+
+    summary["nltk_downloaded"], record = download_nltk_resources(
+        options.fetch_policy, cache_dir, mirror_dir, manifest.get(NLTK_MANIFEST_KEY), state.get(NLTK_MANIFEST_KEY)
+    )
+    if record is not None:
+        state[NLTK_MANIFEST_KEY] = record
+        summary["checksums"][NLTK_MANIFEST_KEY] = record["sha256"]
+    if summary["checksums"]:
+        _save_json(state_path, state)
+    if options.manifest_path and options.update_manifest:
+        _save_json(options.manifest_path, {**manifest, **summary["checksums"]})
+    return summary
 
 
 def main():
@@ -88,9 +383,64 @@ def main():
         default="datasets",
         help="Directory to save downloaded files.",
     )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=None,
+        help="JSON file mapping dataset file names to expected SHA-256 checksums.",
+    )
+    parser.add_argument(
+        "--update_manifest",
+        action="store_true",
+        help="Record the checksums of the downloaded files in --manifest.",
+    )
+    parser.add_argument(
+        "--url_template",
+        type=str,
+        default=None,
+        help="Download from this URL (with a {file_id} placeholder) instead of Google Drive.",
+    )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=4,
+        help="Number of concurrent downloads.",
+    )
+    parser.add_argument(
+        "--fetch_policy",
+        choices=FETCH_POLICIES,
+        default=None,
+        help="offline: local mirror/cache only; cache-first (default): network only for missing files; "
+        "refresh: always re-download. Also set by $PIPELINE_FETCH_POLICY.",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Shared local cache for datasets and NLTK corpora. Also set by $PIPELINE_CACHE_DIR.",
+    )
+    parser.add_argument(
+        "--mirror_dir",
+        type=str,
+        default=None,
+        help="Read-only local mirror of datasets and NLTK corpora. Also set by $PIPELINE_MIRROR_DIR.",
+    )
+    add_profile_argument(parser)
     args = parser.parse_args()
-    summary = run_get_data(output_dir=args.output_dir)
+    options = FetchOptions(
+        fetcher=url_fetcher(args.url_template) if args.url_template else None,
+        manifest_path=args.manifest,
+        update_manifest=args.update_manifest,
+        max_workers=args.max_workers,
+        fetch_policy=args.fetch_policy,
+        cache_dir=args.cache_dir,
+        mirror_dir=args.mirror_dir,
+    )
+    with profile_run("get_data", args.profile):
+        summary = run_get_data(output_dir=args.output_dir, options=options)
     print("Downloaded:", summary["downloaded"])
+    print("Already present and valid:", summary["cached"])
+    print("Restored from mirror/cache:", summary["restored"])
     print("NLTK wordnet downloaded:", summary["nltk_downloaded"])
 
 
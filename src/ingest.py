@@ -0,0 +1,177 @@
+"""
+Ingestion stage converting the raw TSV dumps into columnar Parquet files.
+
+- Parses each TSV once, in chunks, with the same settings as the preprocessing stage.
+- Writes typed, zstd-compressed Parquet so later loads skip CSV parsing entirely. The
+  column types are declared up front (`COLUMN_TYPES`, strings for unknown columns)
+  rather than inferred per chunk, so a later chunk with missing labels or an all-null
+  first chunk cannot change them, and a TSV without rows still gets a typed file.
+- Provides `load_reviews`, used by every consumer, which memory-maps Parquet files and
+  reads only the requested columns (and still accepts TSV paths), and `iter_chunks` for
+  consumers that stream a dataset.
+
+Expected to run between `get_data` and `preprocess` in the DVC pipeline. pandas and pyarrow
+are imported inside the functions, so importing this module stays cheap.
+"""
+
+import argparse
+import os
+
+from src.profiling import add_profile_argument, profile_run
+
+DEFAULT_DATASETS = [
+    "a1_RestaurantReviews_HistoricDump.tsv",
+    "a2_RestaurantReviews_FreshDump.tsv",
+]
+CHUNK_ROWS = 500_000
+COMPRESSION = "zstd"
+STREAM_ROWS = 100_000
+# Arrow types of the known columns; integers are nullable, other columns are kept as strings
+COLUMN_TYPES = {"Review": "string", "Liked": "int64"}
+PANDAS_DTYPES = {"string": "object", "int64": "Int64"}
+
+
+def parquet_path_for(tsv_path, output_dir):
+    """
+    Return the Parquet path that `tsv_path` is converted to.
+
+    Args:
+        tsv_path (str): Path of the raw TSV file.
+        output_dir (str): Directory holding the Parquet files.
+
+    Returns:
+        str: Path of the matching `.parquet` file.
+    """
+    name = os.path.splitext(os.path.basename(tsv_path))[0]
+    return os.path.join(output_dir, f"{name}.parquet")
+
+
+def _column_types(tsv_path):
+    """Declared type of every column in the header of `tsv_path`."""
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    try:
+        header = pd.read_csv(tsv_path, delimiter="\t", quoting=3, nrows=0).columns
+    except pd.errors.EmptyDataError as e:
+        raise ValueError(f"{tsv_path} is empty: expected at least a header row") from e
+    return {str(column): COLUMN_TYPES.get(str(column), "string") for column in header}
+
+
+def convert_tsv_to_parquet(tsv_path, parquet_path, chunk_rows=CHUNK_ROWS):
+    """
+    Convert a TSV dump to a compressed Parquet file without loading it all at once.
+
+    A TSV with only a header row gives a Parquet file with the same columns and no rows.
+
+    Args:
+        tsv_path (str): Path of the raw TSV file.
+        parquet_path (str): Path of the Parquet file to write.
+        chunk_rows (int, optional): Rows parsed per chunk (one row group each). Defaults to 500000.
+
+    Returns:
+        int: Number of rows written.
+
+    Raises:
+        ValueError: If the TSV has no header row, or a value does not fit its column type.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    types = _column_types(tsv_path)
+    schema = pa.schema([pa.field(column, pa.type_for_alias(name)) for column, name in types.items()])
+    dtypes = {column: PANDAS_DTYPES[name] for column, name in types.items()}
+    os.makedirs(os.path.dirname(parquet_path) or ".", exist_ok=True)
+    tmp_path = parquet_path + ".tmp"
+    rows = 0
+    with pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION) as writer:
+        for chunk in pd.read_csv(tsv_path, delimiter="\t", quoting=3, dtype=dtypes, chunksize=chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    os.replace(tmp_path, parquet_path)
+    return rows
+
+
+def load_reviews(path, columns=None):
+    """
+    Load a review dataset as a DataFrame.
+
+    Parquet files are memory-mapped and only `columns` are read; TSV files are parsed the
+    same way the pipeline always has, so callers work with either format.
+
+    Args:
+        path (str): Path of a `.parquet` or `.tsv` dataset.
+        columns (list[str], optional): Columns to load. Defaults to None (all columns).
+
+    Returns:
+        pd.DataFrame: The dataset.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    return pd.read_csv(path, delimiter="\t", quoting=3, usecols=columns)
+
+
+def iter_chunks(path, columns=None, chunk_rows=STREAM_ROWS):
+    """
+    Stream a Parquet or TSV dataset as DataFrame chunks.
+
+    Args:
+        path (str): Path of a `.parquet` or `.tsv` dataset.
+        columns (list[str], optional): Columns to read. Defaults to None (all columns).
+        chunk_rows (int, optional): Maximum rows per chunk. Defaults to 100000.
+
+    Yields:
+        pd.DataFrame: The next chunk.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path, delimiter="\t", quoting=3, usecols=columns, chunksize=chunk_rows
+        )
+
+
+def run_ingest(input_dir="datasets", output_dir=os.path.join("data", "raw"), names=None):
+    """
+    Convert every raw TSV dataset into Parquet.
+
+    Args:
+        input_dir (str, optional): Directory with the downloaded TSV files. Defaults to "datasets".
+        output_dir (str, optional): Directory for the Parquet files. Defaults to "data/raw".
+        names (list[str], optional): TSV file names to convert. Defaults to the project datasets.
+
+    Returns:
+        dict: Mapping of Parquet path to number of rows written.
+    """
+    written = {}
+    for name in names or DEFAULT_DATASETS:
+        tsv_path = os.path.join(input_dir, name)
+        parquet_path = parquet_path_for(tsv_path, output_dir)
+        written[parquet_path] = convert_tsv_to_parquet(tsv_path, parquet_path)
+    return written
+
+
+def main():
+    """
+    Main function to convert the raw datasets into Parquet.
+    """
+    parser = argparse.ArgumentParser(description="Convert raw TSV datasets to Parquet.")
+    parser.add_argument("--input_dir", type=str, default="datasets")
+    parser.add_argument("--output_dir", type=str, default=os.path.join("data", "raw"))
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    with profile_run("ingest", args.profile):
+        written = run_ingest(args.input_dir, args.output_dir)
+    for path, rows in written.items():
+        print(f"Wrote {rows} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
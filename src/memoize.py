@@ -0,0 +1,393 @@
+"""
+Content-addressed memoization of pipeline functions outside DVC.
+
+- Keys each call on the function's qualified name, content hashes of its array arguments,
+  config dicts and other values, the contents of the files it reads, the source of the
+  module defining the function and of the modules it declares as dependencies, and the
+  versions of the libraries doing the work, so a repeated call with identical inputs and
+  code returns the stored result.
+- Read-only memory-mapped arrays are keyed on their file's path, size and modification
+  time instead of their bytes, so building the key does not read the whole file. Sparse
+  matrices are hashed by their index and data arrays.
+- Stores results on disk, NumPy arrays as `.npy` files that are memory-mapped on retrieval
+  and everything else with joblib, one directory per call written atomically.
+- Keeps the cache within a size budget by evicting the least recently used entries, and
+  drops entries not used for longer than a maximum age.
+
+Memoization is off unless a cache directory is configured, either with the
+`PIPELINE_MEMO_DIR` environment variable (`PIPELINE_MEMO_MAX_BYTES` and
+`PIPELINE_MEMO_MAX_AGE` set the limits) or with `use_memo_cache` in notebooks and tests.
+"""
+
+import functools
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+MEMO_DIR_ENV_VAR = "PIPELINE_MEMO_DIR"
+MAX_BYTES_ENV_VAR = "PIPELINE_MEMO_MAX_BYTES"
+MAX_AGE_ENV_VAR = "PIPELINE_MEMO_MAX_AGE"
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+DEFAULT_MAX_AGE_S = 30 * 24 * 3600
+META_FILE = "meta.json"
+
+_ACTIVE_CACHE = None
+_source_hashes = {}
+
+
+def _file_backed(value):
+    """Whether `value` is a read-only memory map of a whole array file, not a slice of one."""
+    if not isinstance(value, np.memmap) or value.mode != "r" or not value.filename:
+        return False
+    try:
+        size = os.path.getsize(value.filename)
+    except OSError:
+        return False
+    # Slices keep the file name and offset of their parent, but cover fewer bytes
+    return value.flags.c_contiguous and value.offset + value.nbytes == size
+
+
+def _update_hash(digest, value):
+    """Feed a canonical byte representation of `value` into `digest`."""
+    if _file_backed(value):
+        stat = os.stat(value.filename)
+        digest.update(f"memmap:{value.dtype.str}:{value.shape}:{os.path.abspath(value.filename)}:".encode())
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns};".encode())
+    elif hasattr(value, "tocsr") and hasattr(value, "nnz"):  # scipy.sparse matrix
+        csr = value.tocsr()
+        digest.update(f"sparse:{csr.dtype.str}:{csr.shape}:".encode())
+        for part in (csr.indptr, csr.indices, csr.data):
+            _update_hash(digest, part)
+    elif isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}:".encode())
+        digest.update(np.ascontiguousarray(value).view(np.uint8).data)
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}:".encode())
+        for key in sorted(value, key=repr):
+            _update_hash(digest, key)
+            _update_hash(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)}:".encode())
+        for item in value:
+            _update_hash(digest, item)
+    elif value is None or isinstance(value, (str, bytes, bool, int, float, np.generic)):
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+    else:  # Fitted models and other objects: hash their pickled state
+        digest.update(f"object:{type(value).__qualname__}:".encode())
+        digest.update(pickle.dumps(value, protocol=4))
+
+
+def content_hash(value):
+    """
+    Hash a value by content: arrays by dtype, shape and bytes, containers recursively.
+
+    Read-only memory maps of a whole `.npy` file are hashed by the file's path, size and
+    modification time, so the file is not read.
+
+    Args:
+        value (object): Array, sparse matrix, dict, list, tuple, scalar or picklable object.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    _update_hash(digest, value)
+    return digest.hexdigest()
+
+
+def _module_source_path(module):
+    """Source file of a module, looked up without importing it if it is not loaded yet."""
+    if module in sys.modules:
+        return inspect.getfile(sys.modules[module])
+    spec = importlib.util.find_spec(module)
+    if spec is None or spec.origin is None:
+        raise KeyError(module)
+    return spec.origin
+
+
+def _source_hash(module):
+    """SHA-256 of a module's source file, or its name if the source is not available."""
+    if module not in _source_hashes:
+        try:
+            with open(_module_source_path(module), "rb") as f:
+                _source_hashes[module] = hashlib.sha256(f.read()).hexdigest()
+        except (KeyError, ImportError, OSError, TypeError):
+            _source_hashes[module] = module
+    return _source_hashes[module]
+
+
+def code_version(func, modules=()):
+    """
+    Hash the source of the module defining `func` and of `modules`, so edits to them invalidate results.
+
+    Args:
+        func (callable): The memoized function.
+        modules (tuple[str], optional): Other modules whose code `func` runs, e.g. "src.features".
+            Defaults to ().
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    return content_hash({module: _source_hash(module) for module in (func.__module__, *modules)})
+
+
+@functools.lru_cache(maxsize=None)
+def package_versions(packages):
+    """
+    Installed versions of the given distributions, part of the cache key.
+
+    Looked up once per tuple of names and only when a memoized call needs a key, since
+    `importlib.metadata` scans the installed distributions.
+
+    Args:
+        packages (tuple[str]): Distribution names, e.g. "scikit-learn".
+
+    Returns:
+        dict: Name -> version, or None for distributions that are not installed.
+    """
+    from importlib import metadata  # pylint: disable=import-outside-toplevel
+
+    versions = {}
+    for package in packages:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def _dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files
+    )
+
+
+class MemoCache:
+    """
+    On-disk store of memoized results with LRU and age-based eviction.
+
+    Args:
+        cache_dir (str): Directory holding one sub-directory per stored call.
+        max_bytes (int, optional): Total size to keep the cache under. Defaults to 2 GiB.
+        max_age_s (float, optional): Entries unused for longer are evicted. Defaults to 30 days.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_age_s=DEFAULT_MAX_AGE_S):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """
+        Load a stored result, memory-mapping its arrays copy-on-write.
+
+        Args:
+            key (str): Cache key of the call.
+
+        Returns:
+            tuple: (found, result); `result` is None when `found` is False.
+        """
+        entry = self._entry_path(key)
+        meta_path = os.path.join(entry, META_FILE)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            parts = [self._load_part(entry, i, kind) for i, kind in enumerate(meta["parts"])]
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return False, None
+        os.utime(meta_path)  # The meta file's mtime records the last access for LRU eviction
+        self.hits += 1
+        return True, tuple(parts) if meta["tuple"] else parts[0]
+
+    @staticmethod
+    def _load_part(entry, index, kind):
+        if kind == "npy":
+            return np.load(os.path.join(entry, f"{index}.npy"), mmap_mode="c", allow_pickle=False)
+        import joblib  # pylint: disable=import-outside-toplevel
+
+        return joblib.load(os.path.join(entry, f"{index}.pkl"))
+
+    def put(self, key, result, stage=None):
+        """
+        Store a result atomically, then evict entries beyond the size and age limits.
+
+        Args:
+            key (str): Cache key of the call.
+            result (object): Return value; the elements of a tuple are stored separately.
+            stage (str, optional): Name recorded in the entry's metadata. Defaults to None.
+        """
+        import joblib  # pylint: disable=import-outside-toplevel
+
+        entry = self._entry_path(key)
+        tmp_entry = f"{entry}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry)
+        is_tuple = isinstance(result, tuple)
+        kinds = []
+        for i, part in enumerate(result if is_tuple else (result,)):
+            if isinstance(part, np.ndarray) and not part.dtype.hasobject:
+                np.save(os.path.join(tmp_entry, f"{i}.npy"), part, allow_pickle=False)
+                kinds.append("npy")
+            else:
+                joblib.dump(part, os.path.join(tmp_entry, f"{i}.pkl"))
+                kinds.append("pkl")
+        meta = {"stage": stage, "created": time.time(), "tuple": is_tuple, "parts": kinds}
+        with open(os.path.join(tmp_entry, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:  # Another process stored the same result first
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """
+        List the stored entries.
+
+        Returns:
+            list[dict]: `key`, `path`, `last_access` and `size` of each entry, oldest access first.
+        """
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            path = self._entry_path(key)
+            meta_path = os.path.join(path, META_FILE)
+            if key.endswith(".tmp") or not os.path.exists(meta_path):
+                continue
+            entries.append(
+                {"key": key, "path": path, "last_access": os.path.getmtime(meta_path), "size": _dir_size(path)}
+            )
+        return sorted(entries, key=lambda entry: entry["last_access"])
+
+    def evict(self):
+        """
+        Remove entries older than `max_age_s`, then the least recently used until under `max_bytes`.
+
+        Returns:
+            list[str]: Keys of the removed entries.
+        """
+        entries = self.entries()
+        now = time.time()
+        total = sum(entry["size"] for entry in entries)
+        removed = []
+        for entry in entries:
+            expired = self.max_age_s is not None and now - entry["last_access"] > self.max_age_s
+            if not expired and (self.max_bytes is None or total <= self.max_bytes):
+                continue
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            total -= entry["size"]
+            removed.append(entry["key"])
+        return removed
+
+    def clear(self):
+        """Remove every entry."""
+        for entry in self.entries():
+            shutil.rmtree(entry["path"], ignore_errors=True)
+
+
+def active_cache():
+    """
+    The memo cache in use: the one set by `use_memo_cache`, else one configured from the environment.
+
+    Returns:
+        MemoCache or None: None when memoization is off.
+    """
+    global _ACTIVE_CACHE  # pylint: disable=global-statement
+    cache_dir = os.environ.get(MEMO_DIR_ENV_VAR)
+    if _ACTIVE_CACHE is None and cache_dir:
+        _ACTIVE_CACHE = MemoCache(
+            cache_dir,
+            int(os.environ.get(MAX_BYTES_ENV_VAR, DEFAULT_MAX_BYTES)),
+            float(os.environ.get(MAX_AGE_ENV_VAR, DEFAULT_MAX_AGE_S)),
+        )
+    return _ACTIVE_CACHE
+
+
+@contextmanager
+def use_memo_cache(cache):
+    """
+    Memoize pipeline functions with `cache` inside the block.
+
+    Args:
+        cache (MemoCache or str): The cache, or a directory to open one in.
+
+    Yields:
+        MemoCache: The cache in use.
+    """
+    global _ACTIVE_CACHE  # pylint: disable=global-statement
+    if isinstance(cache, str):
+        cache = MemoCache(cache)
+    saved = _ACTIVE_CACHE
+    _ACTIVE_CACHE = cache
+    try:
+        yield cache
+    finally:
+        _ACTIVE_CACHE = saved
+
+
+def memoize(stage, files=(), packages=(), modules=()):
+    """
+    Decorator memoizing a pipeline function in the active memo cache.
+
+    Args:
+        stage (str): Name of the stage, recorded in the entry's metadata.
+        files (tuple[str], optional): Parameters holding paths of input files; their contents
+            are hashed instead of the path. Defaults to ().
+        packages (tuple[str], optional): Distributions whose versions invalidate results. Defaults to ().
+        modules (tuple[str], optional): Modules besides the function's own whose code it runs;
+            edits to their source invalidate results. Defaults to ().
+
+    Returns:
+        callable: The decorator.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        packages_key, modules_key = tuple(packages), tuple(modules)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = active_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            from src.artifact_cache import sha256_file  # pylint: disable=import-outside-toplevel
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            inputs = {
+                name: sha256_file(value) if name in files and os.path.isfile(value) else value
+                for name, value in bound.arguments.items()
+            }
+            key = content_hash(
+                {
+                    "function": f"{func.__module__}.{func.__qualname__}",
+                    "code": code_version(func, modules_key),
+                    "packages": package_versions(packages_key),
+                    "inputs": inputs,
+                }
+            )
+            found, result = cache.get(key)
+            if not found:
+                result = func(*args, **kwargs)
+                cache.put(key, result, stage)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,308 @@
+"""
+Memory instrumentation for the sentiment analysis pipeline stages.
+
+- Records peak and incremental Python/NumPy allocations per stage with tracemalloc.
+- Samples process RSS in a background thread to capture the stage high-water mark.
+- Saves a per-stage memory report as JSON so DVC can track it like any other metric.
+- In "rss" mode only the RSS sampler runs, so the stage can be timed in the same process:
+  tracemalloc hooks every allocation and would inflate the recorded durations.
+
+Stages are marked with the `track_memory` context manager or the `memory_stage`
+decorator. Both are no-ops unless a `MemoryTracker` is active, so library code
+can be instrumented without paying for tracing in normal use.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Optional
+
+MB = 1024 * 1024
+STATM_PATH = "/proc/self/statm"
+MEMORY_MODES = ("full", "rss")
+
+_ACTIVE_TRACKER = None
+_NULL_CONTEXT = nullcontext()
+_SNAPSHOT_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+def peak_rss_mb():
+    """
+    Return the process-lifetime RSS high-water mark reported by the OS.
+
+    Returns:
+        float or None: Peak resident set size in MB, or None if unavailable on this platform.
+    """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:  # Windows has no `resource` module
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb():
+    """
+    Return the current resident set size of this process.
+
+    Reads `STATM_PATH` where available and falls back to the high-water mark.
+
+    Returns:
+        float or None: Current RSS in MB, or None if it cannot be determined.
+    """
+    try:
+        with open(STATM_PATH, "r", encoding="utf-8") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_mb()
+
+
+def _take_snapshot():
+    """Take a tracemalloc snapshot without tracemalloc's own bookkeeping."""
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+@dataclass
+class _StageRecord:
+    """Bookkeeping for a stage that is currently being tracked."""
+
+    name: str
+    traced_before: int
+    rss_before: float
+    snapshot: Optional[tracemalloc.Snapshot]
+    traced_peak: int = field(init=False)
+    rss_peak: float = field(init=False)
+    started: float = field(default_factory=time.perf_counter)
+
+    def __post_init__(self):
+        self.traced_peak = self.traced_before
+        self.rss_peak = self.rss_before
+
+
+class _RssSampler(threading.Thread):
+    """Daemon thread calling `callback` with the current RSS every `interval` seconds until stopped."""
+
+    def __init__(self, interval, callback):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.callback = callback
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is None:
+                return
+            self.callback(rss)
+
+    def stop(self):
+        """Stop sampling and wait for the thread to exit."""
+        self._stop_event.set()
+        self.join()
+
+
+class MemoryTracker:
+    """
+    Collect per-stage memory statistics using tracemalloc and RSS sampling.
+
+    Nested stages are supported: an outer stage's peak always includes the
+    peaks of the stages it contains.
+
+    Args:
+        sample_interval (float, optional): Seconds between RSS samples. Defaults to 0.005.
+        top_n (int, optional): Number of top allocation sites to keep per stage. Defaults to 5.
+        trace_allocations (bool, optional): Trace allocations with tracemalloc. When False only
+            the RSS fields are reported. Defaults to True.
+    """
+
+    def __init__(self, sample_interval=0.005, top_n=5, trace_allocations=True):
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        self.stages = {}
+        self._stack = []
+        self._lock = threading.Lock()
+        self._sampler = None
+        # "off" (RSS only), "on", or "owned" while tracemalloc runs because this tracker started it
+        self._tracemalloc = "on" if trace_allocations else "off"
+
+    @property
+    def trace_allocations(self):
+        """bool: Whether allocations are traced with tracemalloc."""
+        return self._tracemalloc != "off"
+
+    def start(self):
+        """Start tracemalloc (if tracing allocations and not already tracing) and the RSS sampler thread."""
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc = "owned"
+        self._sampler = _RssSampler(self.sample_interval, self._record_rss)
+        self._sampler.start()
+
+    def stop(self):
+        """Stop the RSS sampler and tracemalloc if this tracker started it."""
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+        if self._tracemalloc == "owned":
+            tracemalloc.stop()
+            self._tracemalloc = "on"
+
+    def _record_rss(self, rss):
+        with self._lock:
+            for record in self._stack:
+                record.rss_peak = max(record.rss_peak, rss)
+
+    def _fold_traced_peak(self):
+        """Propagate the current tracemalloc peak into every open stage and reset it."""
+        if not self.trace_allocations:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        for record in self._stack:
+            record.traced_peak = max(record.traced_peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def track(self, stage):
+        """
+        Track memory usage of the enclosed block under the given stage name.
+
+        Args:
+            stage (str): Name of the pipeline stage, used as the key in the report.
+        """
+        with self._lock:
+            self._fold_traced_peak()
+            traced_before, _ = tracemalloc.get_traced_memory()
+            rss_before = current_rss_mb() or 0.0
+            snapshot = _take_snapshot() if self.trace_allocations else None
+            record = _StageRecord(stage, traced_before, rss_before, snapshot)
+            self._stack.append(record)
+        try:
+            yield record
+        finally:
+            with self._lock:
+                self._fold_traced_peak()
+                self._stack.pop()
+                rss_after = current_rss_mb() or 0.0
+                record.rss_peak = max(record.rss_peak, rss_after)
+                self.stages[stage] = self._summarize(record, rss_after)
+
+    def _summarize(self, record, rss_after):
+        high_water = peak_rss_mb()
+        summary = {
+            "duration_s": round(time.perf_counter() - record.started, 6),
+            "rss_start_mb": round(record.rss_before, 2),
+            "rss_peak_mb": round(record.rss_peak, 2),
+            "rss_delta_mb": round(rss_after - record.rss_before, 2),
+            "rss_high_water_mb": round(high_water, 2) if high_water else None,
+        }
+        if record.snapshot is None:
+            return summary
+        traced_after, _ = tracemalloc.get_traced_memory()
+        diff = _take_snapshot().compare_to(record.snapshot, "lineno")
+        summary["tracemalloc_peak_mb"] = round((record.traced_peak - record.traced_before) / MB, 4)
+        summary["tracemalloc_delta_mb"] = round((traced_after - record.traced_before) / MB, 4)
+        summary["top_allocations"] = [
+            {
+                "location": str(stat.traceback[0]),
+                "size_diff_mb": round(stat.size_diff / MB, 4),
+                "count_diff": stat.count_diff,
+            }
+            for stat in diff[: self.top_n]
+        ]
+        return summary
+
+    def save(self, output_path):
+        """
+        Save the collected per-stage report to a JSON file.
+
+        Args:
+            output_path (str): Path where the memory report will be saved.
+
+        Returns:
+            str: The output path where the report was saved.
+        """
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(self.stages, f, indent=2)
+        return output_path
+
+
+@contextmanager
+def memory_profiling(output_path=None, mode="full", **tracker_kwargs):
+    """
+    Activate a `MemoryTracker` for the enclosed block and save its report afterwards.
+
+    Does nothing when `output_path` is None, so CLIs can pass an optional argument straight through.
+
+    Args:
+        output_path (str, optional): Path of the JSON report. Defaults to None (disabled).
+        mode (str, optional): "full" traces allocations with tracemalloc and samples RSS,
+            "rss" only samples RSS. Defaults to "full".
+        **tracker_kwargs: Extra keyword arguments forwarded to `MemoryTracker`.
+
+    Yields:
+        MemoryTracker or None: The active tracker, or None when disabled.
+    """
+    global _ACTIVE_TRACKER  # pylint: disable=global-statement
+    if output_path is None:
+        yield None
+        return
+    if mode not in MEMORY_MODES:
+        raise ValueError(f"Unknown memory mode {mode!r}, expected one of {MEMORY_MODES}")
+    tracker = MemoryTracker(trace_allocations=mode == "full", **tracker_kwargs)
+    previous = _ACTIVE_TRACKER
+    _ACTIVE_TRACKER = tracker
+    tracker.start()
+    try:
+        yield tracker
+    finally:
+        tracker.stop()
+        _ACTIVE_TRACKER = previous
+        tracker.save(output_path)
+
+
+def track_memory(stage):
+    """
+    Return a context manager tracking `stage` on the active tracker, or a no-op one.
+
+    Args:
+        stage (str): Name of the pipeline stage.
+
+    Returns:
+        contextlib.AbstractContextManager: Context manager for the stage.
+    """
+    if _ACTIVE_TRACKER is None:
+        return _NULL_CONTEXT
+    return _ACTIVE_TRACKER.track(stage)
+
+
+def memory_stage(stage):
+    """
+    Decorate a function so each call is tracked as `stage` when a tracker is active.
+
+    Args:
+        stage (str): Name of the pipeline stage.
+
+    Returns:
+        callable: Decorator.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _ACTIVE_TRACKER is None:
+                return func(*args, **kwargs)
+            with _ACTIVE_TRACKER.track(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,218 @@
+"""
+Batched metamorphic testing of the sentiment classifier.
+
+- Generates many transformed variants of every sample at once as a single feature matrix:
+  feature swaps, count scaling, synonym substitution through the vocabulary and insertion
+  of irrelevant tokens.
+- Scores each transformation family with one `predict` call and reports the fraction of
+  variants whose prediction matches the original one (the invariance rate).
+
+Used by `tests/test_mutamorphic.py` and runnable on the evaluation split from the CLI.
+"""
+
+import argparse
+import json
+import os
+
+import joblib
+import numpy as np
+
+from src.features import load_features
+from src.train import dense_rows
+
+TRANSFORMATIONS = (
+    "feature_swap",
+    "count_scaling",
+    "synonym_substitution",
+    "token_insertion",
+)
+DEFAULT_VARIANTS = 10
+SCALE_FACTORS = (2, 3)
+NEUTRAL_TERMS = 20
+MAX_EXAMPLES = 5
+
+
+def wordnet_synonyms(vocabulary):
+    """
+    Pair vocabulary terms with WordNet synonyms that are also in the vocabulary.
+
+    Args:
+        vocabulary (list[str]): Terms of the BoW vectorizer, in column order.
+
+    Returns:
+        dict: Term -> list of synonymous terms; empty if the WordNet corpus is not available.
+    """
+    try:
+        from nltk.corpus import wordnet  # pylint: disable=import-outside-toplevel
+
+        wordnet.ensure_loaded()
+    except LookupError:
+        return {}
+    terms = set(vocabulary)
+    synonyms = {}
+    for term in vocabulary:
+        lemmas = {
+            lemma.lower()
+            for synset in wordnet.synsets(term)
+            for lemma in synset.lemma_names()
+        }
+        matches = sorted((lemmas & terms) - {term})
+        if matches:
+            synonyms[term] = matches
+    return synonyms
+
+
+def neutral_columns(model, n_terms, count=NEUTRAL_TERMS):
+    """
+    Columns the model treats as least informative about the class.
+
+    For GaussianNB these are the features whose class means differ least relative to their
+    spread; for other models a fixed random set of columns is used.
+
+    Args:
+        model (object): The trained classifier.
+        n_terms (int): Number of features.
+        count (int, optional): Number of columns to return. Defaults to 20.
+
+    Returns:
+        np.ndarray: Column indices.
+    """
+    if hasattr(model, "theta_") and hasattr(model, "var_"):
+        spread = np.sqrt(model.var_.mean(axis=0))
+        score = np.ptp(model.theta_, axis=0) / spread
+        return np.argsort(score)[:count]
+    return np.random.default_rng(0).choice(n_terms, size=min(count, n_terms), replace=False)
+
+
+class MetamorphicSuite:
+    """
+    Generate transformed variants of BoW feature rows and measure prediction invariance.
+
+    Args:
+        model (object): Trained classifier with a `predict` method.
+        vocabulary (list[str], optional): Terms in column order; needed for synonym substitution. Defaults to None.
+        synonyms (dict, optional): Term -> synonymous terms. Defaults to WordNet synonyms of `vocabulary`.
+        variants (int, optional): Variants generated per sample and transformation. Defaults to 10.
+        seed (int, optional): Seed of the random transformations. Defaults to 42.
+    """
+
+    def __init__(self, model, vocabulary=None, synonyms=None, variants=DEFAULT_VARIANTS, seed=42):
+        self.model = model
+        self.variants = variants
+        self.seed = seed
+        self._synonym_pairs = np.empty((0, 2), dtype=np.int64)
+        if vocabulary is not None:
+            if synonyms is None:
+                synonyms = wordnet_synonyms(vocabulary)
+            column = {term: i for i, term in enumerate(vocabulary)}
+            pairs = [
+                (column[term], column[other])
+                for term, others in synonyms.items()
+                for other in others
+                if term in column and other in column
+            ]
+            if pairs:
+                self._synonym_pairs = np.array(pairs, dtype=np.int64)
+
+    def _repeat(self, X):
+        return np.repeat(X, self.variants, axis=0)
+
+    def feature_swap(self, X, rng):
+        """Swap the counts of two random features in every variant."""
+        variants = self._repeat(X)
+        rows = np.arange(len(variants))
+        i = rng.integers(0, X.shape[1], len(variants))
+        j = rng.integers(0, X.shape[1], len(variants))
+        variants[rows, i], variants[rows, j] = variants[rows, j], variants[rows, i]
+        return variants
+
+    def count_scaling(self, X, rng):
+        """Multiply all counts, as if the review were repeated."""
+        factors = rng.choice(SCALE_FACTORS, size=(len(X) * self.variants, 1))
+        return self._repeat(X) * factors
+
+    def synonym_substitution(self, X, rng):
+        """Move the count of one present term to a synonym; rows without one are unchanged."""
+        variants = self._repeat(X)
+        if self._synonym_pairs.size == 0:
+            return variants
+        source, target = self._synonym_pairs[:, 0], self._synonym_pairs[:, 1]
+        present = variants[:, source] > 0
+        # Pick a random applicable pair per row: the argmax of random keys over present pairs
+        keys = np.where(present, rng.random(present.shape), -1.0)
+        choice = keys.argmax(axis=1)
+        rows = np.flatnonzero(present.any(axis=1))
+        src, dst = source[choice[rows]], target[choice[rows]]
+        variants[rows, dst] += variants[rows, src]
+        variants[rows, src] = 0
+        return variants
+
+    def token_insertion(self, X, rng):
+        """Add one occurrence of a term the model considers irrelevant."""
+        variants = self._repeat(X)
+        columns = neutral_columns(self.model, X.shape[1])
+        variants[np.arange(len(variants)), rng.choice(columns, len(variants))] += 1
+        return variants
+
+    def run(self, X, transformations=TRANSFORMATIONS):
+        """
+        Apply every transformation family to all samples and measure invariance.
+
+        Args:
+            X (np.ndarray): BoW feature rows.
+            transformations (tuple[str], optional): Families to run. Defaults to all.
+
+        Returns:
+            dict: Family -> `variants`, `invariance_rate` and up to five `violating_samples`.
+                Families that cannot run (e.g. no synonyms in the vocabulary) report zero variants.
+        """
+        X = np.asarray(X)
+        baseline = np.repeat(self.model.predict(X), self.variants)
+        sample = np.repeat(np.arange(len(X)), self.variants)
+        report = {}
+        for name in transformations:
+            if name == "synonym_substitution" and self._synonym_pairs.size == 0:
+                report[name] = {"variants": 0, "invariance_rate": None, "violating_samples": []}
+                continue
+            rng = np.random.default_rng([self.seed, TRANSFORMATIONS.index(name)])
+            # One batched call per transformation family, not per sample
+            variants = getattr(self, name)(X, rng)
+            predictions = self.model.predict(variants)  # pylint: disable=predict-in-loop
+            invariant = predictions == baseline
+            report[name] = {
+                "variants": int(len(invariant)),
+                "invariance_rate": float(invariant.mean()),
+                "violating_samples": np.unique(sample[~invariant])[:MAX_EXAMPLES].tolist(),
+            }
+        return report
+
+
+def main():
+    """
+    Main function to run the metamorphic suite on the evaluation split.
+    """
+    parser = argparse.ArgumentParser(description="Measure prediction invariance under transformations.")
+    parser.add_argument("--X_test", type=str, default=os.path.join("data", "split", "X_test.npz"))
+    parser.add_argument(
+        "--model", type=str, default=os.path.join("output", "c2_Classifier_Sentiment_Model.pkl")
+    )
+    parser.add_argument(
+        "--bow", type=str, default=os.path.join("output", "c1_BoW_Sentiment_Model.pkl")
+    )
+    parser.add_argument("--variants", type=int, default=DEFAULT_VARIANTS)
+    parser.add_argument("--report", type=str, default=os.path.join("metrics", "metamorphic.json"))
+    args = parser.parse_args()
+
+    vocabulary = joblib.load(args.bow).get_feature_names_out().tolist()
+    suite = MetamorphicSuite(joblib.load(args.model), vocabulary, variants=args.variants)
+    # The transformations edit BoW rows in place, so the (small) test split is densified
+    report = suite.run(dense_rows(load_features(args.X_test)))
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for name, result in report.items():
+        print(f"{name}: {result['invariance_rate']} over {result['variants']} variants")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+In-process runner for the DVC pipeline.
+
+- Runs the stages of `dvc.yaml` in order inside one Python process, so pandas, scikit-learn,
+  NLTK and libml are imported once instead of once per stage.
+- Hands the features, labels, duplicate groups, model and test split from `preprocess` to
+  `train_model` to `evaluate` in memory; the files declared as stage outputs are still
+  written, so `dvc commit` can record the run.
+- Skips a stage when the hashes of its command, dependencies and parameters match the last
+  run and its outputs exist, like `dvc repro` does.
+
+Stage commands, paths and dependencies are read from `dvc.yaml`, which stays the single
+source of truth. Usage: `python -m src.pipeline [--until STAGE] [--force]`.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shlex
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.artifact_cache import file_signature, sha256_file
+from src.features import load_features
+from src.memory_tracking import memory_profiling, track_memory
+from src.timing import timing_session
+
+STATE_PATH = os.path.join(".pipeline", "state.json")
+
+
+def load_stages(dvc_path="dvc.yaml"):
+    """
+    Read the stage definitions from a `dvc.yaml` file.
+
+    Args:
+        dvc_path (str, optional): Path of the DVC pipeline file. Defaults to "dvc.yaml".
+
+    Returns:
+        dict: Stage name -> definition (`cmd`, `deps`, `outs`, `metrics`, `params`), in file order.
+    """
+    import yaml  # pylint: disable=import-outside-toplevel
+
+    with open(dvc_path, "r", encoding="utf-8") as f:
+        stages = yaml.safe_load(f)["stages"]
+    return {
+        name: {
+            "cmd": " ".join(stage["cmd"].split()),
+            "deps": stage.get("deps", []),
+            "outs": [_entry_path(out) for out in stage.get("outs", [])],
+            "metrics": [_entry_path(metric) for metric in stage.get("metrics", [])],
+            "params": stage.get("params", []),
+        }
+        for name, stage in stages.items()
+    }
+
+
+def _entry_path(entry):
+    return next(iter(entry)) if isinstance(entry, dict) else entry
+
+
+def parse_cmd(cmd):
+    """
+    Split a `python -m <module> --flag value ...` stage command.
+
+    Args:
+        cmd (str): The stage command.
+
+    Returns:
+        tuple: (module, argv, options) where `options` maps flag names to values
+            (True for flags without a value); module is None for other commands.
+    """
+    tokens = shlex.split(cmd)
+    if tokens[:2] != ["python", "-m"]:
+        return None, tokens, {}
+    argv = tokens[3:]
+    options = {}
+    for i, token in enumerate(argv):
+        if token.startswith("--"):
+            has_value = i + 1 < len(argv) and not argv[i + 1].startswith("--")
+            options[token[2:]] = argv[i + 1] if has_value else True
+    return tokens[2], argv, options
+
+
+def _lookup_param(params, dotted_key):
+    value = params
+    for key in dotted_key.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+class PipelineRunner:
+    """
+    Run DVC stages in-process with in-memory hand-over and hash-based skipping.
+
+    Args:
+        dvc_path (str, optional): Path of the DVC pipeline file. Defaults to "dvc.yaml".
+        params_path (str, optional): Path of the parameters file. Defaults to "params.yaml".
+        state_path (str, optional): File recording the fingerprints of the last runs. Defaults to ".pipeline/state.json".
+        force (bool, optional): Run every stage even if it is up to date. Defaults to False.
+    """
+
+    def __init__(self, dvc_path="dvc.yaml", params_path="params.yaml", state_path=STATE_PATH, force=False):
+        self.stages = load_stages(dvc_path)
+        self.params_path = params_path
+        self.state_path = state_path
+        self.force = force
+        self.memory = {}
+        self.state = {"stages": {}, "files": {}}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def _hash_path(self, path):
+        if os.path.isdir(path):
+            digest = hashlib.sha256()
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                    digest.update(self._hash_path(file_path).encode("utf-8"))
+            return digest.hexdigest()
+        if not os.path.exists(path):
+            return "missing"
+        signature = file_signature(path)
+        cached = self.state["files"].get(path)
+        if cached and {k: cached[k] for k in signature} == signature:
+            return cached["sha256"]
+        checksum = sha256_file(path)
+        self.state["files"][path] = {**signature, "sha256": checksum}
+        return checksum
+
+    def fingerprint(self, name):
+        """
+        Hash the command, dependencies and parameters of a stage.
+
+        Args:
+            name (str): Stage name.
+
+        Returns:
+            str: Hex digest that changes whenever any input of the stage changes.
+        """
+        import yaml  # pylint: disable=import-outside-toplevel
+
+        stage = self.stages[name]
+        params = {}
+        if stage["params"] and os.path.exists(self.params_path):
+            with open(self.params_path, "r", encoding="utf-8") as f:
+                params = yaml.safe_load(f) or {}
+        payload = {
+            "cmd": stage["cmd"],
+            "deps": {dep: self._hash_path(dep) for dep in stage["deps"]},
+            "params": {key: _lookup_param(params, key) for key in stage["params"]},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_fresh(self, name, fingerprint):
+        """
+        Whether a stage can be skipped.
+
+        Args:
+            name (str): Stage name.
+            fingerprint (str): Current fingerprint of the stage.
+
+        Returns:
+            bool: True if the stage ran with the same fingerprint and its outputs exist.
+        """
+        stage = self.stages[name]
+        outputs = stage["outs"] + stage["metrics"]
+        return (
+            not self.force
+            and self.state["stages"].get(name) == fingerprint
+            and all(os.path.exists(path) for path in outputs)
+        )
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _get(self, key, load):
+        """Value handed over by an earlier stage in this run, or loaded from its output file."""
+        if self.memory.get(key) is None:
+            self.memory[key] = load()
+        return self.memory[key]
+
+    @contextmanager
+    def _instrumented(self, name, options, memory_stage):
+        with timing_session(name, options.get("timings_output"), options.get("trace_output")):
+            memory_mode = options.get("memory_mode", "full")
+            with memory_profiling(options.get("memory_output"), memory_mode), track_memory(memory_stage):
+                yield
+
+    def _run_preprocess(self, name, options):
+        from src.prepare_data import (  # pylint: disable=import-outside-toplevel
+            load_feature_params, preprocess_dataset, save_preprocessed)
+
+        with self._instrumented(name, options, "preprocess_and_save"):
+            preprocessed = preprocess_dataset(
+                options["dataset"],
+                options.get("dedup", "off"),
+                float(options.get("dedup_threshold", 0.8)),
+                load_feature_params(self.params_path),
+            )
+            save_preprocessed(options["output_dir"], options["bow_dir"], preprocessed)
+        X, y, _, groups = preprocessed
+        self.memory.update(X=X, y=y, groups=groups)
+
+    def _run_train(self, name, options):
+        from src.train import (  # pylint: disable=import-outside-toplevel
+            load_params, train_model)
+
+        config = load_params(self.params_path)
+        X = self._get("X", lambda: load_features(options["data"]))
+        y = self._get("y", lambda: np.load(options["labels"], mmap_mode=None))
+        groups = None
+        if options.get("groups"):
+            groups = self._get("groups", lambda: np.load(options["groups"], mmap_mode=None))
+        args = argparse.Namespace(
+            output=options["output"],
+            split_output_dir=options.get("split_output_dir"),
+            train_metrics_output=options.get("train_metrics_output"),
+            summary_output=options.get("summary_output"),
+        )
+        with self._instrumented(name, options, "train_model"):
+            model, X_test, y_test = train_model(X, y, config, args, groups)
+        self.memory.update(model=model, X_test=X_test, y_test=y_test)
+
+    def _run_evaluate(self, name, options):
+        from src.evaluate import (  # pylint: disable=import-outside-toplevel
+            evaluate_model, load_model, save_metrics)
+        from src.train import load_params  # pylint: disable=import-outside-toplevel
+
+        # Any split files on disk are left over from an earlier run
+        if load_params(self.params_path)["train_all"]:
+            raise ValueError(f"Stage {name!r} needs a test split, but train.train_all is set so none was made")
+        np.random.seed(42)
+        model = self._get("model", lambda: load_model(options["model"]))
+        X_test = self._get("X_test", lambda: load_features(options["X_test"]))
+        y_test = self._get("y_test", lambda: np.load(options["y_test"], mmap_mode=None))
+        with self._instrumented(name, options, "run_evaluation"):
+            metrics = evaluate_model(model, X_test, y_test)
+            save_metrics(metrics, options["metrics_output"])
+        self.memory["metrics"] = metrics
+
+    def _run_main(self, module, argv):
+        """Run a stage's CLI entry point in this process with the stage's arguments."""
+        saved_argv = sys.argv
+        sys.argv = [module] + argv
+        try:
+            importlib.import_module(module).main()
+        finally:
+            sys.argv = saved_argv
+
+    def run_stage(self, name):
+        """
+        Run one stage, handing data over in memory where the stage supports it.
+
+        Args:
+            name (str): Stage name.
+        """
+        module, argv, options = parse_cmd(self.stages[name]["cmd"])
+        handlers = {
+            "src.prepare_data": self._run_preprocess,
+            "src.train": self._run_train,
+            "src.evaluate": self._run_evaluate,
+        }
+        if module in handlers:
+            handlers[module](name, options)
+        elif module:
+            self._run_main(module, argv)
+        else:
+            raise ValueError(f"Stage {name!r} is not a `python -m` command: {self.stages[name]['cmd']}")
+
+    def run(self, until=None):
+        """
+        Run the pipeline stages in order, skipping those that are up to date.
+
+        Args:
+            until (str, optional): Last stage to run. Defaults to None (all stages).
+
+        Returns:
+            dict: Stage name -> {"status": "ran" or "skipped", "duration_s": float}.
+        """
+        if until is not None and until not in self.stages:
+            raise ValueError(f"Unknown stage {until!r}, expected one of {list(self.stages)}")
+        results = {}
+        for name in self.stages:
+            start = time.perf_counter()
+            fingerprint = self.fingerprint(name)
+            if self.is_fresh(name, fingerprint):
+                status = "skipped"
+            else:
+                self.run_stage(name)
+                self.state["stages"][name] = fingerprint
+                self._save_state()
+                status = "ran"
+            results[name] = {"status": status, "duration_s": time.perf_counter() - start}
+            if name == until:
+                break
+        self._save_state()
+        return results
+
+
+def main():
+    """
+    Main function to run the pipeline in-process.
+    """
+    parser = argparse.ArgumentParser(description="Run the DVC pipeline stages in one process.")
+    parser.add_argument("--dvc_file", type=str, default="dvc.yaml")
+    parser.add_argument("--params", type=str, default="params.yaml")
+    parser.add_argument("--until", type=str, default=None, help="Last stage to run.")
+    parser.add_argument("--force", action="store_true", help="Run stages even if up to date.")
+    args = parser.parse_args()
+    runner = PipelineRunner(args.dvc_file, args.params, force=args.force)
+    for name, result in runner.run(args.until).items():
+        print(f"{name}: {result['status']} ({result['duration_s']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+In-process sentiment predictor built from the pipeline artifacts.
+
+- Loads the BoW vectorizer (c1) and the trained classifier (c2), from files or from the
+  model registry (`src.registry`).
+- Vectorizes raw review texts like the training reviews (`src.features.vectorize_reviews`)
+  and predicts their sentiment in one batch, optionally with the top-k terms behind each
+  prediction (`src.explain`).
+- Hot-swaps to another model version by replacing one reference: requests already running
+  finish on the version they started with, and no request waits for the swap.
+
+Used by the load-testing harness and anywhere the model is served without the
+separate model-service.
+"""
+
+import os
+
+import joblib
+import numpy as np
+
+from src.features import vectorize_reviews
+
+DEFAULT_BOW_PATH = os.path.join("output", "c1_BoW_Sentiment_Model.pkl")
+DEFAULT_MODEL_PATH = os.path.join("output", "c2_Classifier_Sentiment_Model.pkl")
+
+
+def accepts_sparse(model):
+    """Whether a model predicts on sparse features: linear models and stacked ensembles."""
+    return hasattr(model, "coef_") or getattr(model, "accepts_sparse", False)
+
+
+class SentimentPredictor:
+    """
+    Predict sentiment for raw review texts.
+
+    Args:
+        vectorizer (object): Fitted BoW vectorizer with a `transform` method.
+        model (object): Trained classifier with a `predict` method.
+    """
+
+    def __init__(self, vectorizer, model, version=None):
+        # One tuple, replaced in a single assignment, so a request never mixes two versions
+        self._artifacts = (vectorizer, model, version)
+        self._explainer = (None, None)  # (artifacts, NaiveBayesExplainer) built on first use
+
+    @property
+    def vectorizer(self):
+        """object: The BoW vectorizer in use."""
+        return self._artifacts[0]
+
+    @property
+    def model(self):
+        """object: The classifier in use."""
+        return self._artifacts[1]
+
+    @property
+    def version(self):
+        """str or None: Registry version in use, None when loaded from files."""
+        return self._artifacts[2]
+
+    @classmethod
+    def from_paths(cls, bow_path=DEFAULT_BOW_PATH, model_path=DEFAULT_MODEL_PATH):
+        """
+        Load a predictor from the saved pipeline artifacts.
+
+        Args:
+            bow_path (str, optional): Path to the pickled vectorizer. Defaults to `output/c1_BoW_Sentiment_Model.pkl`.
+            model_path (str, optional): Path to the saved classifier. Defaults to `output/c2_Classifier_Sentiment_Model.pkl`.
+
+        Returns:
+            SentimentPredictor: Predictor wrapping both artifacts.
+        """
+        return cls(joblib.load(bow_path), joblib.load(model_path))
+
+    @classmethod
+    def from_registry(cls, registry, version=None):
+        """
+        Load a predictor from the model registry, with memory-mapped model parameters.
+
+        Args:
+            registry (ModelRegistry): The registry.
+            version (str, optional): Version to load. Defaults to the current version.
+
+        Returns:
+            SentimentPredictor: Predictor serving that version.
+        """
+        return cls(*registry.load(version))
+
+    def swap(self, vectorizer, model, version=None):
+        """
+        Switch to other artifacts without pausing traffic.
+
+        Args:
+            vectorizer (object): Fitted BoW vectorizer.
+            model (object): Trained classifier.
+            version (str, optional): Registry version of the artifacts. Defaults to None.
+        """
+        self._artifacts = (vectorizer, model, version)
+
+    def sync(self, registry):
+        """
+        Hot-swap to the registry's current version if it differs from the one in use.
+
+        The new artifacts are loaded (memory-mapped) before the swap, so requests keep being
+        served by the old version until the new one is ready.
+
+        Args:
+            registry (ModelRegistry): The registry.
+
+        Returns:
+            bool: True if the predictor switched versions.
+        """
+        current = registry.current()
+        if current is None or current == self.version:
+            return False
+        self.swap(*registry.load(current))
+        return True
+
+    def transform(self, reviews, vectorizer=None, model=None):
+        """
+        Vectorize a batch of raw review texts.
+
+        Args:
+            reviews (list[str]): Review texts.
+            vectorizer (object, optional): Vectorizer to use. Defaults to the one in use.
+            model (object, optional): Model the features are for. Defaults to the one in use.
+
+        Returns:
+            np.ndarray or scipy.sparse.csr_matrix: Feature matrix, one row per review; sparse
+                for models that predict with sparse products (see `accepts_sparse`).
+        """
+        vectorizer = vectorizer or self.vectorizer
+        model = model or self.model
+        X = vectorize_reviews(vectorizer, reviews)
+        if accepts_sparse(model):
+            return X
+        # GaussianNB only accepts dense input
+        return np.asarray(X.toarray())  # pylint: disable=dense-sparse-matrix
+
+    def predict(self, reviews):
+        """
+        Predict sentiment labels for a batch of raw review texts.
+
+        Args:
+            reviews (list[str]): Review texts.
+
+        Returns:
+            np.ndarray: Predicted labels (1 = positive, 0 = negative).
+        """
+        vectorizer, model, _ = self._artifacts
+        return model.predict(self.transform(reviews, vectorizer, model))
+
+    def explain(self, reviews, k=5, target=None):
+        """
+        Predict a batch of raw review texts with the top-k terms behind each prediction.
+
+        The features stay sparse and the GaussianNB parameters are prepared once per model
+        version, so explaining adds a small constant factor to `predict`.
+
+        Args:
+            reviews (list[str]): Review texts.
+            k (int, optional): Terms per review. Defaults to 5.
+            target (object, optional): Class to explain, e.g. 0 for "why negative". Defaults
+                to the predicted class.
+
+        Returns:
+            list[dict]: Per review, the `prediction` and its `terms` as (term, contribution) pairs.
+        """
+        from src.explain import NaiveBayesExplainer  # pylint: disable=import-outside-toplevel
+
+        artifacts = self._artifacts
+        cached_for, explainer = self._explainer
+        if cached_for is not artifacts:
+            vectorizer, model, _ = artifacts
+            explainer = NaiveBayesExplainer(model, vectorizer.get_feature_names_out())
+            self._explainer = (artifacts, explainer)
+        return explainer.explain(vectorize_reviews(artifacts[0], reviews), k, target)
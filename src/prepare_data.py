@@ -1,9 +1,11 @@
 """
 Data preparation script for sentiment analysis pipeline.
 
-- Loads the TSV dataset.
-- Applies text preprocessing using `libml._preprocess`.
-- Saves the resulting features (X), labels (y), and the vectorizer (cv).
+- Loads the dataset (Parquet from the ingest stage, or the raw TSV).
+- Optionally drops or groups exact and near-duplicate reviews (`src.dedup`).
+- Builds the features configured in the `features` section of params.yaml: the unigram
+  counts of `libml._preprocess`, or word/character n-grams with optional TF-IDF (`src.features`).
+- Saves the resulting features (X, as CSR), labels (y), and the vectorizer (cv).
 
 Expected to be used as the first stage in a DVC pipeline.
 """
@@ -13,8 +15,15 @@ import os
 import pickle
 
 import numpy as np
-import pandas as pd
-from libml import preprocessing as libml
+
+from src.artifact_cache import configure_nltk_data
+from src.dedup import DEDUP_MODES, DEFAULT_THRESHOLD, deduplicate
+from src.features import extract_features, feature_config, lib_ml_bag_of_words, oov_rate, save_features
+from src.ingest import load_reviews
+from src.memoize import memoize
+from src.memory_tracking import memory_profiling, memory_stage
+from src.profiling import INSTRUMENTATION_DEFAULTS, add_instrumentation_arguments, profile_run
+from src.timing import timed, timing_session
 
 
 def parse_args():
@@ -23,54 +32,163 @@ def parse_args():
 
     Returns:
         argparse.Namespace: Parsed arguments with attributes:
-            - dataset (str): Path to the input dataset TSV file.
+            - dataset (str): Path to the input dataset (Parquet or TSV file).
             - output_dir (str): Directory where processed numpy arrays will be saved.
             - bow_dir (str): Directory where the vectorizer pickle will be saved.
+            - dedup (str): Duplicate handling, one of "off", "drop" or "group".
+            - dedup_threshold (float): Minimum similarity of near-duplicate reviews.
+            - memory_output (str, optional): File path to save the per-stage memory report JSON.
+            - memory_mode (str): "full" for tracemalloc and RSS sampling, "rss" for RSS sampling only.
+            - timings_output (str, optional): File path of the timings JSON to merge step durations into.
+            - trace_output (str, optional): File path to save a Chrome trace of the stage.
+            - profile (str, optional): Directory for cProfile output; profiling is off when unset.
     """
     if "PYTEST_CURRENT_TEST" in os.environ:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
         return argparse.Namespace(
             dataset=os.path.join(
-                base_dir, "datasets", "a1_RestaurantReviews_HistoricDump.tsv"
+                base_dir, "data", "raw", "a1_RestaurantReviews_HistoricDump.parquet"
             ),
             output_dir=os.path.join(base_dir, "data"),
             bow_dir=os.path.join(base_dir, "output"),
+            dedup="off",
+            dedup_threshold=DEFAULT_THRESHOLD,
+            **INSTRUMENTATION_DEFAULTS,
         )
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--dataset", type=str, required=True)
     parser.add_argument("--output_dir", type=str, required=True)
     parser.add_argument("--bow_dir", type=str, required=True)
+    parser.add_argument("--dedup", type=str, choices=DEDUP_MODES, default="off")
+    parser.add_argument("--dedup_threshold", type=float, default=DEFAULT_THRESHOLD)
+    add_instrumentation_arguments(parser)
     return parser.parse_args()
 
 
-def preprocess_and_save(dataset_path, output_dir, bow_dir):
+def load_feature_params(path="params.yaml"):
     """
-    Loads dataset, applies preprocessing, and saves features, labels, and vectorizer.
+    Load the feature configuration from the `features` section of a YAML file.
 
     Args:
-        dataset_path (str): Path to the input TSV dataset file.
-        output_dir (str): Directory where numpy arrays (X.npy, y.npy) will be saved.
-        bow_dir (str): Directory where the vectorizer pickle file will be saved.
+        path (str, optional): Path to the YAML config file. Defaults to "params.yaml".
+
+    Returns:
+        dict: Feature configuration (see `src.features.DEFAULT_FEATURES`); the defaults
+            when the file or the section is missing.
+    """
+    import yaml  # pylint: disable=import-outside-toplevel
+
+    params = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            params = yaml.safe_load(f) or {}
+    return feature_config(params.get("features"))
+
+
+def preprocess_dataset(dataset_path, dedup="off", dedup_threshold=DEFAULT_THRESHOLD, features=None):
+    """
+    Loads the dataset, handles duplicates and applies preprocessing, without saving anything.
+
+    The work is memoized; the "preprocess_dataset" span is recorded around it, so a cache
+    hit still shows up in the timings (the finer spans only appear when it runs).
+
+    Args:
+        dataset_path (str): Path to the input dataset (Parquet or TSV file).
+        dedup (str, optional): One of "off", "drop" or "group". Defaults to "off".
+        dedup_threshold (float, optional): Minimum similarity of near-duplicates. Defaults to 0.8.
+        features (dict, optional): Feature configuration. Defaults to the lib-ml unigram counts.
 
     Returns:
         tuple:
-            - X (np.ndarray): Preprocessed feature matrix.
+            - X (np.ndarray or scipy.sparse.csr_matrix): Preprocessed feature matrix; dense
+              lib-ml counts in "bow" mode, CSR in the n-gram modes.
             - y (np.ndarray): Label array.
+            - cv (object): The fitted vectorizer, with the out-of-vocabulary rate of the
+              reviews in `oov_rate_` as the baseline for drift monitoring.
+            - groups (np.ndarray or None): Duplicate group ids when `dedup` is "group".
+    """
+    with timed("preprocess_dataset"):
+        return _preprocess_dataset(dataset_path, dedup, dedup_threshold, feature_config(features))
+
+
+@memoize(
+    "preprocess",
+    files=("dataset_path",),
+    packages=("lib-ml", "scikit-learn", "nltk"),
+    modules=("src.dedup", "src.features", "src.ingest"),
+)
+def _preprocess_dataset(dataset_path, dedup, dedup_threshold, features):
+    with timed("load_dataset"):
+        messages = load_reviews(dataset_path)
+    with timed("dedup"):
+        messages, groups, stats = deduplicate(
+            messages, mode=dedup, threshold=dedup_threshold
+        )
+    if stats:
+        print(
+            f"Found {stats['exact_duplicates']} exact and {stats['near_duplicates']} "
+            f"near-duplicate reviews in {stats['rows']} rows ({dedup})"
+        )
+    with timed("preprocess"):
+        if features["mode"] == "bow":
+            configure_nltk_data()  # Use mirrored/cached corpora on offline nodes
+            X, cv = lib_ml_bag_of_words(messages)
+        else:
+            X, cv = extract_features(messages["Review"].fillna("").astype(str), features)
+        y = messages.iloc[:, -1].values
+    with timed("oov_rate"):
+        cv.oov_rate_ = oov_rate(cv, messages["Review"].fillna("").astype(str).tolist())
+    return X, y, cv, groups
+
+
+def save_preprocessed(output_dir, bow_dir, preprocessed):
     """
+    Saves features, labels, duplicate groups and the vectorizer.
+
+    Args:
+        output_dir (str): Directory where the features (X.npz, CSR) and numpy arrays (y.npy, groups.npy)
+            will be saved.
+        bow_dir (str): Directory where the vectorizer pickle file will be saved.
+        preprocessed (tuple): (X, y, cv, groups) as returned by `preprocess_dataset`; groups.npy
+            is only written when `groups` is not None.
+    """
+    X, y, cv, groups = preprocessed
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(bow_dir, exist_ok=True)
+    with timed("save"):
+        save_features(os.path.join(output_dir, "X.npz"), X)
+        np.save(os.path.join(output_dir, "y.npy"), y)
+        if groups is not None:
+            np.save(os.path.join(output_dir, "groups.npy"), groups)
+
+        with open(os.path.join(bow_dir, "c1_BoW_Sentiment_Model.pkl"), "wb") as f:
+            pickle.dump(cv, f)
+
+
+@memory_stage("preprocess_and_save")
+def preprocess_and_save(dataset_path, output_dir, bow_dir, **options):
+    """
+    Loads dataset, applies preprocessing, and saves features, labels, and vectorizer.
 
-    messages = pd.read_csv(dataset_path, delimiter="\t", quoting=3)
-    X, cv = libml._preprocess(messages)  # pylint: disable=protected-access
-    y = messages.iloc[:, -1].values
+    With `dedup="drop"` only the first review of each duplicate group is kept. With
+    `dedup="group"` every review is kept and the group ids are saved to `groups.npy`,
+    so that training can split without putting near-copies on both sides.
 
-    np.save(os.path.join(output_dir, "X.npy"), X)
-    np.save(os.path.join(output_dir, "y.npy"), y)
+    Args:
+        dataset_path (str): Path to the input dataset (Parquet or TSV file).
+        output_dir (str): Directory where the features (X.npz) and labels (y.npy) will be saved.
+        bow_dir (str): Directory where the vectorizer pickle file will be saved.
+        **options: `dedup`, `dedup_threshold` and `features`, see `preprocess_dataset`.
 
-    with open(os.path.join(bow_dir, "c1_BoW_Sentiment_Model.pkl"), "wb") as f:
-        pickle.dump(cv, f)
-    return X, y
+    Returns:
+        tuple:
+            - X (np.ndarray or scipy.sparse.csr_matrix): Preprocessed feature matrix.
+            - y (np.ndarray): Label array.
+    """
+    preprocessed = preprocess_dataset(dataset_path, **options)
+    save_preprocessed(output_dir, bow_dir, preprocessed)
+    return preprocessed[:2]
 
 
 def main():
@@ -78,7 +196,18 @@ def main():
     Main function to parse arguments and run the preprocessing pipeline.
     """
     args = parse_args()
-    preprocess_and_save(args.dataset, args.output_dir, args.bow_dir)
+    features = load_feature_params()
+    with profile_run("preprocess", args.profile), timing_session(
+        "preprocess", args.timings_output, args.trace_output
+    ), memory_profiling(args.memory_output, args.memory_mode):
+        preprocess_and_save(
+            args.dataset,
+            args.output_dir,
+            args.bow_dir,
+            dedup=args.dedup,
+            dedup_threshold=args.dedup_threshold,
+            features=features,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+"""
+Opt-in cProfile mode shared by the pipeline CLI entry points.
+
+- Adds a uniform `--profile [DIR]` option to the stage scripts, alongside the shared
+  `--memory_output`, `--memory_mode`, `--timings_output` and `--trace_output` instrumentation options.
+- Can also be switched on without touching the command line via the `PIPELINE_PROFILE`
+  environment variable (a directory, or `1` for the default `profiling/` directory).
+- Dumps a `.pstats` file plus a top-N hot-function summary per run.
+
+The stages run as plain Python modules, so sampling profilers such as py-spy can be
+attached on top without any of this (`py-spy record -o train.svg -- python -m src.train ...`).
+"""
+
+import cProfile
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV_VAR = "PIPELINE_PROFILE"
+DEFAULT_PROFILE_DIR = "profiling"
+DEFAULT_TOP_N = 25
+
+INSTRUMENTATION_DEFAULTS = {
+    "memory_output": None,
+    "memory_mode": "full",
+    "timings_output": None,
+    "trace_output": None,
+    "profile": None,
+}
+
+_TRUTHY = {"1", "true", "yes", "on"}
+_FALSY = {"", "0", "false", "no", "off"}
+
+
+def add_profile_argument(parser):
+    """
+    Add the shared `--profile` option to an argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser of a pipeline CLI.
+
+    Returns:
+        argparse.ArgumentParser: The same parser, for chaining.
+    """
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE_DIR,
+        default=None,
+        metavar="DIR",
+        help=(
+            "Profile this run with cProfile and write the stats to DIR "
+            f"(default: {DEFAULT_PROFILE_DIR}/). Also enabled by ${PROFILE_ENV_VAR}."
+        ),
+    )
+    return parser
+
+
+def add_instrumentation_arguments(parser):
+    """
+    Add the memory, timing, trace and profiling options shared by the stage scripts.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser of a pipeline CLI.
+
+    Returns:
+        argparse.ArgumentParser: The same parser, for chaining.
+    """
+    parser.add_argument("--memory_output", type=str)
+    parser.add_argument(
+        "--memory_mode",
+        choices=("full", "rss"),
+        default="full",
+        help="full: tracemalloc and RSS sampling; rss: RSS sampling only, cheap enough to combine with --timings_output",
+    )
+    parser.add_argument("--timings_output", type=str)
+    parser.add_argument("--trace_output", type=str)
+    return add_profile_argument(parser)
+
+
+def resolve_profile_dir(cli_value=None):
+    """
+    Decide where profiling output goes, if profiling is enabled at all.
+
+    The command-line value wins over the environment variable.
+
+    Args:
+        cli_value (str, optional): Value of the `--profile` option. Defaults to None.
+
+    Returns:
+        str or None: Output directory for profiling results, or None when profiling is off.
+    """
+    if cli_value:
+        return cli_value
+    env_value = os.environ.get(PROFILE_ENV_VAR, "").strip()
+    if env_value.lower() in _FALSY:
+        return None
+    if env_value.lower() in _TRUTHY:
+        return DEFAULT_PROFILE_DIR
+    return env_value
+
+
+def write_summary(stats_path, summary_path, top_n=DEFAULT_TOP_N):
+    """
+    Write a human-readable top-N hot-function summary for a pstats file.
+
+    Functions are listed twice: by cumulative time (where time is spent including callees)
+    and by internal time (the hot functions themselves).
+
+    Args:
+        stats_path (str): Path of the `.pstats` file to summarize.
+        summary_path (str): Path of the text summary to write.
+        top_n (int, optional): Number of functions per listing. Defaults to 25.
+
+    Returns:
+        str: The path of the written summary.
+    """
+    with open(summary_path, "w", encoding="utf-8") as f:
+        stats = pstats.Stats(stats_path, stream=f)
+        stats.strip_dirs()
+        for sort_key in ("cumulative", "tottime"):
+            f.write(f"=== Top {top_n} functions by {sort_key} time ===\n")
+            stats.sort_stats(sort_key).print_stats(top_n)
+    return summary_path
+
+
+@contextmanager
+def profile_run(name, profile_dir=None, top_n=DEFAULT_TOP_N):
+    """
+    Profile the enclosed block with cProfile when profiling is enabled.
+
+    Writes `<profile_dir>/<name>-<timestamp>.pstats` and a matching `.txt` summary.
+
+    Args:
+        name (str): Name of the entry point, used as the file name prefix.
+        profile_dir (str, optional): Value of the `--profile` option. Defaults to None,
+            in which case the `PIPELINE_PROFILE` environment variable decides.
+        top_n (int, optional): Number of functions in the summary listings. Defaults to 25.
+
+    Yields:
+        dict or None: Filled with `stats` and `summary` paths after the block, or None when disabled.
+    """
+    output_dir = resolve_profile_dir(profile_dir)
+    if output_dir is None:
+        yield None
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    result = {"stats": f"{prefix}.pstats", "summary": f"{prefix}.txt"}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        profiler.dump_stats(result["stats"])
+        write_summary(result["stats"], result["summary"], top_n)
+        print(f"Profile saved to {result['stats']} (summary: {result['summary']})")
@@ -0,0 +1,262 @@
+"""
+Local model registry with versioned artifacts, metrics and lineage.
+
+- Registers the BoW vectorizer (c1) and classifier (c2) of a training run as an immutable,
+  numbered version together with its metrics and lineage (parent version, parameters,
+  input checksums, git commit).
+- Promotes a version to "current" by atomically replacing one small pointer file, so
+  readers see either the old or the new version, never a mix.
+- Loads artifacts with memory-mapped arrays, so a running `SentimentPredictor` can hot-swap
+  to a new version without copying model parameters or pausing traffic.
+
+Layout::
+
+    <root>/versions/v0001/c1_BoW_Sentiment_Model.pkl
+    <root>/versions/v0001/c2_Classifier_Sentiment_Model.pkl
+    <root>/versions/v0001/metadata.json
+    <root>/current.json
+
+Usage: `python -m src.registry register --metrics metrics/eval.json --promote`,
+`python -m src.registry promote v0002`, `python -m src.registry list`.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+
+from src.artifact_cache import sha256_file
+
+DEFAULT_ROOT = "registry"
+BOW_FILE = "c1_BoW_Sentiment_Model.pkl"
+MODEL_FILE = "c2_Classifier_Sentiment_Model.pkl"
+METADATA_FILE = "metadata.json"
+CURRENT_FILE = "current.json"
+
+
+def _write_json_atomic(path, obj):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class ModelRegistry:
+    """
+    Store, list, promote and load versioned model artifacts.
+
+    Args:
+        root (str, optional): Registry directory. Defaults to "registry".
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+    def version_dir(self, version):
+        """
+        Directory of a version.
+
+        Args:
+            version (str): Version name, e.g. "v0001".
+
+        Returns:
+            str: The directory path.
+        """
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self):
+        """
+        List the registered versions.
+
+        Returns:
+            list[str]: Version names, oldest first.
+        """
+        return sorted(
+            name
+            for name in os.listdir(self.versions_dir)
+            if os.path.exists(os.path.join(self.versions_dir, name, METADATA_FILE))
+        )
+
+    def _allocate(self):
+        """Create the directory of the next version; `os.mkdir` fails if another writer took it."""
+        number = len(os.listdir(self.versions_dir)) + 1
+        while True:
+            version = f"v{number:04d}"
+            try:
+                os.mkdir(self.version_dir(version))
+                return version
+            except FileExistsError:
+                number += 1
+
+    def register(self, bow_path, model_path, metrics=None, lineage=None, promote=False):
+        """
+        Copy a vectorizer and classifier into the registry as a new version.
+
+        Args:
+            bow_path (str): Path to the pickled vectorizer.
+            model_path (str): Path to the saved classifier.
+            metrics (dict, optional): Evaluation metrics of the model. Defaults to None.
+            lineage (dict, optional): Extra lineage, e.g. parameters and input checksums. Defaults to None.
+            promote (bool, optional): Make the new version current. Defaults to False.
+
+        Returns:
+            str: The new version name.
+        """
+        version = self._allocate()
+        target = self.version_dir(version)
+        artifacts = {}
+        for source, name in ((bow_path, BOW_FILE), (model_path, MODEL_FILE)):
+            shutil.copyfile(source, os.path.join(target, name))
+            artifacts[name] = sha256_file(os.path.join(target, name))
+        current = self.current()
+        metadata = {
+            "version": version,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "metrics": metrics or {},
+            "lineage": {"parent": current, "git_commit": _git_commit(), **(lineage or {})},
+            "artifacts": artifacts,
+        }
+        # The metadata file is written last: a version without it is incomplete and ignored
+        _write_json_atomic(os.path.join(target, METADATA_FILE), metadata)
+        if promote:
+            self.promote(version)
+        return version
+
+    def metadata(self, version):
+        """
+        Metadata of a version.
+
+        Args:
+            version (str): Version name.
+
+        Returns:
+            dict: `version`, `created`, `metrics`, `lineage` and `artifacts` checksums.
+        """
+        with open(os.path.join(self.version_dir(version), METADATA_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def current(self):
+        """
+        The version currently promoted for serving.
+
+        Returns:
+            str or None: Version name, or None if nothing has been promoted.
+        """
+        path = os.path.join(self.root, CURRENT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["version"]
+
+    def current_metrics(self):
+        """
+        Metrics of the current version.
+
+        Returns:
+            dict: The metrics, empty if nothing has been promoted.
+        """
+        current = self.current()
+        return self.metadata(current)["metrics"] if current else {}
+
+    def promote(self, version):
+        """
+        Make a version current by atomically replacing the pointer file.
+
+        Args:
+            version (str): Version name.
+
+        Raises:
+            ValueError: If the version is not registered.
+        """
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version {version!r}, expected one of {self.versions()}")
+        pointer = {"version": version, "promoted": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+        _write_json_atomic(os.path.join(self.root, CURRENT_FILE), pointer)
+
+    def load(self, version=None, mmap=True):
+        """
+        Load the vectorizer and classifier of a version.
+
+        Args:
+            version (str, optional): Version name. Defaults to the current version.
+            mmap (bool, optional): Memory-map the arrays of the artifacts read-only instead of
+                copying them into memory. Defaults to True.
+
+        Returns:
+            tuple: (vectorizer, model, version).
+
+        Raises:
+            ValueError: If no version is given and none has been promoted.
+        """
+        import joblib  # pylint: disable=import-outside-toplevel
+
+        version = version or self.current()
+        if version is None:
+            raise ValueError(f"No model version has been promoted in {self.root}")
+        mmap_mode = "r" if mmap else None
+        directory = self.version_dir(version)
+        vectorizer = joblib.load(os.path.join(directory, BOW_FILE), mmap_mode=mmap_mode)
+        model = joblib.load(os.path.join(directory, MODEL_FILE), mmap_mode=mmap_mode)
+        return vectorizer, model, version
+
+
+def main():
+    """
+    Main function to register, promote and list model versions.
+    """
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts.")
+    parser.add_argument("--root", type=str, default=DEFAULT_ROOT)
+    commands = parser.add_subparsers(dest="command", required=True)
+    register = commands.add_parser("register", help="Register the current training outputs.")
+    register.add_argument("--bow", type=str, default=os.path.join("output", BOW_FILE))
+    register.add_argument("--model", type=str, default=os.path.join("output", MODEL_FILE))
+    register.add_argument("--metrics", type=str, default=None, help="JSON file of evaluation metrics.")
+    register.add_argument("--params", type=str, default="params.yaml")
+    register.add_argument("--data", type=str, nargs="*", default=[], help="Input files to checksum for lineage.")
+    register.add_argument("--promote", action="store_true")
+    promote = commands.add_parser("promote", help="Make a version current.")
+    promote.add_argument("version", type=str)
+    commands.add_parser("list", help="List the registered versions.")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "register":
+        metrics = {}
+        if args.metrics:
+            with open(args.metrics, "r", encoding="utf-8") as f:
+                metrics = json.load(f)
+        lineage = {"inputs": {path: sha256_file(path) for path in args.data}}
+        if os.path.exists(args.params):
+            import yaml  # pylint: disable=import-outside-toplevel
+
+            with open(args.params, "r", encoding="utf-8") as f:
+                lineage["params"] = yaml.safe_load(f)
+        version = registry.register(args.bow, args.model, metrics, lineage, args.promote)
+        print(f"Registered {version}" + (" (current)" if args.promote else ""))
+    elif args.command == "promote":
+        registry.promote(args.version)
+        print(f"Promoted {args.version}")
+    else:
+        current = registry.current()
+        for version in registry.versions():
+            accuracy = registry.metadata(version)["metrics"].get("accuracy")
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  accuracy={accuracy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Shadow-mode evaluation of a candidate model against the incumbent on replayed traffic.
+
+- Streams a JSONL request log (the `requests.jsonl` format of `scripts/load_test.py`) once,
+  in batches, without loading it whole.
+- Vectorizes every batch once and runs both models on the shared features; the dense copy
+  GaussianNB needs is also built at most once per batch. Only when the candidate ships a
+  vectorizer with different state is the batch vectorized a second time.
+- Reports the agreement rate, the disagreement rate per slice (review length, incumbent
+  prediction and any request field named with `--slice_field`), accuracy when requests
+  carry a label, and the predict latency of each model next to the shared vectorization cost.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import joblib
+import numpy as np
+
+from src.features import vectorize_reviews
+from src.memoize import content_hash
+from src.predictor import accepts_sparse
+from src.profiling import add_profile_argument, profile_run
+from src.timing import timed, timing_session
+
+REVIEW_FIELDS = ("review", "Review", "text", "body")
+LABEL_FIELDS = ("label", "Liked", "sentiment")
+LENGTH_SLICES = ((0, 5, "short"), (5, 20, "medium"), (20, None, "long"))
+BATCH_SIZE = 256
+MAX_EXAMPLES = 20
+
+
+def iter_request_batches(path, batch_size=BATCH_SIZE):
+    """
+    Stream a JSONL request log in batches.
+
+    Args:
+        path (str): Path of the log; one JSON object (or a bare review string) per line.
+        batch_size (int, optional): Requests per batch. Defaults to 256.
+
+    Yields:
+        list[dict]: The next batch of requests, each with at least a `review` key.
+
+    Raises:
+        KeyError: If a request has none of the review fields.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        records = (_parse_request(line) for line in f if line.strip())
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def _parse_request(line):
+    record = json.loads(line)
+    if isinstance(record, str):
+        return {"review": record}
+    for key in REVIEW_FIELDS:
+        if key in record:
+            return {**record, "review": str(record[key])}
+    raise KeyError(f"Request has none of the fields {REVIEW_FIELDS}: {line[:80]}")
+
+
+def _length_slice(review):
+    words = len(review.split())
+    return next(name for low, high, name in LENGTH_SLICES if words >= low and (high is None or words < high))
+
+
+def _label(record):
+    for key in LABEL_FIELDS:
+        if record.get(key) is not None:
+            return int(record[key])
+    return None
+
+
+@dataclass
+class FeatureBatch:
+    """
+    Features of one request batch, shared by the models evaluated on it.
+
+    Args:
+        sparse (scipy.sparse.csr_matrix): Vectorized batch.
+    """
+
+    sparse: Any
+    _dense: Any = field(default=None, init=False, repr=False)
+
+    def for_model(self, model):
+        """Sparse features for models that accept them, dense ones (built once) for GaussianNB."""
+        if accepts_sparse(model):
+            return self.sparse
+        if self._dense is None:
+            self._dense = np.asarray(self.sparse.toarray())  # pylint: disable=dense-sparse-matrix
+        return self._dense
+
+
+@dataclass
+class _ShadowStats:
+    """Counts and timings a `ShadowEvaluator` accumulates over the batches."""
+
+    requests: int = 0
+    agreements: int = 0
+    labeled: int = 0
+    vectorize_s: float = 0.0
+    batch_ms: dict = field(default_factory=lambda: {"incumbent": [], "candidate": []})
+    correct: dict = field(default_factory=lambda: {"incumbent": 0, "candidate": 0})
+    slices: dict = field(default_factory=dict)
+
+
+class ShadowEvaluator:
+    """
+    Accumulate agreement and latency statistics of two models over request batches.
+
+    Args:
+        vectorizer (object): The incumbent's fitted vectorizer.
+        incumbent (object): The model currently serving.
+        candidate (object): The model evaluated in shadow mode.
+        candidate_vectorizer (object, optional): The candidate's vectorizer; batches are
+            only vectorized twice if its state differs from the incumbent's. Defaults to None.
+        slice_fields (tuple[str], optional): Request fields to slice disagreements by. Defaults to ().
+    """
+
+    def __init__(self, vectorizer, incumbent, candidate, candidate_vectorizer=None, slice_fields=()):
+        self.vectorizer = vectorizer
+        self.models = {"incumbent": incumbent, "candidate": candidate}
+        self.candidate_vectorizer = None
+        if candidate_vectorizer is not None and content_hash(candidate_vectorizer) != content_hash(vectorizer):
+            self.candidate_vectorizer = candidate_vectorizer
+        self.slice_fields = tuple(slice_fields)
+        self.stats = _ShadowStats()
+        self.examples = []
+
+    def _vectorize(self, vectorizer, reviews):
+        start = time.perf_counter()
+        batch = FeatureBatch(vectorize_reviews(vectorizer, reviews))
+        self.stats.vectorize_s += time.perf_counter() - start
+        return batch
+
+    def _predict(self, name, features):
+        model = self.models[name]
+        start = time.perf_counter()
+        predictions = np.asarray(model.predict(features.for_model(model)))
+        self.stats.batch_ms[name].append((time.perf_counter() - start) * 1000)
+        return predictions
+
+    def update(self, records):
+        """
+        Run both models on one batch of requests.
+
+        Args:
+            records (list[dict]): Requests from `iter_request_batches`.
+        """
+        reviews = [record["review"] for record in records]
+        features = self._vectorize(self.vectorizer, reviews)
+        candidate_features = features
+        if self.candidate_vectorizer is not None:
+            candidate_features = self._vectorize(self.candidate_vectorizer, reviews)
+        incumbent = self._predict("incumbent", features)
+        candidate = self._predict("candidate", candidate_features)
+
+        agree = incumbent == candidate
+        self.stats.requests += len(records)
+        self.stats.agreements += int(agree.sum())
+        for record, old, new, same in zip(records, incumbent, candidate, agree):
+            keys = [("length", _length_slice(record["review"])), ("incumbent_prediction", str(old))]
+            keys += [(name, str(record[name])) for name in self.slice_fields if name in record]
+            for key in keys:
+                counts = self.stats.slices.setdefault(key, [0, 0])
+                counts[0] += 1
+                counts[1] += int(not same)
+            label = _label(record)
+            if label is not None:
+                self.stats.labeled += 1
+                self.stats.correct["incumbent"] += int(old == label)
+                self.stats.correct["candidate"] += int(new == label)
+            if not same and len(self.examples) < MAX_EXAMPLES:
+                self.examples.append({"review": record["review"], "incumbent": int(old), "candidate": int(new)})
+
+    def report(self):
+        """
+        Summarize the evaluation.
+
+        Returns:
+            dict: Agreement rate, per-slice disagreement, accuracy on labeled requests,
+                latency per model and example disagreements.
+        """
+        stats = self.stats
+        slices = {}
+        for (name, value), (count, disagreements) in sorted(stats.slices.items()):
+            slices.setdefault(name, {})[value] = {
+                "requests": count,
+                "disagreement_rate": disagreements / count,
+            }
+        latency = {"vectorize_ms": stats.vectorize_s * 1000, "shared_features": self.candidate_vectorizer is None}
+        for name, batch_ms in stats.batch_ms.items():
+            total_ms = float(np.sum(batch_ms)) if batch_ms else 0.0
+            latency[name] = {
+                "total_ms": total_ms,
+                "per_request_us": total_ms * 1000 / max(stats.requests, 1),
+                "p50_batch_ms": float(np.percentile(batch_ms, 50)) if batch_ms else 0.0,
+                "p95_batch_ms": float(np.percentile(batch_ms, 95)) if batch_ms else 0.0,
+            }
+        report = {
+            "requests": stats.requests,
+            "batches": len(stats.batch_ms["incumbent"]),
+            "agreement_rate": stats.agreements / max(stats.requests, 1),
+            "disagreements": stats.requests - stats.agreements,
+            "slices": slices,
+            "latency": latency,
+            "examples": self.examples,
+        }
+        if stats.labeled:
+            report["accuracy"] = {name: correct / stats.labeled for name, correct in stats.correct.items()}
+            report["labeled_requests"] = stats.labeled
+        return report
+
+
+def run_shadow_evaluation(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    requests_path, bow_path, model_path, candidate_path, report_path,
+    candidate_bow_path=None, slice_fields=(), batch_size=BATCH_SIZE,
+):
+    """
+    Replay a request log through the incumbent and the candidate and save the report.
+
+    Args:
+        requests_path (str): Path of the JSONL request log.
+        bow_path (str): Path of the incumbent's pickled vectorizer.
+        model_path (str): Path of the incumbent model.
+        candidate_path (str): Path of the candidate model.
+        report_path (str): File path of the JSON report.
+        candidate_bow_path (str, optional): Candidate's vectorizer, if it has its own. Defaults to None.
+        slice_fields (tuple[str], optional): Request fields to slice disagreements by. Defaults to ().
+        batch_size (int, optional): Requests per batch. Defaults to 256.
+
+    Returns:
+        dict: The shadow evaluation report.
+    """
+    with timed("load"):
+        evaluator = ShadowEvaluator(
+            joblib.load(bow_path),
+            joblib.load(model_path),
+            joblib.load(candidate_path),
+            joblib.load(candidate_bow_path) if candidate_bow_path else None,
+            slice_fields,
+        )
+    with timed("replay"):
+        for batch in iter_request_batches(requests_path, batch_size):
+            evaluator.update(batch)
+    report = evaluator.report()
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    """
+    Main function to compare a candidate model with the incumbent on a request log.
+    """
+    parser = argparse.ArgumentParser(description="Shadow-evaluate a candidate model on replayed requests.")
+    parser.add_argument("--requests", type=str, default="requests.jsonl")
+    parser.add_argument("--candidate", type=str, required=True, help="Path of the candidate model.")
+    parser.add_argument("--candidate_bow", type=str, default=None, help="Candidate vectorizer, if it has its own.")
+    parser.add_argument(
+        "--bow", type=str, default=os.path.join("output", "c1_BoW_Sentiment_Model.pkl")
+    )
+    parser.add_argument(
+        "--model", type=str, default=os.path.join("output", "c2_Classifier_Sentiment_Model.pkl")
+    )
+    parser.add_argument("--report", type=str, default=os.path.join("metrics", "shadow.json"))
+    parser.add_argument("--slice_field", type=str, action="append", default=[])
+    parser.add_argument("--batch_size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--timings_output", type=str, default=None)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    with profile_run("shadow", args.profile), timing_session("shadow", args.timings_output):
+        report = run_shadow_evaluation(
+            args.requests, args.bow, args.model, args.candidate, args.report,
+            args.candidate_bow, args.slice_field, args.batch_size,
+        )
+    latency = report["latency"]
+    print(
+        f"Agreement {report['agreement_rate']:.1%} over {report['requests']} requests; "
+        f"predict {latency['incumbent']['per_request_us']:.1f} us/request (incumbent) vs "
+        f"{latency['candidate']['per_request_us']:.1f} us/request (candidate), "
+        f"vectorization {latency['vectorize_ms']:.0f} ms total"
+    )
+
+
+if __name__ == "__main__":
+    main()
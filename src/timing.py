@@ -0,0 +1,199 @@
+"""
+Lightweight timing instrumentation for the sentiment analysis pipeline stages.
+
+- Wraps key steps (loading, preprocessing, fitting, predicting, saving) in named spans.
+- Merges per-stage step durations into `metrics/timings.json` so DVC can diff them across experiments.
+- Optionally exports every span as a Chrome trace (open in chrome://tracing or https://ui.perfetto.dev).
+
+Spans are marked with the `timed` context manager or the `timed_stage` decorator. Both
+return immediately unless a timing session is active, so instrumented code runs at
+full speed in tests and notebooks.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_ACTIVE_TIMER = None
+_NULL_CONTEXT = nullcontext()
+
+
+class StageTimer:
+    """
+    Record named spans for one pipeline stage.
+
+    Args:
+        stage (str): Name of the pipeline stage, used as the section key in the timings file.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.spans = []
+        self._origin_ns = time.perf_counter_ns()
+        self._depth = threading.local()
+
+    @contextmanager
+    def span(self, name):
+        """
+        Time the enclosed block as a span called `name`.
+
+        Args:
+            name (str): Name of the step being timed.
+        """
+        depth = getattr(self._depth, "value", 0)
+        self._depth.value = depth + 1
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self._depth.value = depth
+            self.spans.append(
+                {
+                    "name": name,
+                    "start_ns": start - self._origin_ns,
+                    "duration_ns": end - start,
+                    "depth": depth,
+                    "tid": threading.get_ident(),
+                }
+            )
+
+    def summary(self):
+        """
+        Aggregate spans into total seconds per step name.
+
+        Returns:
+            dict: Mapping of step name to total duration in seconds, plus a `total` entry.
+        """
+        totals = {}
+        for span in self.spans:
+            totals[span["name"]] = totals.get(span["name"], 0) + span["duration_ns"]
+        summary = {name: round(ns / 1e9, 6) for name, ns in totals.items()}
+        summary["total"] = round((time.perf_counter_ns() - self._origin_ns) / 1e9, 6)
+        return summary
+
+    def chrome_trace(self):
+        """
+        Convert the recorded spans to Chrome trace event format.
+
+        Returns:
+            dict: Trace document with complete ("X") events in microseconds.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": span["name"],
+                "cat": self.stage,
+                "ph": "X",
+                "ts": span["start_ns"] / 1000,
+                "dur": span["duration_ns"] / 1000,
+                "pid": pid,
+                "tid": span["tid"],
+            }
+            for span in sorted(self.spans, key=lambda s: (s["start_ns"], s["depth"]))
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def save_timings(output_path, stage, summary):
+    """
+    Merge a stage's timing summary into a shared timings JSON file.
+
+    Other stages' sections are preserved so one file covers the whole pipeline.
+
+    Args:
+        output_path (str): Path of the timings JSON file.
+        stage (str): Section key for this stage.
+        summary (dict): Mapping of step name to duration in seconds.
+
+    Returns:
+        str: The output path where timings were saved.
+    """
+    timings = {}
+    if os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            try:
+                timings = json.load(f)
+            except json.JSONDecodeError:
+                timings = {}
+    timings[stage] = summary
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(timings, f, indent=2, sort_keys=True)
+    return output_path
+
+
+@contextmanager
+def timing_session(stage, output_path=None, trace_output=None):
+    """
+    Activate timing for the enclosed block and save the results afterwards.
+
+    Does nothing when both outputs are None, so CLIs can pass optional arguments straight through.
+
+    Args:
+        stage (str): Name of the pipeline stage.
+        output_path (str, optional): Timings JSON to merge the stage summary into. Defaults to None.
+        trace_output (str, optional): Path for a Chrome trace JSON export. Defaults to None.
+
+    Yields:
+        StageTimer or None: The active timer, or None when disabled.
+    """
+    global _ACTIVE_TIMER  # pylint: disable=global-statement
+    if output_path is None and trace_output is None:
+        yield None
+        return
+    timer = StageTimer(stage)
+    previous = _ACTIVE_TIMER
+    _ACTIVE_TIMER = timer
+    try:
+        yield timer
+    finally:
+        _ACTIVE_TIMER = previous
+        if output_path:
+            save_timings(output_path, stage, timer.summary())
+        if trace_output:
+            os.makedirs(os.path.dirname(trace_output) or ".", exist_ok=True)
+            with open(trace_output, "w", encoding="utf-8") as f:
+                json.dump(timer.chrome_trace(), f)
+
+
+def timed(name):
+    """
+    Return a context manager timing `name` on the active session, or a no-op one.
+
+    Args:
+        name (str): Name of the step being timed.
+
+    Returns:
+        contextlib.AbstractContextManager: Context manager for the step.
+    """
+    if _ACTIVE_TIMER is None:
+        return _NULL_CONTEXT
+    return _ACTIVE_TIMER.span(name)
+
+
+def timed_stage(name):
+    """
+    Decorate a function so each call is recorded as span `name` when timing is active.
+
+    Args:
+        name (str): Name of the step being timed.
+
+    Returns:
+        callable: Decorator.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _ACTIVE_TIMER is None:
+                return func(*args, **kwargs)
+            with _ACTIVE_TIMER.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,21 +1,45 @@
 """
-Training script for sentiment classifier using Gaussian Naive Bayes.
-
-- Loads preprocessed data (X and y).
-- Either trains on the full dataset or performs a train/test split.
+Training script for the sentiment classifier.
+
+- Loads preprocessed data (X as CSR, and y).
+- Either trains on the full dataset or performs a train/test split, optionally keeping
+  duplicate groups from preprocessing on one side of the split.
+- Trains the model selected by `train.model` in params.yaml: Gaussian Naive Bayes, or a
+  linear classifier fitted with mini-batch SGD on CSR batches of the features, with
+  early stopping on a validation split. GaussianNB needs dense input, so only its
+  training rows (and prediction batches) are densified. With
+  `train.ensemble.n_members` > 1, an ensemble of them is trained in parallel (`src.ensemble`).
 - Saves the trained model and optionally the test set for evaluation.
+- Optionally saves a compact training-set summary for drift monitoring (`src.drift`).
+
+joblib, PyYAML and scikit-learn are imported where they are used, so `--help` and
+`parse_args` stay fast.
 """
 
 import argparse
 import json
+import math
 import os
 
-import joblib
 import numpy as np
-import yaml
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
-from sklearn.naive_bayes import GaussianNB
+
+from src.features import load_features, save_features
+from src.memoize import memoize
+from src.memory_tracking import memory_profiling, memory_stage
+from src.profiling import INSTRUMENTATION_DEFAULTS, add_instrumentation_arguments, profile_run
+from src.timing import timed, timing_session
+
+MODEL_TYPES = ("gaussian_nb", "sgd")
+PREDICT_BATCH_ROWS = 4096
+DEFAULT_SGD = {
+    "loss": "log_loss",
+    "alpha": 1e-4,
+    "batch_size": 1024,
+    "max_epochs": 20,
+    "validation_fraction": 0.1,
+    "n_iter_no_change": 3,
+    "tol": 1e-4,
+}
 
 
 def parse_args():
@@ -26,31 +50,44 @@ def parse_args():
 
     Returns:
         argparse.Namespace: Parsed arguments with attributes:
-            - data (str): Path to the input features (X) NumPy file.
+            - data (str): Path to the input features (X), a CSR `.npz` file.
             - labels (str): Path to the input labels (y) NumPy file.
+            - groups (str, optional): Path to the duplicate group ids NumPy file.
             - output (str): Directory to save the trained model.
             - split_output_dir (str, optional): Directory to save test split data.
             - train_metrics_output (str, optional): File path to save training metrics JSON.
+            - summary_output (str, optional): File path to save the training summary for drift checks.
+            - memory_output (str, optional): File path to save the per-stage memory report JSON.
+            - memory_mode (str): "full" for tracemalloc and RSS sampling, "rss" for RSS sampling only.
+            - timings_output (str, optional): File path of the timings JSON to merge step durations into.
+            - trace_output (str, optional): File path to save a Chrome trace of the stage.
+            - profile (str, optional): Directory for cProfile output; profiling is off when unset.
     """
     # Avoid parsing args when run inside pytest
     if "PYTEST_CURRENT_TEST" in os.environ:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
         return argparse.Namespace(
-            data=os.path.join(base_dir, "data", "X.npy"),
+            data=os.path.join(base_dir, "data", "X.npz"),
             labels=os.path.join(base_dir, "data", "y.npy"),
+            groups=None,
             output=os.path.join(base_dir, "models"),
             split_output_dir=os.path.join(base_dir, "data", "split"),
             train_metrics_output=os.path.join(
                 base_dir, "metrics", "train_metrics.json"
             ),
+            summary_output=None,
+            **INSTRUMENTATION_DEFAULTS,
         )
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", type=str, required=True)
     parser.add_argument("--labels", type=str, required=True)
+    parser.add_argument("--groups", type=str)
     parser.add_argument("--output", type=str, required=True)
     parser.add_argument("--split_output_dir", type=str)
     parser.add_argument("--train_metrics_output", type=str)
+    parser.add_argument("--summary_output", type=str)
+    add_instrumentation_arguments(parser)
     return parser.parse_args()
 
 
@@ -70,16 +107,33 @@ def load_params(path="params.yaml"):
             - random_state (int): Random seed for reproducibility.
             - priors (list or None): Prior probabilities for GaussianNB.
             - var_smoothing (float): Variance smoothing parameter for GaussianNB.
+            - model (str): Model type, "gaussian_nb" or "sgd".
+            - sgd (dict): SGD settings (see `DEFAULT_SGD`).
+            - ensemble (dict): Ensemble settings (see `src.ensemble.DEFAULT_ENSEMBLE`); one
+              member trains a single model.
+
+    Raises:
+        ValueError: If the model type or the ensemble strategy is unknown.
     """
+    import yaml  # pylint: disable=import-outside-toplevel
+
+    from src.ensemble import ensemble_config  # pylint: disable=import-outside-toplevel
+
     with open(path, "r", encoding="utf-8") as f:
         params = yaml.safe_load(f)
     train = params.get("train", {})
+    model = train.get("model", "gaussian_nb")
+    if model not in MODEL_TYPES:
+        raise ValueError(f"Unknown model {model!r}, expected one of {MODEL_TYPES}")
     return {
         "train_all": train.get("train_all", False),
         "test_size": train.get("test_size", 0.2),
         "random_state": train.get("random_state", 20),
         "priors": params.get("priors", None),
         "var_smoothing": params.get("var_smoothing", 1e-9),
+        "model": model,
+        "sgd": {**DEFAULT_SGD, **(train.get("sgd") or {})},
+        "ensemble": ensemble_config(train.get("ensemble")),
     }
 
 
@@ -100,54 +154,278 @@ def save_json(path, obj):
 
 def save_split_data(output_dir, X_test, y_test):
     """
-    Save test split feature and label arrays as NumPy files.
+    Save the test split features as CSR (`X_test.npz`) and the labels as a NumPy file.
 
     Creates the output directory if it does not exist.
 
     Args:
         output_dir (str): Directory to save the test split data.
-        X_test (np.ndarray): Test set features.
+        X_test (np.ndarray or scipy.sparse matrix): Test set features.
         y_test (np.ndarray): Test set labels.
     """
     os.makedirs(output_dir, exist_ok=True)
-    np.save(os.path.join(output_dir, "X_test.npy"), X_test)
+    save_features(os.path.join(output_dir, "X_test.npz"), X_test)
     np.save(os.path.join(output_dir, "y_test.npy"), y_test)
 
 
+def split_indices(y, config, groups=None):
+    """
+    Row indices of the train and test sets.
+
+    Without groups, or when every group is a single row, this is `train_test_split`, so the
+    split is unchanged for data without duplicates. Otherwise whole groups are assigned to
+    one side so duplicate reviews never leak from the train set into the test set.
+
+    Args:
+        y (np.ndarray): Labels.
+        config (dict): Configuration with `test_size` and `random_state`.
+        groups (np.ndarray, optional): Group id of every row. Defaults to None.
+
+    Returns:
+        tuple: train_idx, test_idx.
+    """
+    from sklearn.model_selection import (  # pylint: disable=import-outside-toplevel
+        GroupShuffleSplit, train_test_split)
+
+    rows = np.arange(len(y))
+    if groups is None or len(np.unique(groups)) == len(groups):
+        return train_test_split(
+            rows, test_size=config["test_size"], random_state=config["random_state"]
+        )
+    splitter = GroupShuffleSplit(
+        n_splits=1, test_size=config["test_size"], random_state=config["random_state"]
+    )
+    return next(splitter.split(rows, y, groups))
+
+
+def split_data(X, y, config, groups=None):
+    """
+    Split features and labels into train and test sets (see `split_indices`).
+
+    Args:
+        X (np.ndarray): Feature matrix.
+        y (np.ndarray): Labels.
+        config (dict): Configuration with `test_size` and `random_state`.
+        groups (np.ndarray, optional): Group id of every row. Defaults to None.
+
+    Returns:
+        tuple: X_train, X_test, y_train, y_test.
+    """
+    train_idx, test_idx = split_indices(y, config, groups)
+    return X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+
+def csr_rows(X, rows):
+    """
+    Rows of a dense, memory-mapped or sparse feature matrix as a CSR matrix.
+
+    Args:
+        X (np.ndarray or scipy.sparse matrix): Feature matrix.
+        rows (np.ndarray): Sorted row indices, so reads from a memory map are sequential.
+
+    Returns:
+        scipy.sparse.csr_matrix: The selected rows.
+    """
+    import scipy.sparse as sp  # pylint: disable=import-outside-toplevel
+
+    if sp.issparse(X):
+        return X.tocsr()[rows]
+    return sp.csr_matrix(np.asarray(X[rows]))
+
+
+def dense_rows(X, rows=None):
+    """
+    Rows of a dense, memory-mapped or sparse feature matrix as a dense array, for GaussianNB.
+
+    Args:
+        X (np.ndarray or scipy.sparse matrix): Feature matrix.
+        rows (np.ndarray, optional): Row indices. Defaults to all rows.
+
+    Returns:
+        np.ndarray: The selected rows.
+    """
+    import scipy.sparse as sp  # pylint: disable=import-outside-toplevel
+
+    if rows is not None:
+        X = X.tocsr()[rows] if sp.issparse(X) else X[rows]
+    if sp.issparse(X):
+        return X.toarray()  # pylint: disable=dense-sparse-matrix
+    return np.asarray(X)
+
+
+def predict_rows(model, X, rows=None, batch_rows=PREDICT_BATCH_ROWS):
+    """
+    Predictions of a model for the given rows, `batch_rows` at a time.
+
+    Models that accept sparse input get CSR batches; GaussianNB gets dense ones, so at most
+    `batch_rows` rows are densified at once.
+
+    Args:
+        model (object): The fitted classifier.
+        X (np.ndarray or scipy.sparse matrix): Feature matrix, possibly memory-mapped.
+        rows (np.ndarray, optional): Sorted row indices, so reads from a memory map are
+            sequential. Defaults to all rows.
+        batch_rows (int, optional): Rows predicted at a time. Defaults to 4096.
+
+    Returns:
+        np.ndarray: Predicted label of each row.
+    """
+    from src.predictor import accepts_sparse  # pylint: disable=import-outside-toplevel
+
+    rows = np.arange(X.shape[0]) if rows is None else rows
+    select = csr_rows if accepts_sparse(model) else dense_rows
+    # No rows still make one predict call, so the model rejects empty input as it would unbatched
+    starts = range(0, len(rows), batch_rows) or range(1)
+    predictions = [
+        model.predict(select(X, rows[start : start + batch_rows]))  # pylint: disable=predict-in-loop
+        for start in starts
+    ]
+    return np.concatenate(predictions)
+
+
+def train_accuracy(model, X, y, rows, batch_rows=PREDICT_BATCH_ROWS):
+    """
+    Accuracy of a model on the given rows, predicted `batch_rows` at a time.
+
+    Args:
+        model (object): The fitted classifier.
+        X (np.ndarray or scipy.sparse matrix): Feature matrix, possibly memory-mapped.
+        y (np.ndarray): Labels of every row of `X`.
+        rows (np.ndarray): Sorted row indices, so reads from a memory map are sequential.
+        batch_rows (int, optional): Rows predicted at a time. Defaults to 4096.
+
+    Returns:
+        float: Share of correctly predicted rows.
+    """
+    return float((predict_rows(model, X, rows, batch_rows) == y[rows]).mean())
+
+
 def fit_naive_bayes(X_train, y_train, config):
     """
     Trains and returns a GaussianNB model without saving.
     Useful for programmatic use.
+
+    GaussianNB needs dense input, so sparse training features are densified here and
+    nowhere earlier. The "fit" span is recorded outside the memoized fit, so a cache hit
+    still shows up in the timings.
     """
+    with timed("fit"):
+        return _fit_naive_bayes(X_train, y_train, config)
+
+
+@memoize("fit", packages=("scikit-learn",))
+def _fit_naive_bayes(X_train, y_train, config):
+    from sklearn.naive_bayes import GaussianNB  # pylint: disable=import-outside-toplevel
+
     model = GaussianNB(var_smoothing=config["var_smoothing"], priors=config["priors"])
-    model.fit(X_train, y_train)
+    return model.fit(dense_rows(X_train), y_train)
+
+
+def fit_sgd(X, y, config, rows=None):
+    """
+    Trains a linear classifier with mini-batch SGD, streaming CSR batches of `X`.
+
+    `X` may be memory-mapped: only the rows of the current batch are read and converted to
+    CSR. A `validation_fraction` of the rows is held out; training stops once validation
+    accuracy has not improved by `tol` for `n_iter_no_change` epochs, and the coefficients
+    of the best epoch are kept. Predicting is a single sparse dot product.
+
+    Args:
+        X (np.ndarray or scipy.sparse matrix): Feature matrix, possibly memory-mapped.
+        y (np.ndarray): Labels of every row of `X`.
+        config (dict): Configuration with `random_state` and the `sgd` settings.
+        rows (np.ndarray, optional): Rows to train on. Defaults to all rows.
+
+    Returns:
+        SGDClassifier: The trained model.
+    """
+    with timed("fit"):
+        return _fit_sgd(X, y, config, rows)
+
+
+@memoize("fit", packages=("scikit-learn",))
+def _fit_sgd(X, y, config, rows):
+    from sklearn.linear_model import SGDClassifier  # pylint: disable=import-outside-toplevel
+
+    sgd = config["sgd"]
+    rng = np.random.default_rng(config["random_state"])
+    rows = rng.permutation(np.arange(X.shape[0]) if rows is None else np.asarray(rows))
+    n_val = int(len(rows) * sgd["validation_fraction"])
+    val_rows, train_rows = np.sort(rows[:n_val]), rows[n_val:]
+    X_val, y_val = csr_rows(X, val_rows), y[val_rows]
+    classes = np.unique(y[rows])
+    n_batches = max(1, math.ceil(len(train_rows) / sgd["batch_size"]))
+
+    model = SGDClassifier(loss=sgd["loss"], alpha=sgd["alpha"], random_state=config["random_state"])
+    best_score, best_params, stale = -np.inf, None, 0
+    for _ in range(sgd["max_epochs"]):
+        for batch in np.array_split(rng.permutation(train_rows), n_batches):
+            batch = np.sort(batch)
+            model.partial_fit(csr_rows(X, batch), y[batch], classes=classes)
+        if not n_val:
+            continue
+        score = model.score(X_val, y_val)
+        if score > best_score + sgd["tol"]:
+            best_score, best_params, stale = score, (model.coef_.copy(), model.intercept_.copy()), 0
+        else:
+            stale += 1
+            if stale >= sgd["n_iter_no_change"]:
+                break
+    if best_params is not None:
+        model.coef_, model.intercept_ = best_params
     return model
 
 
-def train_model(X, y, config, args):
+@memory_stage("train_model")
+def train_model(X, y, config, args, groups=None):
     """
     Full pipeline with saving and splitting, used from CLI.
+
+    `X` stays sparse: the SGD model and ensembles read CSR batches of the training rows,
+    and GaussianNB densifies only its training rows. The train accuracy and the drift
+    summary are computed batch by batch, and only when requested.
+
+    Returns:
+        tuple: The trained model and the test split (X_test, y_test), which is None
+            when training on all data.
     """
-    if config["train_all"]:
+    import joblib  # pylint: disable=import-outside-toplevel
+
+    X_test = y_test = train_idx = None
+    if not config["train_all"]:
+        with timed("split"):
+            train_idx, test_idx = split_indices(y, config, groups)
+            X_test, y_test = csr_rows(X, test_idx), y[test_idx]
+    if config.get("ensemble", {}).get("n_members", 1) > 1:
+        from src.ensemble import fit_ensemble  # pylint: disable=import-outside-toplevel
+
+        model = fit_ensemble(X, y, config, train_idx)
+    elif config.get("model") == "sgd":
+        model = fit_sgd(X, y, config, train_idx)
+    elif train_idx is None:
         model = fit_naive_bayes(X, y, config)
-        if args.train_metrics_output:
-            acc = accuracy_score(y, model.predict(X))
-            save_json(args.train_metrics_output, {"train_accuracy": acc})
     else:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=config["test_size"], random_state=config["random_state"]
-        )
-        model = fit_naive_bayes(X_train, y_train, config)
-
-        if args.train_metrics_output:
-            acc = accuracy_score(y_train, model.predict(X_train))
-            save_json(args.train_metrics_output, {"train_accuracy": acc})
-
-        if args.split_output_dir:
+        model = fit_naive_bayes(X[train_idx], y[train_idx], config)
+    # Rows in stored order, so batches are sequential reads
+    train_rows = np.arange(len(y)) if train_idx is None else np.sort(train_idx)
+    if args.train_metrics_output:
+        with timed("predict_train"):
+            acc = train_accuracy(model, X, y, train_rows)
+        save_json(args.train_metrics_output, {"train_accuracy": acc})
+
+    if X_test is not None and args.split_output_dir:
+        with timed("save"):
             save_split_data(args.split_output_dir, X_test, y_test)
 
-    os.makedirs(args.output, exist_ok=True)
-    joblib.dump(model, os.path.join(args.output, "c2_Classifier_Sentiment_Model.pkl"))
+    with timed("save"):
+        os.makedirs(args.output, exist_ok=True)
+        joblib.dump(model, os.path.join(args.output, "c2_Classifier_Sentiment_Model.pkl"))
+        if args.summary_output:
+            from src.drift import (  # pylint: disable=import-outside-toplevel
+                save_summary, summarize_training)
+
+            save_summary(args.summary_output, summarize_training(X, y, model, train_rows))
+    return model, X_test, y_test
 
 
 def main():
@@ -158,9 +436,15 @@ def main():
     """
     args = parse_args()
     config = load_params()
-    X = np.load(args.data)
-    y = np.load(args.labels)
-    train_model(X, y, config, args)
+    with profile_run("train_model", args.profile), timing_session(
+        "train_model", args.timings_output, args.trace_output
+    ):
+        with timed("load_data"):
+            X = load_features(args.data)
+            y = np.load(args.labels, mmap_mode=None)  # Labels and group ids are small: load eagerly
+            groups = np.load(args.groups, mmap_mode=None) if args.groups else None
+        with memory_profiling(args.memory_output, args.memory_mode):
+            train_model(X, y, config, args, groups)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+"""
+Schema validation stage run before preprocessing.
+
+- Checks column presence, dtypes, nulls, allowed label values, text-length bounds and
+  duplicate reviews with vectorized pandas/NumPy operations (no per-row Python loops).
+- Streams Parquet or TSV input in chunks, carrying duplicate hashes across chunks, and
+  stops at the first chunk with a hard error so bad dumps fail cheaply.
+- Writes a JSON validation report and exits non-zero when the data does not match the schema.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.ingest import iter_chunks
+from src.profiling import add_profile_argument, profile_run
+from src.timing import timed, timing_session
+
+DEFAULT_SCHEMA = {
+    "Review": {
+        "dtype": "string",
+        "nullable": False,
+        "min_length": 1,
+        "max_length": 1000,
+        "max_duplicate_fraction": 0.05,
+    },
+    "Liked": {"dtype": "integer", "nullable": False, "allowed_values": [0, 1]},
+}
+CHUNK_ROWS = 100_000
+MAX_EXAMPLES = 5
+
+
+class DataValidationError(ValueError):
+    """Raised when a dataset does not match its schema; `report` holds the details."""
+
+    def __init__(self, report):
+        super().__init__("; ".join(report["errors"]))
+        self.report = report
+
+
+def _dtype_matches(series, expected):
+    if expected == "string":
+        return pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty")
+    if expected == "integer":
+        return pd.api.types.is_integer_dtype(series.dtype)
+    if expected == "float":
+        return pd.api.types.is_numeric_dtype(series.dtype)
+    if expected == "boolean":
+        return pd.api.types.is_bool_dtype(series.dtype)
+    raise ValueError(f"Unknown dtype {expected!r} in schema")
+
+
+def _examples(mask, offset):
+    return (np.flatnonzero(mask)[:MAX_EXAMPLES] + offset).tolist()
+
+
+class SchemaValidator:
+    """
+    Validate a dataset chunk by chunk and accumulate a report.
+
+    Args:
+        schema (dict, optional): Column name -> rules. Defaults to DEFAULT_SCHEMA.
+        fail_fast (bool, optional): Stop accepting chunks after the first hard error. Defaults to True.
+    """
+
+    def __init__(self, schema=None, fail_fast=True):
+        self.schema = schema or DEFAULT_SCHEMA
+        self.fail_fast = fail_fast
+        self.rows = 0
+        self.chunks = 0
+        self.errors = []
+        self.columns = {
+            col: {"nulls": 0, "invalid_values": 0, "too_short": 0, "too_long": 0, "examples": {}}
+            for col in self.schema
+        }
+        self._seen = {
+            col: np.empty(0, dtype=np.uint64)
+            for col, rules in self.schema.items()
+            if "max_duplicate_fraction" in rules
+        }
+        for col in self._seen:
+            self.columns[col]["duplicates"] = 0
+
+    @property
+    def failed(self):
+        """bool: Whether a hard error has been found so far."""
+        return bool(self.errors)
+
+    def check_columns(self, columns):
+        """
+        Check that every schema column is present.
+
+        Args:
+            columns (list[str]): Column names of the dataset.
+
+        Returns:
+            bool: True if all schema columns are present.
+        """
+        missing = [col for col in self.schema if col not in columns]
+        for col in missing:
+            self.errors.append(f"Missing column: {col}")
+        return not missing
+
+    def _count(self, col, check, mask, offset, message):
+        count = int(mask.sum())
+        if count:
+            stats = self.columns[col]
+            stats[check] += count
+            stats["examples"].setdefault(check, _examples(mask, offset))
+            self.errors.append(f"{col}: {count} {message} in rows {self.rows}-{self.rows + len(mask) - 1}")
+
+    def update(self, frame):
+        """
+        Validate one chunk.
+
+        Args:
+            frame (pd.DataFrame): The chunk; rows are numbered after the previously seen chunks.
+
+        Returns:
+            bool: False once a hard error has been found, meaning a fail-fast caller should stop.
+        """
+        offset = self.rows
+        if not self.check_columns(frame.columns):
+            return False
+        for col, rules in self.schema.items():
+            series = frame[col]
+            nulls = series.isna().to_numpy()
+            if not rules.get("nullable", True):
+                self._count(col, "nulls", nulls, offset, "null values")
+            if "dtype" in rules and not _dtype_matches(series, rules["dtype"]):
+                self.errors.append(f"{col}: expected {rules['dtype']} values, got {series.dtype}")
+                continue
+            if "allowed_values" in rules:
+                invalid = ~series.isin(rules["allowed_values"]).to_numpy() & ~nulls
+                self._count(col, "invalid_values", invalid, offset, "values outside the allowed set")
+            if "min_length" in rules or "max_length" in rules:
+                lengths = series.str.len().to_numpy(dtype=float, na_value=np.nan)
+                if "min_length" in rules:
+                    too_short = lengths < rules["min_length"]
+                    self._count(col, "too_short", too_short, offset, "values too short")
+                if "max_length" in rules:
+                    too_long = lengths > rules["max_length"]
+                    self._count(col, "too_long", too_long, offset, "values too long")
+            if col in self._seen:
+                hashes = pd.util.hash_pandas_object(series[~nulls], index=False).to_numpy()
+                repeated = pd.Series(hashes).duplicated().to_numpy() | np.isin(hashes, self._seen[col])
+                self.columns[col]["duplicates"] += int(repeated.sum())
+                self._seen[col] = np.union1d(self._seen[col], hashes)
+        self.rows += len(frame)
+        self.chunks += 1
+        return not (self.fail_fast and self.failed)
+
+    def finish(self):
+        """
+        Apply the whole-dataset checks and build the report.
+
+        Returns:
+            dict: Validation report with `status`, `rows`, `chunks`, per-column `columns` and `errors`.
+        """
+        for col in self._seen:
+            fraction = self.columns[col]["duplicates"] / self.rows if self.rows else 0.0
+            self.columns[col]["duplicate_fraction"] = round(fraction, 6)
+            limit = self.schema[col]["max_duplicate_fraction"]
+            if fraction > limit:
+                self.errors.append(f"{col}: duplicate fraction {fraction:.3f} exceeds {limit}")
+        return {
+            "status": "failed" if self.failed else "passed",
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "columns": self.columns,
+            "errors": self.errors,
+        }
+
+
+def _dataset_columns(path):
+    if path.endswith(".parquet"):
+        return pq.ParquetFile(path).schema_arrow.names
+    return pd.read_csv(path, delimiter="\t", quoting=3, nrows=0).columns.tolist()
+
+
+def validate_frame(frame, schema=None):
+    """
+    Validate an in-memory DataFrame.
+
+    Args:
+        frame (pd.DataFrame): The dataset.
+        schema (dict, optional): Column name -> rules. Defaults to DEFAULT_SCHEMA.
+
+    Returns:
+        dict: The validation report.
+    """
+    validator = SchemaValidator(schema, fail_fast=False)
+    validator.update(frame)
+    return validator.finish()
+
+
+def validate_dataset(path, schema=None, chunk_rows=CHUNK_ROWS, fail_fast=True):
+    """
+    Validate a dataset file chunk by chunk, reading only the schema columns.
+
+    Args:
+        path (str): Path of a `.parquet` or `.tsv` dataset.
+        schema (dict, optional): Column name -> rules. Defaults to DEFAULT_SCHEMA.
+        chunk_rows (int, optional): Maximum rows per chunk. Defaults to 100000.
+        fail_fast (bool, optional): Stop reading at the first chunk with a hard error. Defaults to True.
+
+    Returns:
+        dict: The validation report.
+    """
+    validator = SchemaValidator(schema, fail_fast=fail_fast)
+    if validator.check_columns(_dataset_columns(path)):
+        for chunk in iter_chunks(path, list(validator.schema), chunk_rows):
+            if not validator.update(chunk):
+                break
+    return validator.finish()
+
+
+def save_report(report, output_path):
+    """
+    Save the validation report as JSON.
+
+    Args:
+        report (dict): The validation report.
+        output_path (str): File path of the JSON report.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def run_validation(dataset_path, report_path, chunk_rows=CHUNK_ROWS, fail_fast=True):
+    """
+    Validate a dataset, save the report and raise if validation failed.
+
+    Args:
+        dataset_path (str): Path of a `.parquet` or `.tsv` dataset.
+        report_path (str): File path of the JSON report.
+        chunk_rows (int, optional): Maximum rows per chunk. Defaults to 100000.
+        fail_fast (bool, optional): Stop reading at the first chunk with a hard error. Defaults to True.
+
+    Returns:
+        dict: The validation report.
+
+    Raises:
+        DataValidationError: If the dataset does not match the schema.
+    """
+    with timed("validate"):
+        report = validate_dataset(dataset_path, chunk_rows=chunk_rows, fail_fast=fail_fast)
+    save_report(report, report_path)
+    if report["status"] != "passed":
+        raise DataValidationError(report)
+    return report
+
+
+def main():
+    """
+    Main function to validate the ingested dataset before preprocessing.
+    """
+    parser = argparse.ArgumentParser(description="Validate a dataset against the schema.")
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default=os.path.join("data", "raw", "a1_RestaurantReviews_HistoricDump.parquet"),
+    )
+    parser.add_argument("--report", type=str, default=os.path.join("metrics", "validation.json"))
+    parser.add_argument("--chunk_rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument(
+        "--no_fail_fast",
+        action="store_true",
+        help="Scan the whole dataset instead of stopping at the first bad chunk.",
+    )
+    parser.add_argument("--timings_output", type=str, default=None)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    try:
+        with profile_run("validate", args.profile), timing_session("validate", args.timings_output):
+            report = run_validation(
+                args.dataset, args.report, args.chunk_rows, not args.no_fail_fast
+            )
+    except DataValidationError as e:
+        raise SystemExit(f"Data validation failed: {e}") from e
+    print(f"Validated {report['rows']} rows in {report['chunks']} chunks")
+
+
+if __name__ == "__main__":
+    main()
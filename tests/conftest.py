@@ -1,9 +1,13 @@
 import os
+from typing import NamedTuple
 
 import joblib
 import numpy as np
-import pandas as pd
 import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.features import load_features
+from src.ingest import load_reviews
 
 # DATASET_PATH = "../datasets/a1_RestaurantReviews_HistoricDump.tsv"
 # TEST_DATA_DIR = "data/processed/test"
@@ -19,33 +23,81 @@ FRESH_DUMP_PATH = os.path.join(
 MODEL_PATH = os.path.join(
     os.path.dirname(__file__), "../output/c2_Classifier_Sentiment_Model.pkl"
 )
+BOW_PATH = os.path.join(os.path.dirname(__file__), "../output/c1_BoW_Sentiment_Model.pkl")
 TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "../data/split")
+RAW_DATA_DIR = os.path.join(os.path.dirname(__file__), "../data/raw")
+
+TOY_REVIEWS = (
+    "good food and friendly staff",
+    "bad service and cold food",
+    "great place with good coffee",
+    "terrible food never again",
+    "friendly staff and great coffee",
+    "cold coffee and bad staff",
+)
+TOY_LABELS = (1, 0, 1, 0, 1, 0)
+
+
+class ToyCorpus(NamedTuple):
+    reviews: list
+    labels: np.ndarray
+    vectorizer: CountVectorizer
+
+
+def _load_dataset(tsv_path):
+    """Load a dataset like the pipeline: the ingest stage's Parquet copy unless it is older than the TSV"""
+    name = os.path.splitext(os.path.basename(tsv_path))[0]
+    parquet_path = os.path.join(RAW_DATA_DIR, f"{name}.parquet")
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(tsv_path):
+        return load_reviews(parquet_path)
+    return load_reviews(tsv_path)
 
 
 @pytest.fixture(scope="module")
 def real_data():
     if not os.path.exists(DATASET_PATH):
         pytest.skip(f"Dataset not found at {DATASET_PATH}")
-    return pd.read_csv(DATASET_PATH, delimiter="\t")
+    return _load_dataset(DATASET_PATH)
 
 
 @pytest.fixture(scope="module")
 def fresh_dump_data():
     if not os.path.exists(FRESH_DUMP_PATH):
         pytest.skip(f"Fresh dump dataset not found at {FRESH_DUMP_PATH}")
-    return pd.read_csv(FRESH_DUMP_PATH, delimiter="\t")
+    return _load_dataset(FRESH_DUMP_PATH)
 
 
-@pytest.fixture(scope="module")
+# Model and split are loaded once per test process (or shard) and memory-mapped read-only,
+# so parallel workers share the pages and a test cannot modify them for the next one.
+@pytest.fixture(scope="session")
 def trained_model():
     """Load the pre-trained model"""
-    return joblib.load(MODEL_PATH)
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip(f"Model not found at {MODEL_PATH}")
+    return joblib.load(MODEL_PATH, mmap_mode="r")
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
+def bow_vectorizer():
+    """Load the fitted BoW vectorizer"""
+    if not os.path.exists(BOW_PATH):
+        pytest.skip(f"BoW vectorizer not found at {BOW_PATH}")
+    return joblib.load(BOW_PATH)
+
+
+@pytest.fixture(scope="session")
+def toy_corpus():
+    """Six labelled reviews and a CountVectorizer fitted on them, for model unit tests"""
+    return ToyCorpus(list(TOY_REVIEWS), np.array(TOY_LABELS), CountVectorizer().fit(TOY_REVIEWS))
+
+
+@pytest.fixture(scope="session")
 def test_data():
     """Load test data from your preprocess script's output"""
+    if not os.path.exists(f"{TEST_DATA_DIR}/X_test.npz"):
+        pytest.skip(f"Test split not found in {TEST_DATA_DIR}")
+    # Densified for the GaussianNB model and the row-wise metamorphic transformations
     return {
-        "X": np.load(f"{TEST_DATA_DIR}/X_test.npy"),
-        "y": np.load(f"{TEST_DATA_DIR}/y_test.npy"),
+        "X": load_features(f"{TEST_DATA_DIR}/X_test.npz").toarray(),
+        "y": np.load(f"{TEST_DATA_DIR}/y_test.npy", mmap_mode="r"),
     }
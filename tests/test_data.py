@@ -5,11 +5,12 @@ Tests for features and data.
 import os
 
 import numpy as np
-import pandas as pd
 from sklearn.model_selection import train_test_split
 
 from src.evaluate import evaluate_model, parse_args
+from src.features import load_features
 from src.train import fit_naive_bayes, load_params, save_json
+from src.validate_data import validate_frame
 
 MIN_ROWS = 100
 MAX_TEXT_LENGTH = 1000
@@ -36,60 +37,13 @@ def test_feature_schema(real_data):
     Validate schema of real data
     """
     schema = {
-        "Review": {"type": str, "null_allowed": False, "max_length": MAX_TEXT_LENGTH},
-        "Liked": {"type": int, "allowed_values": [0, 1]},
+        "Review": {"dtype": "string", "nullable": False, "max_length": MAX_TEXT_LENGTH},
+        "Liked": {"dtype": "integer", "nullable": False, "allowed_values": [0, 1]},
     }
 
-    for col, rules in schema.items():
-        assert col in real_data.columns, f"Missing column: {col}"
-
-        # Check data types
-        if rules["type"] == str:
-            assert (
-                real_data[col].dtype == "object"
-            ), f"Column {col} should be string type"
-        elif rules["type"] == int:
-            assert real_data[col].dtype in [
-                "int64",
-                "int32",
-                "int",
-            ], f"Column {col} should be integer type"
-
-        # Check for null values
-        if not rules.get("null_allowed", True):
-            assert (
-                not real_data[col].isnull().any()
-            ), f"Column {col} contains null values"
-
-        # Check allowed values
-        if "allowed_values" in rules:
-            unique_values = set(real_data[col].unique())
-            allowed_values = set(rules["allowed_values"])
-            assert unique_values.issubset(
-                allowed_values
-            ), f"Column {col} contains invalid values: {unique_values - allowed_values}"
-
-        # Check max length for string columns
-        if rules["type"] == str and "max_length" in rules:
-            max_len = real_data[col].str.len().max()
-            assert (
-                max_len <= rules["max_length"]
-            ), f"Column {col} has text longer than {rules['max_length']}: {max_len}"
-        assert all(
-            isinstance(x, rules["type"]) for x in real_data[col] if pd.notnull(x)
-        ), f"Invalid type in {col}"
-
-        if not rules.get("null_allowed", True):
-            assert not real_data[col].isnull().any(), f"Null values found in {col}"
-
-        if "allowed_values" in rules:
-            assert all(
-                x in rules["allowed_values"] for x in real_data[col] if pd.notnull(x)
-            ), f"Invalid values found in {col}"
-
-        if "max_length" in rules:
-            lengths = real_data[col].str.len()
-            assert (lengths <= rules["max_length"]).all(), f"Value too long in {col}"
+    report = validate_frame(real_data, schema)
+    assert report["status"] == "passed", f"Schema violations: {report['errors']}"
+    assert report["rows"] == len(real_data)
 
 
 def test_feature_cost():
@@ -103,7 +57,7 @@ def test_feature_cost():
     args = parse_args()
 
     # Load test data
-    X = np.load(args.X_test)
+    X = load_features(args.X_test).toarray()
     y = np.load(args.y_test)
 
     # Infer base directory from X_test path and load params
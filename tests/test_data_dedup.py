@@ -0,0 +1,61 @@
+"""
+Data: exact and near-duplicate reviews and leakage across the train/test split
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dedup import deduplicate, find_duplicate_groups, lsh_candidate_pairs, minhash_signatures
+from src.train import split_data
+
+REVIEWS = [
+    "Wow... Loved this place.",
+    "wow loved this place",
+    "The food was great and the service was excellent, will come back!",
+    "The food was great and the service was excellent, we will come back!",
+    "Crust is not good.",
+    "Would not go back.",
+]
+
+
+def test_exact_and_near_duplicates_are_grouped():
+    groups, stats = find_duplicate_groups(REVIEWS)
+    assert groups.tolist() == [0, 0, 2, 2, 4, 5]
+    assert stats == {"rows": 6, "groups": 4, "exact_duplicates": 1, "near_duplicates": 1}
+
+    groups, stats = find_duplicate_groups(REVIEWS, threshold=1.0)
+    assert groups.tolist() == [0, 0, 2, 3, 4, 5]
+    assert stats["near_duplicates"] == 0
+
+
+def test_minhash_estimates_jaccard_similarity():
+    texts = ["the pasta was cold and bland", "the pasta was cold and bland too", "lovely staff"]
+    signatures = minhash_signatures(texts, num_perm=256)
+    agreement = (signatures[0] == signatures[1]).mean()
+    assert agreement > 0.6
+    assert (signatures[0] == signatures[2]).mean() < 0.1
+    assert (lsh_candidate_pairs(signatures, bands=64) == [1, 0]).all(axis=1).any()
+
+
+def test_drop_keeps_first_review_of_each_group():
+    frame = pd.DataFrame({"Review": REVIEWS, "Liked": [1, 1, 1, 1, 0, 0]})
+    deduped, groups, stats = deduplicate(frame, mode="drop")
+    assert groups is None and stats["groups"] == 4
+    assert deduped["Review"].tolist() == [REVIEWS[0], REVIEWS[2], REVIEWS[4], REVIEWS[5]]
+    assert deduplicate(frame, mode="off") == (frame, None, None)
+    with pytest.raises(ValueError):
+        deduplicate(frame, mode="merge")
+
+
+def test_group_split_keeps_duplicates_on_one_side():
+    rng = np.random.default_rng(0)
+    groups = np.repeat(np.arange(50), rng.integers(1, 4, 50))
+    X = np.arange(len(groups))[:, None]
+    y = groups % 2
+    config = {"test_size": 0.2, "random_state": 45}
+
+    X_train, X_test, _, _ = split_data(X, y, config, groups)
+
+    assert len(X_train) + len(X_test) == len(groups)
+    assert not set(groups[X_train[:, 0]]) & set(groups[X_test[:, 0]])
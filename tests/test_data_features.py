@@ -0,0 +1,92 @@
+"""
+Data: configurable n-gram and TF-IDF features
+"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from sklearn.naive_bayes import GaussianNB
+
+from src.features import (extract_features, feature_config, feature_stats,
+                          load_features, vectorize_reviews)
+from src.predictor import SentimentPredictor
+from src.prepare_data import load_feature_params, preprocess_and_save
+
+REVIEWS = [
+    "The food was not good at all",
+    "Really good food and friendly staff",
+    "not good, not friendly",
+    "Great food, great staff!",
+    "The staff was friendly",
+    "Good food",
+]
+
+
+def test_ngram_features_are_pruned_sparse_float32():
+    config = feature_config({"mode": "word_ngram", "ngram_range": [1, 2], "tfidf": False, "min_df": 2})
+    X, vectorizer = extract_features(REVIEWS, config)
+
+    assert sp.isspmatrix_csr(X) and X.dtype == np.float32
+    vocabulary = vectorizer.vocabulary_
+    assert "not good" in vocabulary and "food" in vocabulary
+    assert "really good" not in vocabulary  # Only in one review
+    assert np.all(X.getnnz(axis=0) >= 2)
+
+    capped, _ = extract_features(REVIEWS, {**config, "max_features": 3})
+    assert capped.shape == (len(REVIEWS), 3)
+
+
+def test_tfidf_rows_are_normalized_and_serving_matches_training():
+    config = feature_config({"mode": "char_ngram", "ngram_range": [2, 4], "min_df": 1})
+    X, vectorizer = extract_features(REVIEWS, config)
+
+    assert np.allclose(sp.linalg.norm(X, axis=1), 1.0)
+    restored = pickle.loads(pickle.dumps(vectorizer))
+    assert np.allclose(restored.transform(REVIEWS[:2]).toarray(), X[:2].toarray())
+    stats = feature_stats(X)
+    assert stats["nnz"] == X.nnz and stats["csr_bytes"] < stats["dense_bytes"]
+
+
+def test_feature_config_validation(tmp_path):
+    assert load_feature_params(str(tmp_path / "missing.yaml"))["mode"] == "bow"
+    params = tmp_path / "params.yaml"
+    params.write_text("features:\n  mode: char_ngram\n  ngram_range: [2, 5]\n", encoding="utf-8")
+    assert load_feature_params(str(params))["ngram_range"] == (2, 5)
+    with pytest.raises(ValueError, match="feature mode"):
+        feature_config({"mode": "embeddings"})
+    with pytest.raises(ValueError, match="ngram_range"):
+        feature_config({"ngram_range": [3, 1]})
+
+
+def test_preprocess_with_ngram_features(tmp_path):
+    df = pd.DataFrame({"Review": REVIEWS, "Liked": [0, 1, 0, 1, 1, 1]})
+    dataset_path = tmp_path / "data.tsv"
+    df.to_csv(dataset_path, sep="\t", index=False)
+    features = {"mode": "word_ngram", "min_df": 1}
+    X, y = preprocess_and_save(str(dataset_path), str(tmp_path / "out"), str(tmp_path / "bow"), features=features)
+
+    assert sp.issparse(X) and X.dtype == np.float32 and X.shape[0] == len(REVIEWS)
+    saved = load_features(str(tmp_path / "out" / "X.npz"))
+    assert sp.isspmatrix_csr(saved) and (saved != X).nnz == 0
+    with open(os.path.join(tmp_path, "bow", "c1_BoW_Sentiment_Model.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+    assert np.allclose(vectorizer.transform(REVIEWS).toarray(), X.toarray())
+
+
+def test_served_reviews_match_training_rows(tmp_path):
+    pytest.importorskip("libml")
+    reviews = REVIEWS + ["Food2go was GREAT, staff friendly!!", "12/10 would eat again"]
+    df = pd.DataFrame({"Review": reviews, "Liked": [0, 1, 0, 1, 1, 1, 1, 1]})
+    df.to_csv(tmp_path / "data.tsv", sep="\t", index=False)
+    X, y = preprocess_and_save(str(tmp_path / "data.tsv"), str(tmp_path / "out"), str(tmp_path / "bow"))
+    with open(os.path.join(tmp_path, "bow", "c1_BoW_Sentiment_Model.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+
+    predictor = SentimentPredictor(vectorizer, GaussianNB().fit(X, y))
+    assert np.array_equal(predictor.transform(reviews), X)
+    assert np.array_equal(vectorize_reviews(vectorizer, reviews[::-1]).toarray(), X[::-1])
+    assert vectorize_reviews(vectorizer, ["12345 !!"]).nnz == 0
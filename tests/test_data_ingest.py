@@ -0,0 +1,86 @@
+"""
+Data: columnar ingestion of the raw TSV dumps
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.ingest import convert_tsv_to_parquet, load_reviews, parquet_path_for, run_ingest
+
+ROWS = [
+    ("Wow... Loved this place.", 1),
+    ('The "fries" were great too.', 1),
+    ("Not tasty and the texture was just nasty.", 0),
+    ("Crust is not good.", 0),
+    ("Would not go back.", 0),
+]
+
+
+def _write_tsv(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Review\tLiked\n")
+        for review, liked in ROWS:
+            f.write(f"{review}\t{liked}\n")
+
+
+def test_parquet_round_trip_matches_tsv_parse():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tsv_path = os.path.join(tmpdir, "reviews.tsv")
+        _write_tsv(tsv_path)
+        parquet_path = parquet_path_for(tsv_path, os.path.join(tmpdir, "raw"))
+
+        rows = convert_tsv_to_parquet(tsv_path, parquet_path, chunk_rows=2)
+
+        assert rows == len(ROWS)
+        assert pq.ParquetFile(parquet_path).num_row_groups == 3
+        expected = pd.read_csv(tsv_path, delimiter="\t", quoting=3)
+        pd.testing.assert_frame_equal(load_reviews(parquet_path), expected)
+        pd.testing.assert_frame_equal(load_reviews(tsv_path), expected)
+
+
+def test_column_projection_and_run_ingest():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_tsv(os.path.join(tmpdir, "reviews.tsv"))
+        output_dir = os.path.join(tmpdir, "raw")
+
+        written = run_ingest(tmpdir, output_dir, names=["reviews.tsv"])
+
+        parquet_path = os.path.join(output_dir, "reviews.parquet")
+        assert written == {parquet_path: len(ROWS)}
+        assert not os.path.exists(parquet_path + ".tmp")
+        reviews = load_reviews(parquet_path, columns=["Review"])
+        assert list(reviews.columns) == ["Review"]
+        assert reviews["Review"].tolist() == [review for review, _ in ROWS]
+
+
+def test_schema_is_declared_not_inferred_from_the_first_chunk(tmp_path):
+    tsv_path, parquet_path = tmp_path / "reviews.tsv", str(tmp_path / "reviews.parquet")
+    # Reviews all null in the first chunk, a missing label and a mixed extra column later on
+    tsv_path.write_text("Review\tLiked\tStars\n\t1\t3\n\t0\t4\nnice\t\t5\ngood\t1\tx\n", encoding="utf-8")
+
+    assert convert_tsv_to_parquet(str(tsv_path), parquet_path, chunk_rows=2) == 4
+
+    schema = pq.read_schema(parquet_path)
+    assert [str(field.type) for field in schema] == ["string", "int64", "string"]
+    loaded = load_reviews(parquet_path)
+    assert loaded["Review"].tolist()[2:] == ["nice", "good"] and loaded["Review"].isna().sum() == 2
+    assert loaded["Liked"].tolist()[:2] == [1, 0] and loaded["Liked"].isna().sum() == 1
+    assert loaded["Stars"].tolist() == ["3", "4", "5", "x"]
+
+
+def test_empty_input(tmp_path):
+    header_only, parquet_path = tmp_path / "header.tsv", str(tmp_path / "header.parquet")
+    header_only.write_text("Review\tLiked\n", encoding="utf-8")
+
+    assert convert_tsv_to_parquet(str(header_only), parquet_path) == 0
+    loaded = load_reviews(parquet_path)
+    assert len(loaded) == 0 and list(loaded.columns) == ["Review", "Liked"]
+    assert loaded["Liked"].dtype == "int64"
+
+    (tmp_path / "empty.tsv").write_text("", encoding="utf-8")
+    with pytest.raises(ValueError, match="expected at least a header row"):
+        convert_tsv_to_parquet(str(tmp_path / "empty.tsv"), str(tmp_path / "empty.parquet"))
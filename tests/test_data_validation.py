@@ -0,0 +1,85 @@
+"""
+Data: vectorized schema validation before preprocessing
+"""
+
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+from src.ingest import convert_tsv_to_parquet
+from src.validate_data import (DataValidationError, run_validation,
+                               validate_dataset, validate_frame)
+
+GOOD = pd.DataFrame(
+    {
+        "Review": ["Loved this place.", "Crust is not good.", "Would not go back."],
+        "Liked": [1, 0, 0],
+    }
+)
+
+
+def test_valid_frame_passes():
+    report = validate_frame(GOOD)
+    assert report["status"] == "passed"
+    assert report["errors"] == []
+    assert report["columns"]["Review"]["duplicates"] == 0
+
+
+def test_violations_are_counted_with_row_examples():
+    bad = pd.DataFrame(
+        {
+            "Review": ["Fine.", None, "x" * 2000, ""],
+            "Liked": [1, 2, 0, 1],
+        }
+    )
+    report = validate_frame(bad)
+    assert report["status"] == "failed"
+    review, liked = report["columns"]["Review"], report["columns"]["Liked"]
+    assert review["nulls"] == 1 and review["examples"]["nulls"] == [1]
+    assert review["too_long"] == 1 and review["examples"]["too_long"] == [2]
+    assert review["too_short"] == 1 and review["examples"]["too_short"] == [3]
+    assert liked["invalid_values"] == 1 and liked["examples"]["invalid_values"] == [1]
+
+
+def test_wrong_dtype_and_missing_column():
+    report = validate_frame(pd.DataFrame({"Review": [1, 2], "Liked": [0, 1]}))
+    assert any("expected string" in e for e in report["errors"])
+    report = validate_frame(pd.DataFrame({"Review": ["ok"]}))
+    assert report["errors"] == ["Missing column: Liked"]
+
+
+def _write_dataset(tmpdir, frame):
+    tsv_path = os.path.join(tmpdir, "reviews.tsv")
+    frame.to_csv(tsv_path, sep="\t", index=False)
+    parquet_path = os.path.join(tmpdir, "reviews.parquet")
+    convert_tsv_to_parquet(tsv_path, parquet_path)
+    return tsv_path, parquet_path
+
+
+@pytest.mark.parametrize("suffix", [".tsv", ".parquet"])
+def test_streamed_duplicates_are_tracked_across_chunks(suffix):
+    frame = pd.concat([GOOD] * 4, ignore_index=True)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = dict(zip([".tsv", ".parquet"], _write_dataset(tmpdir, frame)))
+        report = validate_dataset(paths[suffix], chunk_rows=2)
+    assert report["chunks"] == 6 and report["rows"] == 12
+    assert report["columns"]["Review"]["duplicates"] == 9
+    assert report["status"] == "failed"
+    assert "duplicate fraction" in report["errors"][0]
+
+
+def test_fail_fast_stops_at_first_bad_chunk_and_writes_report():
+    frame = pd.concat([GOOD.assign(Liked=[1, 5, 0]), GOOD], ignore_index=True)
+    frame["Review"] = [f"review {i}" for i in range(len(frame))]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _, parquet_path = _write_dataset(tmpdir, frame)
+        report_path = os.path.join(tmpdir, "validation.json")
+        with pytest.raises(DataValidationError) as exc_info:
+            run_validation(parquet_path, report_path, chunk_rows=3)
+        with open(report_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    assert exc_info.value.report == saved
+    assert saved["chunks"] == 1 and saved["rows"] == 3
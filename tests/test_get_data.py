@@ -1,7 +1,19 @@
+import hashlib
+import http.server
+import json
+import os
+import stat
+import tempfile
+import threading
+from dataclasses import replace
 from unittest import mock
 
-from src.get_data import (download_from_drive, download_nltk_resources,
-                          run_get_data)
+import nltk
+import pytest
+
+from src.artifact_cache import sha256_tree
+from src.get_data import (FetchOptions, download_from_drive, download_http,
+                          download_nltk_resources, run_get_data, url_fetcher)
 
 
 def test_download_from_drive_mocks_gdown():
@@ -14,25 +26,48 @@ def test_download_from_drive_mocks_gdown():
 
 
 def test_download_nltk_resources_mocks_nltk():
-    # Simulate wordnet found, should not call download
+    # Simulate wordnet missing, should call download
     with mock.patch("src.get_data.nltk.data.find", side_effect=LookupError), mock.patch(
         "src.get_data.nltk.download"
     ) as mock_download:
         result = download_nltk_resources()
-        mock_download.assert_called_once_with("wordnet")
-        assert result is True
+        mock_download.assert_called_once_with("wordnet", download_dir=None, force=True)
+        assert result == (True, None)
 
-    with mock.patch("src.get_data.nltk.data.find", return_value=True), mock.patch(
-        "src.get_data.nltk.download"
-    ) as mock_download:
-        result = download_nltk_resources()
+
+@pytest.fixture
+def nltk_mirror(tmp_path):
+    """A mirror holding an unzipped wordnet corpus, removed from NLTK's search path afterwards"""
+    corpus = tmp_path / "mirror" / "nltk_data" / "corpora" / "wordnet"
+    corpus.mkdir(parents=True)
+    (corpus / "lexnames").write_text("00\tadj.all\t3\n", encoding="utf-8")
+    yield str(tmp_path / "mirror"), str(corpus)
+    nltk.data.path.remove(str(tmp_path / "mirror" / "nltk_data"))
+
+
+def test_nltk_corpus_is_verified_like_dataset_files(nltk_mirror):
+    mirror, corpus = nltk_mirror
+    checksum = sha256_tree(corpus)
+    with mock.patch("src.get_data.nltk.download") as mock_download:
+        downloaded, state = download_nltk_resources(mirror_dir=mirror, expected_sha256=checksum)
+        assert not downloaded and state["sha256"] == checksum
+        # Warm re-run: the recorded state is reused without hashing
+        with mock.patch("src.get_data.sha256_tree") as mock_hash:
+            assert download_nltk_resources(mirror_dir=mirror, state=state) == (False, state)
+        mock_hash.assert_not_called()
         mock_download.assert_not_called()
-        assert result is False
+
+        with pytest.raises(LookupError, match="expected checksum"):
+            download_nltk_resources(fetch_policy="offline", mirror_dir=mirror, expected_sha256="0" * 64)
+        # A mismatching corpus is downloaded again, and rejected if it still does not match
+        with pytest.raises(ValueError, match="Checksum mismatch for NLTK"):
+            download_nltk_resources(mirror_dir=mirror, expected_sha256="0" * 64)
+        mock_download.assert_called_once_with("wordnet", download_dir=None, force=True)
 
 
 def test_run_get_data_mocks_everything():
     with mock.patch("src.get_data.download_from_drive") as mock_drive, mock.patch(
-        "src.get_data.download_nltk_resources", return_value=True
+        "src.get_data.download_nltk_resources", return_value=(True, None)
     ) as mock_nltk:
         file_ids = ["id1", "id2"]
         output_names = ["file1.txt", "file2.txt"]
@@ -44,3 +79,156 @@ def test_run_get_data_mocks_everything():
         assert result["downloaded"] == [f"{out_dir}/file1.txt", f"{out_dir}/file2.txt"]
         assert mock_drive.call_count == 2
         mock_nltk.assert_called_once()
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serve in-memory files by name, honouring `Range: bytes=N-` headers"""
+
+    files = {}
+    requests = []
+
+    def do_GET(self):
+        name = self.path.lstrip("/")
+        body = self.files.get(name)
+        if body is None:
+            self.send_error(404)
+            return
+        range_header = self.headers.get("Range")
+        self.requests.append((name, range_header))
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def file_server():
+    _RangeHandler.files = {
+        "id1": b"Review\tLiked\ngood\t1\n" * 1000,
+        "id2": b"Review\nbad\n" * 1000,
+    }
+    _RangeHandler.requests = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/{{file_id}}", _RangeHandler
+    server.shutdown()
+
+
+def test_run_get_data_parallel_verified_and_cached(file_server):
+    url_template, handler = file_server
+    with tempfile.TemporaryDirectory() as tmpdir, mock.patch(
+        "src.get_data.download_nltk_resources", return_value=(False, None)
+    ):
+        manifest = os.path.join(tmpdir, "manifest.json")
+        options = FetchOptions(fetcher=url_fetcher(url_template), manifest_path=manifest)
+        kwargs = dict(
+            output_dir=os.path.join(tmpdir, "datasets"),
+            file_ids=["id1", "id2"],
+            output_names=["a1.tsv", "a2.tsv"],
+            options=options,
+        )
+        first = run_get_data(**{**kwargs, "options": replace(options, update_manifest=True)})
+        assert len(first["downloaded"]) == 2 and first["cached"] == []
+        with open(manifest, encoding="utf-8") as f:
+            pinned = json.load(f)
+        assert pinned["a1.tsv"] == hashlib.sha256(handler.files["id1"]).hexdigest()
+
+        # Warm cache: nothing is fetched or re-hashed
+        with mock.patch("src.get_data.sha256_file") as mock_hash:
+            second = run_get_data(**kwargs)
+        assert second["downloaded"] == [] and len(second["cached"]) == 2
+        mock_hash.assert_not_called()
+        assert len(handler.requests) == 2
+
+        # A corrupted file is replaced; a wrong manifest entry is rejected
+        with open(os.path.join(tmpdir, "datasets", "a2.tsv"), "ab") as f:
+            f.write(b"garbage")
+        assert run_get_data(**kwargs)["downloaded"] == [os.path.join(tmpdir, "datasets", "a2.tsv")]
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump({**pinned, "a1.tsv": "0" * 64}, f)
+        os.remove(os.path.join(tmpdir, "datasets", "a1.tsv"))
+        with pytest.raises(ValueError, match="Checksum mismatch"):
+            run_get_data(**kwargs)
+
+
+def test_download_http_resumes_partial_file(file_server):
+    url_template, handler = file_server
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out_path = os.path.join(tmpdir, "a1.tsv")
+        with open(out_path + ".part", "wb") as f:
+            f.write(handler.files["id1"][:5000])
+        download_http(url_template.format(file_id="id1"), out_path)
+        with open(out_path, "rb") as f:
+            assert f.read() == handler.files["id1"]
+        assert handler.requests == [("id1", "bytes=5000-")]
+        assert not os.path.exists(out_path + ".part")
+
+
+def test_offline_policy_resolves_from_mirror_and_shared_cache(file_server):
+    url_template, handler = file_server
+    with tempfile.TemporaryDirectory() as tmpdir, mock.patch(
+        "src.get_data.download_nltk_resources", return_value=(False, None)
+    ):
+        mirror = os.path.join(tmpdir, "mirror")
+        os.makedirs(os.path.join(mirror, "datasets"))
+        with open(os.path.join(mirror, "datasets", "a1.tsv"), "wb") as f:
+            f.write(handler.files["id1"])
+        cache_dir = os.path.join(tmpdir, "cache")
+        kwargs = dict(file_ids=["id1", "id2"], output_names=["a1.tsv", "a2.tsv"])
+
+        # Air-gapped: the mirror has a1 but not a2
+        with pytest.raises(FileNotFoundError, match="offline"):
+            run_get_data(
+                output_dir=os.path.join(tmpdir, "w0"),
+                options=FetchOptions(fetch_policy="offline", mirror_dir=mirror, cache_dir=cache_dir),
+                **kwargs,
+            )
+
+        # First worker downloads a2 once and fills the shared cache
+        first = run_get_data(
+            output_dir=os.path.join(tmpdir, "w1"),
+            options=FetchOptions(fetcher=url_fetcher(url_template), mirror_dir=mirror, cache_dir=cache_dir),
+            **kwargs,
+        )
+        assert first["restored"] == [os.path.join(tmpdir, "w1", "a1.tsv")]
+        assert first["downloaded"] == [os.path.join(tmpdir, "w1", "a2.tsv")]
+
+        # Other workers are served offline from the mirror and cache without any request
+        with mock.patch.dict(
+            os.environ,
+            {"PIPELINE_FETCH_POLICY": "offline", "PIPELINE_CACHE_DIR": cache_dir, "PIPELINE_MIRROR_DIR": mirror},
+        ):
+            second = run_get_data(output_dir=os.path.join(tmpdir, "w2"), **kwargs)
+        assert len(second["restored"]) == 2
+        assert handler.requests == [("id2", None)]
+        with open(os.path.join(tmpdir, "w2", "a2.tsv"), "rb") as f:
+            assert f.read() == handler.files["id2"]
+
+        # Workspaces get their own writable copies: editing one leaves the cache intact
+        restored = os.path.join(tmpdir, "w2", "a2.tsv")
+        blob = os.path.join(cache_dir, "datasets", hashlib.sha256(handler.files["id2"]).hexdigest())
+        assert os.access(restored, os.W_OK) and not os.path.samefile(restored, blob)
+        assert not os.stat(blob).st_mode & stat.S_IWUSR
+        with open(restored, "ab") as f:
+            f.write(b"local edit")
+        with open(blob, "rb") as f:
+            assert f.read() == handler.files["id2"]
+
+
+def test_download_nltk_resources_offline_uses_mirror_only():
+    with tempfile.TemporaryDirectory() as mirror, mock.patch(
+        "src.get_data.nltk.data.find", side_effect=LookupError
+    ), mock.patch("src.get_data.nltk.download") as mock_download:
+        with pytest.raises(LookupError, match="offline"):
+            download_nltk_resources(fetch_policy="offline", mirror_dir=mirror)
+        mock_download.assert_not_called()
+        assert os.path.join(mirror, "nltk_data") in nltk.data.path
+    nltk.data.path.remove(os.path.join(mirror, "nltk_data"))
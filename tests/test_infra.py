@@ -1,7 +1,19 @@
+import os
+
 from src.evaluate import evaluate_model
+from src.registry import DEFAULT_ROOT, ModelRegistry
 
 # Choose an appropriate threshold for the model
 MIN_ACCURACY = 0.6
+# Used until a model version has been promoted in the registry
+BASELINE_ACCURACY = 0.70
+
+
+def previous_model_accuracy(root=DEFAULT_ROOT):
+    """Accuracy of the promoted model version, or the baseline if there is none."""
+    if not os.path.isdir(root):
+        return BASELINE_ACCURACY
+    return ModelRegistry(root).current_metrics().get("accuracy", BASELINE_ACCURACY)
 
 
 # Maybe change test_data to validation_data
@@ -20,8 +32,8 @@ def test_model_serving_validation(trained_model, test_data):
         f"Failing samples:\n{X[trained_model.predict(X) != y][:3]}"
     )
 
-    # Relative check vs previous version
-    PREV_MODEL_ACCURACY = 0.70  # TODO: Replace with actual previous model accuracy
+    # Relative check vs the current registered version, if any
+    PREV_MODEL_ACCURACY = previous_model_accuracy()
     assert (
         val_accuracy >= PREV_MODEL_ACCURACY * 0.95
     ), (  # Allow 5% degradation (choose an appropriate threshold)
@@ -0,0 +1,91 @@
+"""
+Infrastructure: performance anti-pattern messages of the pylint plugin
+"""
+
+import astroid
+import pytest
+from pylint.testutils import CheckerTestCase
+
+from linters.pylint_ml_plugin.performance_check import PerformanceAntiPatternChecker
+
+# message -> (code that triggers it, the suggested fix)
+CASES = {
+    "predict-in-loop": (
+        """
+        for row in X:
+            model.predict([row])
+        """,
+        """
+        model.predict(X)
+        """,
+    ),
+    "np-load-without-mmap": (
+        """
+        import numpy as np
+        X = np.load("data/X.npy")
+        """,
+        """
+        import numpy as np
+        X = np.load("data/X.npy", mmap_mode="r")
+        """,
+    ),
+    "dense-sparse-matrix": (
+        """
+        X = vectorizer.transform(reviews).toarray()
+        """,
+        """
+        X = vectorizer.transform(reviews)
+        """,
+    ),
+    "row-wise-type-scan": (
+        """
+        texts = df["Review"].apply(str)
+        """,
+        """
+        texts = df["Review"].astype(str)
+        """,
+    ),
+    "repeated-artifact-load": (
+        """
+        import joblib
+        for review in reviews:
+            model = joblib.load("model.pkl")
+        """,
+        """
+        import joblib
+        model = joblib.load("model.pkl")
+        for review in reviews:
+            pass
+        """,
+    ),
+}
+
+
+class TestPerformanceChecker(CheckerTestCase):
+    CHECKER_CLASS = PerformanceAntiPatternChecker
+
+    def messages(self, code):
+        self.linter.release_messages()
+        self.walk(astroid.parse(code))
+        return [message.msg_id for message in self.linter.release_messages()]
+
+    @pytest.mark.parametrize("symbol", sorted(CASES))
+    def test_message_triggers_and_fix_silences_it(self, symbol):
+        bad, fixed = CASES[symbol]
+        assert self.messages(bad) == [symbol]
+        assert not self.messages(fixed)
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "y = np.load(args.labels, mmap_mode=None)",
+            "X_test, y_test = np.load(X_path, mmap_mode='r'), np.load(y_path, mmap_mode=None)",
+            "with np.load('summary.npz') as data:\n    pass",
+        ],
+    )
+    def test_np_load_with_explicit_mmap_mode_or_archive_is_allowed(self, code):
+        assert not self.messages(f"import numpy as np\n{code}")
+
+    @pytest.mark.parametrize("code", ["y = np.load(args.labels)", "groups = np.load(options['groups'])"])
+    def test_np_load_exemption_does_not_depend_on_names(self, code):
+        assert self.messages(f"import numpy as np\n{code}") == ["np-load-without-mmap"]
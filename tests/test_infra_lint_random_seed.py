@@ -0,0 +1,91 @@
+"""
+Infrastructure: missing-random-seed messages of the pylint plugin and their result cache
+"""
+
+import textwrap
+
+import astroid
+import pytest
+from astroid.builder import AstroidBuilder
+from pylint.testutils import CheckerTestCase
+
+from linters.pylint_ml_plugin.missing_random_seed import MissingRandomSeedChecker
+
+UNSEEDED = """
+import numpy as np
+
+def sample(X):
+    rows = np.random.choice(len(X), 2)
+    return X[rows] + np.random.normal(size=2)
+"""
+SEEDED = """
+import numpy as np
+
+def sample(X):
+    np.random.seed(42)
+    rows = np.random.choice(len(X), 2)
+    return X[rows] + np.random.normal(size=2)
+"""
+
+
+class TestMissingRandomSeedChecker(CheckerTestCase):
+    CHECKER_CLASS = MissingRandomSeedChecker
+    CONFIG = {"ml_cache_dir": ""}
+
+    def messages(self, module):
+        self.linter.release_messages()
+        self.walk(module)
+        return [(message.msg_id, message.line) for message in self.linter.release_messages()]
+
+    def lint_file(self, path):
+        """One pylint run over `path`: open the cache, check the module and save the cache."""
+        self.checker.open()
+        try:
+            return self.messages(AstroidBuilder(astroid.MANAGER).file_build(str(path), "module_under_test"))
+        finally:
+            self.checker.close()
+
+    def test_reports_each_unseeded_call(self):
+        assert self.messages(astroid.parse(UNSEEDED)) == [
+            ("missing-random-seed", 5),
+            ("missing-random-seed", 6),
+        ]
+        assert not self.messages(astroid.parse(SEEDED))
+
+    @pytest.mark.parametrize(
+        "code, expected",
+        [
+            ("rng = np.random.default_rng()", ["missing-random-seed"]),
+            ("rng = np.random.default_rng(42)\nrng.normal(size=2)", []),
+            ("train_test_split(X, y)", ["random-state-not-set"]),
+            ("train_test_split(X, y, random_state=42)", []),
+            ("KFold(5)", []),
+            ("KFold(5, shuffle=True)", ["random-state-not-set"]),
+            ("KFold(5, shuffle=True, random_state=0)", []),
+        ],
+    )
+    def test_seeded_generators_and_random_state(self, code, expected):
+        module = astroid.parse(
+            "import numpy as np\n"
+            "from sklearn.model_selection import KFold, train_test_split\n" + textwrap.dedent(code)
+        )
+        assert [msg_id for msg_id, _ in self.messages(module)] == expected
+
+    def test_cache_is_reused_until_the_file_changes(self, tmp_path, monkeypatch):
+        self.linter.config.ml_cache_dir = str(tmp_path / "cache")
+        path = tmp_path / "module_under_test.py"
+        path.write_text(UNSEEDED, encoding="utf-8")
+        first = self.lint_file(path)
+        assert len(first) == 2 and (tmp_path / "cache" / "missing_random_seed.json").exists()
+
+        def analyze(_module):
+            raise AssertionError("analyzed again")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(self.checker, "_analyze", analyze)
+            assert self.lint_file(path) == first
+
+        path.write_text(SEEDED, encoding="utf-8")
+        assert not self.lint_file(path)
+        path.write_text(UNSEEDED, encoding="utf-8")
+        assert self.lint_file(path) == first
@@ -0,0 +1,181 @@
+"""
+Infrastructure: memoization of pipeline functions keyed by input content
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from src import memoize as memoize_module
+from src.evaluate import evaluate_model
+from src.memoize import MemoCache, code_version, content_hash, memoize, package_versions, use_memo_cache
+from src.timing import timing_session
+from src.train import fit_naive_bayes
+
+CONFIG = {"var_smoothing": 1e-9, "priors": None}
+CALLS = []
+
+
+@memoize("double")
+def double(X, config):
+    CALLS.append(1)
+    return X * config["factor"], {"rows": len(X)}
+
+
+@memoize("read", files=("path",))
+def read_text(path):
+    CALLS.append(1)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@memoize("double")
+def triple(X, config):
+    CALLS.append(1)
+    return X * config["factor"] * 1.5, {"rows": len(X)}
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CALLS.clear()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with use_memo_cache(str(tmp_path / "memo")) as memo:
+        yield memo
+
+
+def test_content_hash_follows_content():
+    X = np.arange(6, dtype=np.int64).reshape(2, 3)
+    assert content_hash({"X": X, "a": 1}) == content_hash({"a": 1, "X": X.copy()})
+    assert content_hash(X) != content_hash(X.astype(np.int32))
+    assert content_hash(X) != content_hash(X.reshape(3, 2))
+    assert content_hash({"a": 1}) != content_hash({"a": 1.0})
+
+
+def test_repeat_call_is_served_from_memory_mapped_cache(cache):
+    X = np.arange(12, dtype=np.float64).reshape(4, 3)
+    first, _ = double(X, {"factor": 2})
+    second, info = double(X.copy(), {"factor": 2})
+
+    assert len(CALLS) == 1 and cache.hits == 1
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, second)
+    assert info == {"rows": 4}
+
+    double(X, {"factor": 3})
+    X[0, 0] = -1
+    double(X, {"factor": 2})
+    assert len(CALLS) == 3
+
+
+def test_file_arguments_are_keyed_on_content(cache, tmp_path):
+    path = tmp_path / "reviews.tsv"
+    path.write_text("good food", encoding="utf-8")
+    assert read_text(str(path)) == read_text(str(path)) == "good food"
+    path.write_text("bad service", encoding="utf-8")
+    assert read_text(str(path)) == "bad service"
+    assert len(CALLS) == 2
+
+
+def test_pipeline_functions_are_memoized(cache):
+    rng = np.random.default_rng(0)
+    X, y = rng.integers(0, 3, (40, 5)).astype(float), np.tile([0, 1], 20)
+    model = fit_naive_bayes(X, y, CONFIG)
+    assert fit_naive_bayes(X, y, CONFIG).theta_.tolist() == model.theta_.tolist()
+    assert evaluate_model(model, X, y) == evaluate_model(model, X, y)
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_memory_maps_are_keyed_on_file_stat(tmp_path):
+    path = tmp_path / "X.npy"
+    np.save(path, np.arange(12, dtype=np.float64).reshape(4, 3))
+    X = np.load(path, mmap_mode="r")
+    key = content_hash(X)
+    assert key == content_hash(np.load(path, mmap_mode="r"))
+    # Slices and copies are hashed by content
+    assert content_hash(X[:2]) == content_hash(np.array(X[:2])) != key
+
+    np.save(path, np.arange(12, dtype=np.float64).reshape(4, 3))
+    os.utime(path, ns=(0, 0))
+    assert content_hash(np.load(path, mmap_mode="r")) != key
+
+
+def test_sparse_matrices_are_hashed_by_content():
+    X = sp.random(20, 10, density=0.3, format="csr", random_state=0)
+    assert content_hash(X) == content_hash(X.copy()) == content_hash(X.tocoo())
+    Y = X.copy()
+    Y.data[0] += 1
+    assert content_hash(Y) != content_hash(X)
+
+
+def test_spans_are_recorded_on_cache_hits(cache):
+    X, y = np.tile([[0.0, 1.0], [1.0, 0.0]], (10, 1)), np.tile([0, 1], 10)
+    fit_naive_bayes(X, y, CONFIG)
+    with timing_session("train_model", trace_output=os.devnull) as timer:
+        model = fit_naive_bayes(X, y, CONFIG)
+        evaluate_model(model, X, y)
+        evaluate_model(model, X, y)
+    assert cache.hits == 2
+    assert [span["name"] for span in timer.spans].count("fit") == 1
+    assert [span["name"] for span in timer.spans].count("predict") == 2
+
+
+def test_functions_of_a_stage_get_their_own_keys(cache):
+    X = np.ones((2, 2))
+    double(X, {"factor": 2})
+    assert triple(X, {"factor": 2})[0][0, 0] == 3
+    assert len(CALLS) == 2
+
+
+def test_dependency_modules_are_part_of_the_code_version(tmp_path, monkeypatch):
+    module = tmp_path / "memo_dependency.py"
+    module.write_text("SCALE = 1\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    before = code_version(double, ("memo_dependency",))
+    assert before != code_version(double)
+
+    module.write_text("SCALE = 2\n", encoding="utf-8")
+    monkeypatch.setattr(memoize_module, "_source_hashes", {})
+    assert code_version(double, ("memo_dependency",)) != before
+
+
+def test_package_versions_are_resolved_on_first_call(cache):
+    package_versions.cache_clear()
+
+    @memoize("versions", packages=("numpy",))
+    def total(X):
+        return X.sum()
+
+    assert package_versions.cache_info().currsize == 0
+    total(np.ones(3))
+    assert package_versions.cache_info().currsize == 1
+    assert package_versions(("numpy",)) == {"numpy": np.__version__}
+
+
+def test_memoization_is_off_without_cache():
+    X = np.ones((2, 2))
+    double(X, {"factor": 2})
+    double(X, {"factor": 2})
+    assert len(CALLS) == 2
+
+
+def test_eviction_by_size_and_age(tmp_path):
+    cache = MemoCache(str(tmp_path / "memo"), max_bytes=None, max_age_s=None)
+    for i in range(3):
+        cache.put(f"k{i}", np.zeros(1000, dtype=np.int64) + i)
+        meta = os.path.join(cache.cache_dir, f"k{i}", "meta.json")
+        os.utime(meta, (time.time() - 100 + i, time.time() - 100 + i))
+    cache.get("k0")  # Most recently used now
+
+    cache.max_bytes = 2 * max(entry["size"] for entry in cache.entries())
+    assert cache.evict() == ["k1"]
+    assert [entry["key"] for entry in cache.entries()] == ["k2", "k0"]
+
+    cache.max_bytes, cache.max_age_s = None, 50
+    assert cache.evict() == ["k2"]
+    assert cache.get("k0")[0] and not cache.get("k1")[0]
@@ -0,0 +1,63 @@
+"""
+Infrastructure: streaming ML Test Score computation and score trends
+"""
+
+from scripts.ml_test_score import MLTestScoreCalculator, score_trend
+
+REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="4" failures="{failures}" errors="0" skipped="1" timestamp="{timestamp}">
+    <testcase classname="tests.test_data" name="test_schema" time="0.5"/>
+    <testcase classname="tests.test_model" name="test_robustness" time="1.0">{failure}</testcase>
+    <testcase classname="tests.test_infra" name="test_serving" time="0.1"><skipped>no model</skipped></testcase>
+    <testcase classname="tests.test_mutamorphic" name="test_swap" time="0.2"/>
+  </testsuite>
+</testsuites>
+"""
+
+
+def write_report(path, timestamp, failed=False):
+    failure = '<failure message="boom">accuracy dropped</failure>' if failed else ""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        REPORT.format(failures=int(failed), timestamp=timestamp, failure=failure), encoding="utf-8"
+    )
+    return path
+
+
+def test_streaming_parser_reads_suite_and_cases(tmp_path):
+    path = write_report(tmp_path / "junit.xml", "2026-01-02T10:00:00", failed=True)
+    results = MLTestScoreCalculator().parse_junit_xml(path)
+
+    assert (results["total_tests"], results["failures"], results["skipped"], results["passed"]) == (4, 1, 1, 3)
+    assert results["timestamp"] == "2026-01-02T10:00:00"
+    statuses = {case["name"]: (case["status"], case["error"]) for case in results["test_cases"]}
+    assert statuses == {
+        "test_schema": ("passed", None),
+        "test_robustness": ("failed", "accuracy dropped"),
+        "test_serving": ("skipped", "no model"),
+        "test_swap": ("passed", None),
+    }
+
+
+def test_categorization_is_memoized():
+    calculator = MLTestScoreCalculator()
+    assert calculator.categorize_test("test_swap", "tests.test_mutamorphic") == "metamorphic"
+    assert calculator.categorize_test("test_latency", "tests.other") == "monitor"
+    calculator.test_categories = {}  # Cached answers no longer need the keyword tables
+    assert calculator.categorize_test("test_latency", "tests.other") == "monitor"
+
+
+def test_score_trend_orders_builds_and_merges_shards(tmp_path):
+    write_report(tmp_path / "b2" / "shard1.xml", "2026-01-03T10:00:00")
+    write_report(tmp_path / "b2" / "shard2.xml", "2026-01-03T10:05:00")
+    write_report(tmp_path / "b1" / "shard1.xml", "2026-01-02T10:00:00", failed=True)
+
+    trend = score_trend([str(tmp_path)], workers=2, group_by="dir")
+    assert [entry["build"] for entry in trend] == [str(tmp_path / "b1"), str(tmp_path / "b2")]
+    assert [entry["files"] for entry in trend] == [1, 2]
+    assert trend[1]["total_tests"] == 8 and trend[1]["timestamp"] == "2026-01-03T10:05:00"
+    assert trend[0]["categories"]["model"] == 0.0 and trend[1]["categories"]["model"] == 100.0
+    assert trend[0]["overall_score"] < trend[1]["overall_score"]
+
+    assert len(score_trend([str(tmp_path)], workers=1)) == 3
@@ -0,0 +1,102 @@
+"""
+Infrastructure: in-process pipeline runner
+"""
+
+import json
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from src.pipeline import PipelineRunner, load_stages, parse_cmd
+
+DVC_YAML = """
+stages:
+  preprocess:
+    cmd: python -m src.prepare_data --output_dir data/ --dataset reviews.tsv --bow_dir output/
+    deps:
+      - reviews.tsv
+    outs:
+      - data/X.npz
+      - data/y.npy
+      - output/c1_BoW_Sentiment_Model.pkl
+  train_model:
+    cmd:
+      python -m src.train --data data/X.npz --labels data/y.npy --output output/
+      --split_output_dir data/split
+    deps:
+      - data/X.npz
+      - data/y.npy
+    outs:
+      - data/split/X_test.npz
+      - data/split/y_test.npy
+      - output/c2_Classifier_Sentiment_Model.pkl
+    params:
+      - train.test_size
+  evaluate:
+    cmd:
+      python -m src.evaluate --X_test data/split/X_test.npz --y_test data/split/y_test.npy
+      --model output/c2_Classifier_Sentiment_Model.pkl --metrics_output metrics/eval.json
+    deps:
+      - data/split/X_test.npz
+      - data/split/y_test.npy
+      - output/c2_Classifier_Sentiment_Model.pkl
+    metrics:
+      - metrics/eval.json
+"""
+
+POSITIVE = ["good food", "great service", "lovely place", "tasty dishes", "friendly staff"]
+NEGATIVE = ["bad food", "slow service", "dirty place", "bland dishes", "rude staff"]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Minimal project with a dataset, params and a three-stage pipeline"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dvc.yaml").write_text(DVC_YAML, encoding="utf-8")
+    (tmp_path / "params.yaml").write_text("train:\n  test_size: 0.2\n  random_state: 1\n", encoding="utf-8")
+    reviews = pd.DataFrame(
+        {"Review": (POSITIVE + NEGATIVE) * 4, "Liked": ([1] * 5 + [0] * 5) * 4}
+    )
+    reviews.to_csv(tmp_path / "reviews.tsv", sep="\t", index=False)
+    return tmp_path
+
+
+def test_parse_stage_commands(project):
+    stages = load_stages()
+    assert list(stages) == ["preprocess", "train_model", "evaluate"]
+    module, argv, options = parse_cmd(stages["train_model"]["cmd"])
+    assert module == "src.train"
+    assert argv[:2] == ["--data", "data/X.npz"]
+    assert options["split_output_dir"] == "data/split"
+
+
+def test_runs_in_memory_then_skips_up_to_date_stages(project):
+    with mock.patch("src.pipeline.np.load", side_effect=AssertionError("read from disk")), \
+            mock.patch("src.pipeline.load_features", side_effect=AssertionError("read from disk")), \
+            mock.patch("joblib.load", side_effect=AssertionError("read from disk")):
+        results = PipelineRunner().run()
+
+    assert [r["status"] for r in results.values()] == ["ran", "ran", "ran"]
+    for path in ["data/X.npz", "data/split/X_test.npz", "output/c2_Classifier_Sentiment_Model.pkl"]:
+        assert (project / path).exists()
+    with open(project / "metrics" / "eval.json", "r", encoding="utf-8") as f:
+        assert 0 <= json.load(f)["accuracy"] <= 1
+
+    assert all(r["status"] == "skipped" for r in PipelineRunner().run().values())
+
+    (project / "params.yaml").write_text("train:\n  test_size: 0.3\n  random_state: 1\n", encoding="utf-8")
+    results = PipelineRunner().run()
+    assert {name: r["status"] for name, r in results.items()} == {
+        "preprocess": "skipped",
+        "train_model": "ran",
+        "evaluate": "ran",
+    }
+    assert PipelineRunner(force=True).run(until="preprocess")["preprocess"]["status"] == "ran"
+
+
+def test_evaluate_fails_without_test_split(project):
+    PipelineRunner().run()
+    (project / "params.yaml").write_text("train:\n  train_all: true\n  random_state: 1\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="needs a test split"):
+        PipelineRunner().run()
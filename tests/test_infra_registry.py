@@ -0,0 +1,92 @@
+"""
+Infrastructure: versioned model registry and predictor hot swap
+"""
+
+import threading
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import GaussianNB
+
+from src.predictor import SentimentPredictor
+from src.registry import ModelRegistry
+
+REVIEWS = ["good food", "bad service", "great place", "terrible food", "good service"]
+LABELS = [1, 0, 1, 0, 1]
+
+
+def save_artifacts(directory, labels):
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(REVIEWS).toarray()
+    bow_path, model_path = directory / "bow.pkl", directory / "model.pkl"
+    joblib.dump(vectorizer, bow_path)
+    joblib.dump(GaussianNB().fit(X, labels), model_path)
+    return str(bow_path), str(model_path)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / "registry"))
+
+
+def test_register_and_promote_versions(registry, tmp_path):
+    paths = save_artifacts(tmp_path, LABELS)
+    v1 = registry.register(*paths, metrics={"accuracy": 0.8}, lineage={"params": {"seed": 1}})
+    assert registry.current() is None and registry.current_metrics() == {}
+
+    registry.promote(v1)
+    v2 = registry.register(*paths, metrics={"accuracy": 0.9}, promote=True)
+    assert registry.versions() == [v1, v2] == ["v0001", "v0002"]
+    assert registry.current() == v2
+    assert registry.current_metrics() == {"accuracy": 0.9}
+
+    metadata = registry.metadata(v2)
+    assert metadata["lineage"]["parent"] == v1
+    assert set(metadata["artifacts"]) == {"c1_BoW_Sentiment_Model.pkl", "c2_Classifier_Sentiment_Model.pkl"}
+    assert registry.metadata(v1)["lineage"]["params"] == {"seed": 1}
+
+    with pytest.raises(ValueError, match="Unknown model version"):
+        registry.promote("v0042")
+
+
+def test_load_memory_maps_model_parameters(registry, tmp_path):
+    registry.register(*save_artifacts(tmp_path, LABELS), promote=True)
+    _, model, version = registry.load()
+    assert version == "v0001"
+    assert isinstance(model.theta_, np.memmap)
+    with pytest.raises(ValueError, match="No model version"):
+        ModelRegistry(str(tmp_path / "empty")).load()
+
+
+def test_predictor_hot_swaps_while_serving(registry, tmp_path):
+    registry.register(*save_artifacts(tmp_path, LABELS), promote=True)
+    predictor = SentimentPredictor.from_registry(registry)
+    assert predictor.version == "v0001"
+    assert predictor.predict(REVIEWS).tolist() == LABELS
+    assert not predictor.sync(registry)
+
+    flipped = [1 - label for label in LABELS]
+    registry.register(*save_artifacts(tmp_path, flipped), promote=True)
+
+    results, errors = [], []
+
+    def serve():
+        try:
+            for _ in range(200):
+                results.append(predictor.predict(REVIEWS).tolist())
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+
+    clients = [threading.Thread(target=serve) for _ in range(4)]
+    for client in clients:
+        client.start()
+    assert predictor.sync(registry)
+    for client in clients:
+        client.join()
+
+    assert not errors
+    assert all(result in (LABELS, flipped) for result in results)
+    assert predictor.version == "v0002"
+    assert predictor.predict(REVIEWS).tolist() == flipped
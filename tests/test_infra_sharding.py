@@ -0,0 +1,48 @@
+"""
+Infrastructure: sharded test execution and JUnit report merging
+"""
+
+from scripts.ml_test_score import MLTestScoreCalculator
+from scripts.run_sharded_tests import assign_shards, merge_junit
+
+SHARD = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="2" failures="{failures}" errors="0" skipped="0" time="{time}" timestamp="{timestamp}">
+    <testcase classname="tests.{module}" name="test_a" time="1.0"/>
+    <testcase classname="tests.{module}" name="test_b" time="2.0">{failure}</testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+def test_shards_balance_recorded_durations():
+    durations = {"tests/test_model.py": 8.0, "tests/test_data.py": 5.0, "tests/test_infra.py": 4.0}
+    files = sorted(durations) + ["tests/test_new.py"]
+    buckets = assign_shards(files, durations, shards=2)
+
+    assert sorted(f for bucket in buckets for f in bucket["files"]) == sorted(files)
+    assert [bucket["files"] for bucket in buckets] == [
+        ["tests/test_model.py", "tests/test_infra.py"],
+        ["tests/test_data.py", "tests/test_new.py"],  # Unknown files cost the median duration
+    ]
+    assert [bucket["load"] for bucket in buckets] == [12.0, 10.0]
+    assert len(assign_shards(files[:1], durations, shards=4)) == 1
+
+
+def test_merged_report_scores_like_a_single_run(tmp_path):
+    for i, (module, failed) in enumerate([("test_model", True), ("test_data", False)]):
+        failure = '<failure message="boom">accuracy dropped</failure>' if failed else ""
+        (tmp_path / f"junit-{i}.xml").write_text(
+            SHARD.format(failures=int(failed), time=3.0, timestamp=f"2026-01-02T10:0{i}:00",
+                         module=module, failure=failure),
+            encoding="utf-8",
+        )
+    output = tmp_path / "junit.xml"
+    totals = merge_junit(sorted(tmp_path.glob("junit-*.xml")), output)
+
+    assert totals == {"tests": 4, "failures": 1, "errors": 0, "skipped": 0}
+    results = MLTestScoreCalculator().parse_junit_xml(output)
+    assert (results["total_tests"], results["passed"], results["failures"]) == (4, 3, 1)
+    assert results["timestamp"] == "2026-01-02T10:00:00"
+    failed = [case for case in results["test_cases"] if case["status"] == "failed"]
+    assert [(case["class"], case["error"]) for case in failed] == [("tests.test_model", "accuracy dropped")]
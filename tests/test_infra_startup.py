@@ -0,0 +1,32 @@
+"""
+Infrastructure: cold-start time of the pipeline CLI modules
+"""
+
+import pytest
+
+from scripts.startup_benchmark import (ENTRY_POINTS, check_budget,
+                                       measure_import, parse_importtime)
+
+# Generous so the check is stable on loaded CI machines; the benchmark default is tighter
+BUDGET_MS = 1500.0
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_cli_module_defers_heavy_imports(module):
+    result = measure_import(module, runs=1)
+    assert result["heavy_imports"] == []
+    assert check_budget([result], BUDGET_MS) == []
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   json.decoder\n"
+        "import time:       300 |        420 | json\n"
+    )
+    assert parse_importtime(stderr) == [("json.decoder", 120, 120), ("json", 300, 420)]
+    result = {"module": "json", "import_ms": 0.42, "heavy_imports": ["pandas"]}
+    assert check_budget([result], 0.1) == [
+        "json imports in 0 ms (budget 0 ms)",
+        "json eagerly imports pandas",
+    ]
@@ -0,0 +1,95 @@
+"""
+Infrastructure: task graph runner of the local testing workflow
+"""
+
+import threading
+import time
+
+import pytest
+
+from scripts.test_workflow import Task, TaskGraph, build_workflow
+
+
+def sleeper(log, name, seconds=0.2, ok=True):
+    def action():
+        log.append((name, "start", time.perf_counter()))
+        time.sleep(seconds)
+        log.append((name, "end", time.perf_counter()))
+        return ok
+
+    return action
+
+
+def events(log, name, kind):
+    return next(t for n, k, t in log if n == name and k == kind)
+
+
+def test_independent_steps_run_concurrently(tmp_path):
+    log = []
+    tasks = [
+        Task("root", "root", sleeper(log, "root", 0.05)),
+        Task("left", "left", sleeper(log, "left"), deps=("root",)),
+        Task("right", "right", sleeper(log, "right"), deps=("root",)),
+        Task("join", "join", sleeper(log, "join", 0.05), deps=("left", "right")),
+    ]
+    graph = TaskGraph(tasks, base_dir=tmp_path)
+    start = time.perf_counter()
+    assert set(graph.run().values()) == {"passed"}
+    wall = time.perf_counter() - start
+
+    assert events(log, "left", "start") >= events(log, "root", "end")
+    assert events(log, "right", "start") < events(log, "left", "end")  # Overlapping
+    assert events(log, "join", "start") >= max(events(log, "left", "end"), events(log, "right", "end"))
+    path, path_s = graph.critical_path()
+    assert path[0] == "root" and path[-1] == "join" and len(path) == 3
+    assert wall < path_s + 0.15
+
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    (tmp_path / "input.txt").write_text("v1", encoding="utf-8")
+    runs = []
+
+    def produce():
+        runs.append(threading.get_ident())
+        (tmp_path / "output.txt").write_text("done", encoding="utf-8")
+        return True
+
+    def graph():
+        task = Task("build", "build", produce, inputs=("input.txt",), outputs=("output.txt",))
+        return TaskGraph([task], base_dir=tmp_path)
+
+    assert graph().run() == {"build": "passed"}
+    assert graph().run() == {"build": "skipped"}
+    (tmp_path / "input.txt").write_text("v2", encoding="utf-8")
+    assert graph().run() == {"build": "passed"}
+    (tmp_path / "output.txt").unlink()
+    assert graph().run() == {"build": "passed"}
+    assert len(runs) == 3
+
+
+def test_failures_block_dependents_unless_outputs_were_written(tmp_path):
+    def write_report():
+        (tmp_path / "report.xml").write_text("<testsuite/>", encoding="utf-8")
+        return False  # Like pytest with failing tests
+
+    tasks = [
+        Task("tests", "tests", write_report, outputs=("report.xml",)),
+        Task("score", "score", lambda: True, deps=("tests",)),
+        Task("broken", "broken", lambda: False),
+        Task("after_broken", "after", lambda: True, deps=("broken",)),
+        Task("after_after", "after", lambda: True, deps=("after_broken",)),
+    ]
+    assert TaskGraph(tasks, base_dir=tmp_path).run() == {
+        "tests": "failed",
+        "score": "passed",
+        "broken": "failed",
+        "after_broken": "blocked",
+        "after_after": "blocked",
+    }
+
+
+def test_graph_validation():
+    with pytest.raises(ValueError, match="unknown tasks"):
+        TaskGraph([Task("a", "a", lambda: True, deps=("missing",))])
+    names = {task.name for task in build_workflow()}
+    assert all(set(task.deps) <= names for task in build_workflow())
@@ -0,0 +1,95 @@
+"""
+Model: ensembles with stacked parameters and a single fused predict
+"""
+
+import argparse
+import os
+
+import joblib
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+
+from src.ensemble import StackedEnsemble, fit_ensemble
+from src.predictor import SentimentPredictor
+from src.train import DEFAULT_SGD, train_model
+
+REPEATS = 10
+
+
+@pytest.fixture
+def corpus(toy_corpus):
+    """The toy reviews repeated, their labels and their sparse features"""
+    reviews, labels = toy_corpus.reviews * REPEATS, np.tile(toy_corpus.labels, REPEATS)
+    return reviews, labels, toy_corpus.vectorizer.transform(reviews)
+
+
+def config(model="gaussian_nb", **ensemble):
+    return {
+        "random_state": 3, "train_all": False, "test_size": 0.2, "var_smoothing": 1e-2, "priors": None,
+        "model": model, "sgd": {**DEFAULT_SGD, "batch_size": 8},
+        "ensemble": {"n_members": 4, "strategy": "bootstrap", "n_jobs": 1, **ensemble},
+    }
+
+
+def test_fused_predict_averages_gaussian_nb_members(corpus):
+    _, labels, X = corpus
+    rng = np.random.default_rng(0)
+    members = []
+    for _ in range(3):
+        rows = rng.integers(0, X.shape[0], X.shape[0])
+        members.append(GaussianNB(var_smoothing=1e-2).fit(X[rows].toarray(), labels[rows]))
+    ensemble = StackedEnsemble(members)
+
+    expected = np.mean([member.predict_proba(X.toarray()) for member in members], axis=0)
+    assert np.allclose(ensemble.predict_proba(X), expected)
+    assert np.allclose(ensemble.predict_proba(X.toarray()), expected)
+    assert np.array_equal(ensemble.predict(X), members[0].classes_[expected.argmax(axis=1)])
+    assert np.array_equal(StackedEnsemble(members[:1]).predict(X), members[0].predict(X.toarray()))
+
+
+def test_fused_predict_averages_linear_members(corpus):
+    _, labels, X = corpus
+    members = [SGDClassifier(random_state=seed).fit(X, labels) for seed in range(3)]
+    ensemble = StackedEnsemble(members)
+
+    expected = np.mean([member.decision_function(X) for member in members], axis=0)
+    assert np.allclose(ensemble.decision_function(X), expected)
+    assert np.array_equal(ensemble.predict(X), (expected > 0).astype(int))
+    with pytest.raises(TypeError, match="all be GaussianNB or all linear"):
+        StackedEnsemble([members[0], GaussianNB().fit(X.toarray(), labels)])
+
+
+def test_parallel_training_matches_sequential(corpus, tmp_path):
+    _, labels, X = corpus
+    np.save(tmp_path / "X.npy", X.toarray())
+    X_mmap = np.load(tmp_path / "X.npy", mmap_mode="r")
+    rows = np.arange(48)
+
+    sequential = fit_ensemble(X_mmap, labels, config(n_jobs=1), rows)
+    parallel = fit_ensemble(X_mmap, labels, config(n_jobs=2), rows)
+    assert sequential.n_members == parallel.n_members == 4
+    assert np.allclose(sequential.linear, parallel.linear) and np.allclose(sequential.bias, parallel.bias)
+    member_thetas = sequential.linear.reshape(4, 2, -1)
+    assert not np.allclose(member_thetas[0], member_thetas[1])  # Different bootstrap samples
+
+    seeds = fit_ensemble(X_mmap, labels, config("sgd", strategy="seeds", n_members=2), rows)
+    assert seeds.kind == "linear" and seeds.linear.shape == (2, X.shape[1])
+    with pytest.raises(ValueError, match="seeds strategy"):
+        fit_ensemble(X_mmap, labels, config(strategy="seeds"), rows)
+
+
+def test_ensemble_training_keeps_artifact_contract(corpus, toy_corpus, tmp_path):
+    reviews, labels, X = corpus
+    args = argparse.Namespace(
+        output=str(tmp_path), split_output_dir=None, train_metrics_output=None, summary_output=None
+    )
+    model, X_test, y_test = train_model(X.toarray(), labels, config(), args)
+
+    saved = joblib.load(os.path.join(tmp_path, "c2_Classifier_Sentiment_Model.pkl"))
+    assert isinstance(saved, StackedEnsemble) and np.array_equal(saved.predict(X_test), model.predict(X_test))
+    predictor = SentimentPredictor(toy_corpus.vectorizer, saved)
+    assert sp.issparse(predictor.transform(reviews[:2]))
+    assert (predictor.predict(reviews) == labels).mean() == 1.0
@@ -0,0 +1,88 @@
+"""
+Model: top-k term explanations computed from the GaussianNB parameters
+"""
+
+import time
+
+import numpy as np
+import pytest
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+
+from src.explain import NaiveBayesExplainer
+from src.predictor import SentimentPredictor
+
+
+@pytest.fixture(scope="module")
+def fitted(toy_corpus):
+    vectorizer = toy_corpus.vectorizer
+    X = vectorizer.transform(toy_corpus.reviews).toarray()
+    return vectorizer, GaussianNB(var_smoothing=1e-2).fit(X, toy_corpus.labels)
+
+
+def brute_force_contributions(model, x, explained, rival):
+    """Per-feature log-likelihood change vs. an absent term, from the dense row"""
+    def per_feature(c):
+        return -0.5 * ((x - model.theta_[c]) ** 2 - model.theta_[c] ** 2) / model.var_[c]
+
+    return per_feature(explained) - per_feature(rival)
+
+
+def test_predictions_match_gaussian_nb(fitted, toy_corpus):
+    vectorizer, model = fitted
+    X = vectorizer.transform(toy_corpus.reviews + ["good staff", "unknown words only"])
+    explainer = NaiveBayesExplainer(model, vectorizer.get_feature_names_out())
+
+    jll = explainer.joint_log_likelihood(X)
+    assert np.allclose(jll, model.predict_joint_log_proba(X.toarray()))
+    assert [row["prediction"] for row in explainer.explain(X)] == model.predict(X.toarray()).tolist()
+
+
+def test_top_terms_match_brute_force(fitted, toy_corpus):
+    vectorizer, model = fitted
+    names = vectorizer.get_feature_names_out()
+    X = vectorizer.transform(toy_corpus.reviews)
+    explanations = NaiveBayesExplainer(model, names).explain(X, k=2)
+
+    for row, explanation in zip(X.toarray(), explanations):
+        predicted = list(model.classes_).index(explanation["prediction"])
+        contributions = brute_force_contributions(model, row, predicted, 1 - predicted)
+        present = np.flatnonzero(row)
+        ranked = present[np.argsort(-contributions[present], kind="stable")]
+        expected = [(names[j], contributions[j]) for j in ranked[:2] if contributions[j] > 0]
+        assert [term for term, _ in explanation["terms"]] == [term for term, _ in expected]
+        assert np.allclose([value for _, value in explanation["terms"]], [value for _, value in expected])
+
+
+def test_explaining_the_negative_class(fitted):
+    vectorizer, model = fitted
+    explanation = NaiveBayesExplainer(model, vectorizer.get_feature_names_out()).explain(
+        vectorizer.transform(["cold food and bad coffee"]), k=3, target=0
+    )[0]
+    assert explanation["prediction"] == 0
+    assert {"bad", "cold"} <= {term for term, _ in explanation["terms"]}
+    with pytest.raises(TypeError, match="GaussianNB"):
+        NaiveBayesExplainer(SGDClassifier(), [])
+
+
+def test_predictor_explain_follows_swaps_and_stays_cheap(fitted, toy_corpus):
+    vectorizer, model = fitted
+    reviews = toy_corpus.reviews
+    predictor = SentimentPredictor(vectorizer, model)
+    batch = reviews * 300
+    explanations = predictor.explain(batch, k=3)
+    assert [row["prediction"] for row in explanations] == predictor.predict(batch).tolist()
+
+    flipped = GaussianNB(var_smoothing=1e-2).fit(vectorizer.transform(reviews).toarray(), 1 - toy_corpus.labels)
+    predictor.swap(vectorizer, flipped)
+    assert predictor.explain(reviews[:1])[0]["prediction"] == flipped.predict(vectorizer.transform(reviews[:1]).toarray())[0]
+
+    def best_of(func, runs=5):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func(batch)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    assert best_of(predictor.explain) < 5 * best_of(predictor.predict) + 0.01
@@ -0,0 +1,98 @@
+"""
+Model: linear classifier trained with streaming mini-batch SGD
+"""
+
+import argparse
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.linear_model import SGDClassifier
+
+from src.drift import load_summary, predict_sparse, summarize_training
+from src.predictor import SentimentPredictor
+from src.train import DEFAULT_SGD, fit_sgd, load_params, split_indices, train_accuracy, train_model
+
+REPEATS = 20
+
+
+def config(**sgd):
+    return {"random_state": 7, "train_all": False, "test_size": 0.2, "model": "sgd",
+            "sgd": {**DEFAULT_SGD, "batch_size": 16, **sgd}}
+
+
+@pytest.fixture
+def corpus(toy_corpus, tmp_path):
+    """The toy reviews repeated, with their features saved to X.npy and memory-mapped"""
+    reviews, labels = toy_corpus.reviews * REPEATS, np.tile(toy_corpus.labels, REPEATS)
+    np.save(tmp_path / "X.npy", toy_corpus.vectorizer.transform(reviews).toarray().astype(np.float32))
+    return reviews, labels, np.load(tmp_path / "X.npy", mmap_mode="r")
+
+
+def test_sgd_streams_memmapped_rows_and_predicts_sparse(corpus):
+    _, labels, X = corpus
+    model = fit_sgd(X, labels, config(), rows=np.arange(100))
+
+    X_sparse = sp.csr_matrix(np.asarray(X))
+    assert np.array_equal(model.predict(X_sparse), model.predict(np.asarray(X)))
+    assert (model.predict(X_sparse[100:]) == labels[100:]).mean() == 1.0
+
+
+def test_sgd_stops_early_on_validation_plateau(corpus, monkeypatch):
+    _, labels, X = corpus
+    calls = []
+    score = SGDClassifier.score
+    monkeypatch.setattr(SGDClassifier, "score", lambda self, *a: calls.append(1) or score(self, *a))
+    fit_sgd(X, labels, config(max_epochs=50, n_iter_no_change=2))
+    assert 3 <= len(calls) < 50  # Perfect validation accuracy cannot improve further
+
+
+def test_sgd_training_keeps_artifact_contract(corpus, toy_corpus, tmp_path):
+    reviews, labels, X = corpus
+    vectorizer = toy_corpus.vectorizer
+    args = argparse.Namespace(
+        output=str(tmp_path / "output"), split_output_dir=str(tmp_path / "split"),
+        train_metrics_output=None, summary_output=str(tmp_path / "summary.npz"),
+    )
+    model, X_test, y_test = train_model(X, labels, config(loss="hinge"), args)
+
+    saved = joblib.load(os.path.join(args.output, "c2_Classifier_Sentiment_Model.pkl"))
+    assert isinstance(saved, SGDClassifier) and len(y_test) == X_test.shape[0] == 24
+    predictor = SentimentPredictor(vectorizer, saved)
+    assert sp.issparse(predictor.transform(reviews[:6]))
+    assert np.array_equal(predictor.predict(reviews[:6]), model.predict(np.asarray(X[:6])))
+    summary = load_summary(args.summary_output)
+    assert np.array_equal(predict_sparse(vectorizer.transform(reviews), summary), saved.predict(np.asarray(X)))
+
+
+def test_train_metrics_and_summary_are_computed_in_batches(corpus, tmp_path):
+    _, labels, X = corpus
+    args = argparse.Namespace(
+        output=str(tmp_path / "output"), split_output_dir=None,
+        train_metrics_output=str(tmp_path / "train.json"), summary_output=str(tmp_path / "summary.npz"),
+    )
+    model, _, _ = train_model(X, labels, config(), args)
+    rows = np.sort(split_indices(labels, config())[0])
+    dense = np.asarray(X[rows])
+
+    with open(args.train_metrics_output, "r", encoding="utf-8") as f:
+        assert json.load(f)["train_accuracy"] == (model.predict(dense) == labels[rows]).mean()
+    assert train_accuracy(model, X, labels, rows, batch_rows=7) == train_accuracy(model, X, labels, rows)
+    expected = summarize_training(dense, labels[rows], model)
+    for summary in (load_summary(args.summary_output), summarize_training(X, labels, model, rows, batch_rows=7)):
+        assert summary.keys() == expected.keys()
+        for key, value in expected.items():
+            assert np.allclose(summary[key], value), key
+
+
+def test_unknown_model_type_is_rejected(tmp_path):
+    params = tmp_path / "params.yaml"
+    params.write_text("train:\n  model: sgd\n  sgd:\n    loss: hinge\n", encoding="utf-8")
+    loaded = load_params(str(params))
+    assert loaded["model"] == "sgd" and loaded["sgd"]["loss"] == "hinge" and loaded["sgd"]["batch_size"] == 1024
+    params.write_text("train:\n  model: xgboost\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Unknown model"):
+        load_params(str(params))
@@ -2,15 +2,25 @@
 Monitoring
 """
 
+import json
+import os
+import tempfile
 import time
+import tracemalloc
+from unittest import mock
 
 import numpy as np
-from memory_profiler import memory_usage
+
+from src.memory_tracking import (MemoryTracker, memory_profiling, memory_stage,
+                                 track_memory)
+from src.profiling import PROFILE_ENV_VAR, profile_run, resolve_profile_dir
+from src.timing import timed, timed_stage, timing_session
 
 SAMPLE_INPUT = np.random.rand(1, 1421)
 
 # Constants for performance limits based on my run - Adjust these later
 MAX_MEMORY_MB = 500
+MAX_PREDICT_ALLOC_MB = 10
 MAX_LATENCY_MS = 1
 MIN_THROUGHPUT = 1000
 
@@ -18,18 +28,74 @@ MIN_THROUGHPUT = 1000
 def test_prediction_memory(trained_model):
     """
     Test memory usage during prediction
-    """
-
-    def predict():
-        trained_model.predict(SAMPLE_INPUT)
 
-    # Measure memory usage
-    peak_mem = max(memory_usage(predict, interval=0.1, timeout=1))
-    print(f"Peak memory usage: {peak_mem:.1f}MB")
+    tracemalloc measures the allocations made by predict itself, and the RSS
+    peak is sampled while the call runs rather than polled around it.
+    """
+    tracker = MemoryTracker()
+    tracker.start()
+    try:
+        with tracker.track("predict"):
+            trained_model.predict(SAMPLE_INPUT)
+    finally:
+        tracker.stop()
+    report = tracker.stages["predict"]
+    peak_mem = report["rss_peak_mb"]
+    peak_alloc = report["tracemalloc_peak_mb"]
+    print(f"Peak memory usage: {peak_mem:.1f}MB, predict allocations: {peak_alloc:.3f}MB")
 
     assert (
         peak_mem <= MAX_MEMORY_MB
     ), f"Memory usage {peak_mem:.1f}MB exceeds {MAX_MEMORY_MB}MB limit"
+    assert (
+        peak_alloc <= MAX_PREDICT_ALLOC_MB
+    ), f"Predict allocated {peak_alloc:.1f}MB, above the {MAX_PREDICT_ALLOC_MB}MB limit"
+
+
+def test_memory_report_per_stage():
+    """
+    Test that nested stages are reported separately and the outer peak covers the inner one
+    """
+
+    @memory_stage("outer")
+    def outer():
+        with track_memory("inner"):
+            block = np.ones((512, 1024))  # 4 MB
+            del block
+        return np.zeros((256, 1024)) + 1  # 2 MB kept alive
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report_path = os.path.join(tmpdir, "memory.json")
+        with memory_profiling(report_path):
+            kept = outer()
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+
+    assert kept.shape == (256, 1024)
+    assert set(report) == {"outer", "inner"}
+    assert report["inner"]["tracemalloc_peak_mb"] >= 4
+    assert report["outer"]["tracemalloc_peak_mb"] >= report["inner"]["tracemalloc_peak_mb"]
+    assert 1.9 <= report["outer"]["tracemalloc_delta_mb"] < 4
+    # Outside an active tracker the hooks are no-ops
+    assert track_memory("noop").__enter__() is None
+
+
+def test_rss_memory_mode_skips_tracemalloc():
+    """
+    Test that the RSS-only mode reports RSS per stage without tracing allocations
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report_path = os.path.join(tmpdir, "memory.json")
+        with memory_profiling(report_path, "rss"):
+            assert not tracemalloc.is_tracing()
+            with track_memory("predict"):
+                np.ones((512, 1024)).sum()
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+
+    assert set(report) == {"predict"}
+    assert report["predict"]["rss_peak_mb"] >= report["predict"]["rss_start_mb"] > 0
+    assert "tracemalloc_peak_mb" not in report["predict"]
 
 
 def test_prediction_latency(trained_model):
@@ -63,3 +129,64 @@ def test_throughput(trained_model):
     assert (
         throughput >= MIN_THROUGHPUT
     ), f"Throughput {throughput:.1f} predictions/sec is below minimum {MIN_THROUGHPUT}"
+
+
+def test_stage_timings_and_trace():
+    """
+    Test that step timings are merged per stage into one file and exported as a Chrome trace
+    """
+
+    @timed_stage("fit")
+    def fit():
+        with timed("inner"):
+            time.sleep(0.01)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        timings_path = os.path.join(tmpdir, "timings.json")
+        trace_path = os.path.join(tmpdir, "trace.json")
+        with timing_session("train_model", timings_path, trace_path):
+            fit()
+            fit()
+        with timing_session("evaluate", timings_path):
+            with timed("predict"):
+                pass
+        with open(timings_path, encoding="utf-8") as f:
+            timings = json.load(f)
+        with open(trace_path, encoding="utf-8") as f:
+            trace = json.load(f)
+
+    assert set(timings) == {"train_model", "evaluate"}
+    assert timings["train_model"]["fit"] >= 0.02
+    assert timings["train_model"]["total"] >= timings["train_model"]["fit"]
+    assert [e["name"] for e in trace["traceEvents"]] == ["fit", "inner", "fit", "inner"]
+    assert all(e["ph"] == "X" and e["dur"] > 0 for e in trace["traceEvents"])
+    # Without an active session the hooks are no-ops
+    assert timed("noop").__enter__() is None
+
+
+def test_profile_run_writes_stats_and_summary():
+    """
+    Test the opt-in cProfile mode: off by default, on via argument or environment variable
+    """
+
+    def hot_function():
+        return sum(i * i for i in range(20000))
+
+    with mock.patch.dict(os.environ, {PROFILE_ENV_VAR: ""}):
+        assert resolve_profile_dir(None) is None
+        with profile_run("noop") as result:
+            assert result is None
+    with mock.patch.dict(os.environ, {PROFILE_ENV_VAR: "1"}):
+        assert resolve_profile_dir(None) == "profiling"
+        assert resolve_profile_dir("custom") == "custom"
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with mock.patch.dict(os.environ, {PROFILE_ENV_VAR: tmpdir}):
+            with profile_run("train_model") as result:
+                hot_function()
+        assert os.path.dirname(result["stats"]) == tmpdir
+        assert os.path.exists(result["stats"])
+        with open(result["summary"], encoding="utf-8") as f:
+            summary = f.read()
+    assert "hot_function" in summary
+    assert "by tottime" in summary
@@ -0,0 +1,155 @@
+"""
+Monitoring: drift of incoming reviews against the training data
+"""
+
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+
+from src.drift import (DriftMonitor, js_divergence, load_summary, predict_sparse, psi,
+                       run_drift_check, save_summary, summarize_training)
+from src.ensemble import StackedEnsemble
+from src.features import FEATURE_MODES, count_terms, vectorize_reviews, weight_terms
+from src.prepare_data import preprocess_dataset
+from src.train import dense_rows
+
+TRAIN = [
+    "good food and friendly staff",
+    "bad service and cold food",
+    "great place with good coffee",
+    "terrible food never again",
+    "friendly staff and great coffee",
+    "cold coffee and bad staff",
+] * 5
+LABELS = [1, 0, 1, 0, 1, 0] * 5
+SHIFTED = ["le repas etait lent", "tres bonne cuisine maison", "prix trop eleves"] * 10
+
+
+def _fit():
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(TRAIN).toarray()
+    model = GaussianNB().fit(X, LABELS)
+    return vectorizer, model, summarize_training(X, np.array(LABELS), model)
+
+
+def test_divergences():
+    assert psi([10, 20, 30], [10, 20, 30]) == 0
+    assert psi([10, 20, 30], [30, 20, 10]) > 0.2
+    assert 0 < js_divergence([1, 0], [0, 1]) <= np.log(2)
+
+
+def test_sparse_predictions_match_gaussian_nb():
+    vectorizer, model, summary = _fit()
+    X = vectorizer.transform(TRAIN + SHIFTED)
+    assert np.array_equal(predict_sparse(X, summary), model.predict(X.toarray()))
+
+
+def test_same_distribution_has_no_drift_and_streams_consistently():
+    vectorizer, _, summary = _fit()
+    whole = DriftMonitor(summary, vectorizer)
+    whole.update(TRAIN)
+    streamed = DriftMonitor(summary, vectorizer)
+    for start in range(0, len(TRAIN), 7):
+        streamed.update(TRAIN[start : start + 7])
+
+    report = whole.report()
+    assert report == streamed.report()
+    assert not report["drift_detected"]
+    assert report["oov_rate"] == 0 and report["term_js"] < 1e-9 and report["length_psi"] < 1e-9
+    assert report["class_balance_psi"] < 1e-9
+
+
+def _models(X, y):
+    rng = np.random.default_rng(0)
+    samples = [rng.integers(0, X.shape[0], X.shape[0]) for _ in range(3)]
+    return {
+        "gaussian_nb": GaussianNB().fit(X.toarray(), y),
+        "sgd": SGDClassifier(random_state=0).fit(X, y),
+        "nb_ensemble": StackedEnsemble([GaussianNB().fit(X[rows].toarray(), y[rows]) for rows in samples]),
+        "sgd_ensemble": StackedEnsemble([SGDClassifier(random_state=seed).fit(X, y) for seed in range(3)]),
+    }
+
+
+@pytest.mark.parametrize("kind", ["gaussian_nb", "sgd", "nb_ensemble", "sgd_ensemble"])
+def test_summary_predicts_like_every_model_kind(kind, tmp_path):
+    vectorizer = CountVectorizer()
+    X, y = vectorizer.fit_transform(TRAIN), np.array(LABELS)
+    model = _models(X, y)[kind]
+    # Mislabel rows the model gets right: class balance compares predictions, not labels
+    noisy = y.copy()
+    noisy[:4] = 1
+    save_summary(tmp_path / "summary.npz", summarize_training(X, noisy, model, batch_rows=7))
+    summary = load_summary(tmp_path / "summary.npz")
+
+    def predict(rows):
+        return model.predict(rows.toarray() if kind == "gaussian_nb" else rows)
+
+    batch = vectorizer.transform(TRAIN + SHIFTED)
+    assert np.array_equal(predict_sparse(batch, summary), predict(batch))
+    assert summary["predicted_class_counts"].tolist() == np.bincount(predict(X)).tolist()
+    monitor = DriftMonitor(summary, vectorizer)
+    monitor.update(TRAIN)
+    assert monitor.report()["class_balance_psi"] < 1e-9
+
+
+def test_summary_rejects_unsupported_models():
+    X = CountVectorizer().fit_transform(TRAIN)
+    with pytest.raises(TypeError, match="DecisionTreeClassifier"):
+        summarize_training(X, LABELS, DecisionTreeClassifier().fit(X, LABELS))
+
+
+def test_shifted_batch_is_flagged():
+    vectorizer, model, summary = _fit()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        summary_path = os.path.join(tmpdir, "training_summary.npz")
+        bow_path = os.path.join(tmpdir, "bow.pkl")
+        dataset_path = os.path.join(tmpdir, "fresh.tsv")
+        report_path = os.path.join(tmpdir, "drift.json")
+        save_summary(summary_path, summarize_training(vectorizer.transform(TRAIN), LABELS, model))
+        joblib.dump(vectorizer, bow_path)
+        pd.DataFrame({"Review": SHIFTED}).to_csv(dataset_path, sep="\t", index=False)
+
+        report = run_drift_check(summary_path, bow_path, dataset_path, report_path, chunk_rows=8)
+
+        assert load_summary(summary_path).keys() == summary.keys()
+        with open(report_path, "r", encoding="utf-8") as f:
+            assert json.load(f) == report
+    assert report["rows"] == len(SHIFTED)
+    assert report["oov_rate"] == 1 and report["empty_rate"] == 1
+    assert report["drift_detected"]
+    assert any(alert.startswith("oov_rate") for alert in report["alerts"])
+
+
+@pytest.mark.parametrize("mode", FEATURE_MODES)
+def test_training_data_has_no_drift_in_every_feature_mode(mode, tmp_path):
+    if mode == "bow":
+        pytest.importorskip("libml")
+    dataset_path = tmp_path / "train.tsv"
+    pd.DataFrame({"Review": TRAIN, "Liked": LABELS}).to_csv(dataset_path, sep="\t", index=False)
+    # A small max_features prunes training terms, which must not count as drift
+    X, y, vectorizer, _ = preprocess_dataset(str(dataset_path), features={"mode": mode, "max_features": 12})
+    counts, _ = count_terms(vectorizer, TRAIN)
+    assert np.allclose(weight_terms(vectorizer, counts).toarray(), vectorize_reviews(vectorizer, TRAIN).toarray())
+    assert np.allclose(vectorize_reviews(vectorizer, TRAIN).toarray(), dense_rows(X), atol=1e-6)
+
+    monitor = DriftMonitor(summarize_training(X, y, GaussianNB().fit(dense_rows(X), y)), vectorizer)
+    monitor.update(TRAIN)
+    report = monitor.report()
+
+    if mode != "bow":
+        assert report["train_oov_rate"] > 0
+    assert report["oov_rate"] == pytest.approx(report["train_oov_rate"])
+    assert report["length_psi"] < 1e-9 and report["term_js"] < 1e-9
+    assert not report["drift_detected"], report["alerts"]
+
+    monitor.update(SHIFTED)
+    assert monitor.report()["oov_rate"] > report["oov_rate"]
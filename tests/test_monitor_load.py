@@ -0,0 +1,83 @@
+"""
+Monitoring: serving latency under concurrent load
+"""
+
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import GaussianNB
+
+from scripts.load_test import (HttpTarget, InProcessTarget, find_saturation,
+                               load_requests, run_load, run_sweep,
+                               start_stand_in, stand_in_url)
+from src.predictor import SentimentPredictor
+
+REVIEWS = ["good food", "bad service", "great place", "terrible food", "good service"]
+LABELS = [1, 0, 1, 0, 1]
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    """Small BoW vectorizer and classifier saved the same way as the pipeline artifacts"""
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(REVIEWS).toarray()
+    model = GaussianNB(var_smoothing=1e-9).fit(X, LABELS)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bow_path = os.path.join(tmpdir, "bow.pkl")
+        model_path = os.path.join(tmpdir, "model.pkl")
+        joblib.dump(vectorizer, bow_path)
+        joblib.dump(model, model_path)
+        requests_path = os.path.join(tmpdir, "requests.jsonl")
+        with open(requests_path, "w", encoding="utf-8") as f:
+            for review in REVIEWS:
+                f.write(json.dumps({"review": review}) + "\n")
+        yield {"bow": bow_path, "model": model_path, "requests": requests_path}
+
+
+def test_predictor_matches_training_labels(artifacts):
+    predictor = SentimentPredictor.from_paths(artifacts["bow"], artifacts["model"])
+    assert np.array_equal(predictor.predict(REVIEWS), LABELS)
+
+
+@pytest.mark.parametrize("mode", ["threads", "asyncio"])
+def test_closed_loop_throughput_and_percentiles(artifacts, mode):
+    texts = load_requests(artifacts["requests"])
+    target = InProcessTarget(artifacts["bow"], artifacts["model"])
+    result = run_load(target, texts, mode=mode, concurrency=2, n_requests=50)
+    assert result["requests"] == 50 and result["errors"] == 0
+    assert result["throughput_rps"] > 0
+    lat = result["latency_ms"]
+    assert lat["p50"] <= lat["p90"] <= lat["p99"] <= lat["max"]
+
+
+def test_open_loop_against_http_stand_in(artifacts):
+    predictor = SentimentPredictor.from_paths(artifacts["bow"], artifacts["model"])
+    server = start_stand_in(predictor.predict)
+    try:
+        target = HttpTarget(stand_in_url(server))
+        assert target("good food") == {"prediction": 1}
+        texts = load_requests(artifacts["requests"])
+        report = run_sweep(
+            target, texts, [100, 200], loop="open", concurrency=4, n_requests=40
+        )
+    finally:
+        server.shutdown()
+    assert [r["level"] for r in report["results"]] == [100, 200]
+    assert all(r["errors"] == 0 for r in report["results"])
+    assert report["saturation"]["level"] in (100, 200)
+
+
+def test_find_saturation_on_plateau_and_slo():
+    def level(value, rps, p99):
+        return {"level": value, "throughput_rps": rps, "latency_ms": {"p99": p99}}
+
+    sweep = [level(1, 100, 5), level(2, 190, 6), level(4, 195, 9), level(8, 196, 40)]
+    assert find_saturation(sweep)["level"] == 2
+    assert find_saturation(sweep[:2])["reason"].startswith("not reached")
+    sweep[1]["latency_ms"]["p99"] = 50
+    assert find_saturation(sweep, slo_ms=20)["level"] == 1
@@ -0,0 +1,103 @@
+"""
+Monitoring: shadow evaluation of a candidate model on replayed requests
+"""
+
+import json
+import pickle
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+
+from src.shadow import ShadowEvaluator, iter_request_batches, run_shadow_evaluation
+
+REVIEWS = [
+    "good food",
+    "bad service",
+    "great place and really good food with friendly staff every time",
+    "terrible food",
+    "good service",
+    "not good",
+]
+LABELS = [1, 0, 1, 0, 1, 0]
+
+
+class CountingVectorizer:
+    """Wraps a vectorizer and counts transform calls"""
+
+    def __init__(self, vectorizer):
+        self.vectorizer = vectorizer
+        self.calls = 0
+
+    def transform(self, reviews):
+        self.calls += 1
+        return self.vectorizer.transform(reviews)
+
+
+def models():
+    vectorizer = CountVectorizer().fit(REVIEWS)
+    X = vectorizer.transform(REVIEWS)
+    incumbent = GaussianNB().fit(X.toarray(), LABELS)
+    candidate = LogisticRegression(C=1e4).fit(X, [1, 0, 1, 0, 1, 1])  # Sparse input, flips "not good"
+    return vectorizer, incumbent, candidate
+
+
+def write_log(path, n):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"review": REVIEWS[i % 6], "Liked": LABELS[i % 6], "source": f"s{i % 2}"}) + "\n")
+        f.write(json.dumps("good food") + "\n\n")
+
+
+def test_log_is_streamed_in_batches(tmp_path):
+    write_log(tmp_path / "requests.jsonl", 9)
+    batches = list(iter_request_batches(str(tmp_path / "requests.jsonl"), batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert batches[-1][-1] == {"review": "good food"}
+
+
+def test_batches_are_vectorized_once_for_both_models():
+    vectorizer, incumbent, candidate = models()
+    counting = CountingVectorizer(vectorizer)
+    evaluator = ShadowEvaluator(counting, incumbent, candidate)
+    records = [{"review": review, "label": label} for review, label in zip(REVIEWS, LABELS)]
+    evaluator.update(records[:3])
+    evaluator.update(records[3:])
+
+    assert counting.calls == 2
+    X = vectorizer.transform(REVIEWS)
+    agree = candidate.predict(X) == incumbent.predict(X.toarray())
+    report = evaluator.report()
+    assert report["agreement_rate"] == agree.mean() and report["batches"] == 2
+    assert report["accuracy"]["candidate"] == 5 / 6 and report["labeled_requests"] == 6
+    assert report["latency"]["shared_features"] is True
+    # A candidate shipping an identical vectorizer still shares the features
+    copy = pickle.loads(pickle.dumps(vectorizer))
+    assert ShadowEvaluator(vectorizer, incumbent, candidate, candidate_vectorizer=copy).candidate_vectorizer is None
+
+
+def test_shadow_report_slices_disagreements(tmp_path):
+    vectorizer, incumbent, candidate = models()
+    for name, obj in (("bow", vectorizer), ("model", incumbent), ("candidate", candidate)):
+        joblib.dump(obj, tmp_path / f"{name}.pkl")
+    write_log(tmp_path / "requests.jsonl", 12)
+    report = run_shadow_evaluation(
+        str(tmp_path / "requests.jsonl"), str(tmp_path / "bow.pkl"), str(tmp_path / "model.pkl"),
+        str(tmp_path / "candidate.pkl"), str(tmp_path / "shadow.json"), slice_fields=("source",), batch_size=5,
+    )
+
+    X = vectorizer.transform(REVIEWS)
+    disagree = candidate.predict(X) != incumbent.predict(X.toarray())
+    assert report["requests"] == 13 and report["batches"] == 3
+    assert report["disagreements"] == 2 * disagree.sum() + disagree[0]
+    assert report["examples"][0]["review"] == REVIEWS[int(np.argmax(disagree))]
+    assert report["slices"]["source"] == {
+        "s0": {"requests": 6, "disagreement_rate": disagree[0::2].mean()},
+        "s1": {"requests": 6, "disagreement_rate": disagree[1::2].mean()},
+    }
+    assert set(report["slices"]["length"]) == {"short", "medium"}
+    assert np.isclose(report["accuracy"]["candidate"], 10 / 12)
+    with open(tmp_path / "shadow.json", encoding="utf-8") as f:
+        assert json.load(f)["agreement_rate"] == report["agreement_rate"]
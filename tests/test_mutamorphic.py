@@ -1,26 +1,68 @@
 import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import GaussianNB
+
+from src.evaluate import evaluate_model
+from src.metamorphic import MetamorphicSuite
+
 MIN_SLICE_ACCURACY = 0.80
+MIN_INVARIANCE = {
+    "feature_swap": 0.95,
+    "count_scaling": 0.80,
+    "synonym_substitution": 0.90,
+    "token_insertion": 0.95,
+}
 
 
-def test_feature_swap_mutamorphic_two_samples(trained_model, test_data):
+def test_mutamorphic_invariance_all_samples(trained_model, test_data, bow_vectorizer):
     """
-    Mutamorphic test: For two random test samples, swap two random features and check that the prediction does not change.
+    Mutamorphic test: every test sample gets 20 variants per transformation family (feature swaps,
+    count scaling, synonym substitution, irrelevant token insertion), scored with one predict call
+    per family; the fraction of unchanged predictions must stay above the family's threshold.
     """
-    X = test_data["X"]
-    n_samples, n_features = X.shape
-    rng = np.random.default_rng(42)
-
-    for _ in range(2):
-        idx = rng.integers(0, n_samples)
-        x_orig = X[idx].copy()
-        i, j = rng.choice(n_features, size=2, replace=False)
-        x_swapped = x_orig.copy()
-        x_swapped[i], x_swapped[j] = x_swapped[j], x_swapped[i]
-        pred_orig = trained_model.predict([x_orig])[0]
-        pred_swap = trained_model.predict([x_swapped])[0]
-        assert (
-            pred_orig == pred_swap
-        ), f"Swapping features {i} and {j} in sample {idx} changed the predicted class"
+    vocabulary = bow_vectorizer.get_feature_names_out().tolist()
+    suite = MetamorphicSuite(trained_model, vocabulary, variants=20)
+    report = suite.run(test_data["X"])
+
+    assert report["feature_swap"]["variants"] == 20 * len(test_data["X"])
+    for name, result in report.items():
+        if result["variants"] == 0:
+            continue  # e.g. no WordNet synonyms available
+        assert result["invariance_rate"] >= MIN_INVARIANCE[name], (
+            f"{name}: invariance {result['invariance_rate']:.3f} < {MIN_INVARIANCE[name]}, "
+            f"violating samples {result['violating_samples']}"
+        )
+
+
+def test_metamorphic_transformations():
+    """The batched transformations change the rows in the intended way"""
+    reviews = ["good food", "great food", "bad service", "awful service", "good place"]
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(reviews).toarray()
+    model = GaussianNB().fit(X, [1, 1, 0, 0, 1])
+    vocabulary = vectorizer.get_feature_names_out().tolist()
+    suite = MetamorphicSuite(
+        model, vocabulary, synonyms={"good": ["great"], "bad": ["awful"]}, variants=3
+    )
+    rng = np.random.default_rng(0)
+
+    swapped = suite.feature_swap(X, rng)
+    assert swapped.shape == (15, X.shape[1])
+    assert (np.sort(swapped, axis=1) == np.sort(np.repeat(X, 3, axis=0), axis=1)).all()
+
+    substituted = suite.synonym_substitution(X, rng)
+    good, great = vocabulary.index("good"), vocabulary.index("great")
+    assert substituted[0, good] == 0 and substituted[0, great] == 1
+    assert (substituted[3:6] == X[1]).all()  # "great food" has no substitutable term
+
+    inserted = suite.token_insertion(X, rng)
+    assert (inserted.sum(axis=1) == np.repeat(X.sum(axis=1), 3) + 1).all()
+
+    report = suite.run(X)
+    assert set(report) == {"feature_swap", "count_scaling", "synonym_substitution", "token_insertion"}
+    assert all(result["variants"] == 15 for result in report.values())
+
 
 def test_negative_keywords(trained_model, test_data):
     """
@@ -8,6 +8,7 @@ import pandas as pd
 from sklearn.naive_bayes import GaussianNB
 
 from src import evaluate
+from src.features import load_features
 from src.prepare_data import preprocess_and_save
 from src.train import save_json, save_split_data
 
@@ -26,7 +27,7 @@ def test_save_json_and_split_data():
         X = np.array([[1, 2], [3, 4]])
         y = np.array([0, 1])
         save_split_data(tmpdir, X, y)
-        assert np.array_equal(np.load(os.path.join(tmpdir, "X_test.npy")), X)
+        assert np.array_equal(load_features(os.path.join(tmpdir, "X_test.npz")).toarray(), X)
         assert np.array_equal(np.load(os.path.join(tmpdir, "y_test.npy")), y)
 
 
@@ -42,7 +43,7 @@ def test_preprocess_and_save():
         assert X.shape[0] == 2
         assert set(y) == {0, 1}
         # Check files saved
-        assert os.path.exists(os.path.join(output_dir, "X.npy"))
+        assert os.path.exists(os.path.join(output_dir, "X.npz"))
         assert os.path.exists(os.path.join(output_dir, "y.npy"))
         assert os.path.exists(os.path.join(bow_dir, "c1_BoW_Sentiment_Model.pkl"))
 